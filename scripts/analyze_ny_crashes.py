@@ -18,20 +18,33 @@ import seaborn as sns
 from pathlib import Path
 from datetime import datetime
 import json
+import sys
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.analysis.crash_profile import CrashProfile
+from src.features import categorize
+from src.features.categorize import categorize_traffic_period
+from src.data.checkpoints import code_version, file_digest
 
 
 class NYCrashAnalyzer:
     """Analyze NY crash data for insights and ML feature engineering"""
 
-    def __init__(self, data_path='data/raw/crashes/ny_crashes.csv'):
+    def __init__(self, data_path='data/raw/crashes/ny_crashes.csv', cache_dir='data/cache/profiles'):
         """
         Initialize analyzer
 
         Args:
             data_path: Path to NY crashes CSV file
+            cache_dir: Directory of cached crash profiles
         """
         self.data_path = Path(data_path)
+        self.cache_dir = Path(cache_dir)
         self.df = None
+        self.profile = None
         self.analysis_results = {}
 
     def load_data(self):
@@ -60,21 +73,7 @@ class NYCrashAnalyzer:
         self.df['is_fatal'] = self.df['severity_level'] == 3
 
         # Create time of day categories
-        def categorize_time(hour):
-            if pd.isna(hour):
-                return 'Unknown'
-            elif 6 <= hour < 10:
-                return 'Morning Rush (6-10am)'
-            elif 10 <= hour < 16:
-                return 'Midday (10am-4pm)'
-            elif 16 <= hour < 20:
-                return 'Evening Rush (4-8pm)'
-            elif 20 <= hour < 24 or 0 <= hour < 6:
-                return 'Night (8pm-6am)'
-            else:
-                return 'Unknown'
-
-        self.df['time_category'] = self.df['hour'].apply(categorize_time)
+        self.df['time_category'] = categorize_traffic_period(self.df['hour'])
 
         print(f"✓ Loaded {len(self.df):,} crash records")
         print(f"  Date range: {self.df['date_parsed'].min()} to {self.df['date_parsed'].max()}")
@@ -82,21 +81,49 @@ class NYCrashAnalyzer:
 
         return self.df
 
+    def load_profile(self, use_cache=True):
+        """
+        Load the crash profile (all value counts, overall and by severity)
+
+        The profile is cached under the input file's content hash (and the
+        profiling code's version); a cache hit skips reading the CSV.
+
+        Args:
+            use_cache: Reuse a cached profile when one exists
+        """
+        print("\n" + "="*70)
+        print("PROFILING NY CRASH DATA")
+        print("="*70)
+
+        version = code_version(NYCrashAnalyzer.load_data, categorize, CrashProfile)
+        cache_path = self.cache_dir / f"{self.data_path.stem}_{file_digest(self.data_path)[:16]}_{version}.json"
+
+        if use_cache and cache_path.exists():
+            self.profile = CrashProfile.load(cache_path)
+            print(f"✓ Using cached profile: {cache_path}")
+        else:
+            self.load_data()
+            self.profile = CrashProfile.build(self.df)
+            self.profile.save(cache_path)
+            print(f"✓ Profiled {len(self.profile.tables)} columns, cached to: {cache_path}")
+
+        print(f"  Records: {self.profile.n_rows:,}")
+        return self.profile
+
     def analyze_completeness(self):
         """Analyze data completeness and missing values"""
         print("\n" + "="*70)
         print("DATA COMPLETENESS ANALYSIS")
         print("="*70)
 
-        total = len(self.df)
+        total = self.profile.n_rows
         completeness = {}
 
         print(f"\nTotal records: {total:,}\n")
         print(f"{'Field':<40} {'Non-Null':>12} {'Complete':>10}")
         print("-" * 70)
 
-        for col in self.df.columns:
-            non_null = self.df[col].notna().sum()
+        for col, non_null in self.profile.summary['completeness'].items():
             pct = non_null / total * 100
             completeness[col] = {'count': non_null, 'percent': pct}
 
@@ -134,7 +161,7 @@ class NYCrashAnalyzer:
         # Year distribution
         print("\n1. YEARLY DISTRIBUTION:")
         print("-" * 50)
-        year_counts = self.df['year'].value_counts().sort_index()
+        year_counts = self.profile.counts('year').sort_index()
         for year, count in year_counts.items():
             print(f"  {year}: {count:>8,} crashes")
 
@@ -142,11 +169,11 @@ class NYCrashAnalyzer:
         print("\n2. DAY OF WEEK DISTRIBUTION:")
         print("-" * 50)
         dow_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        dow_counts = self.df['day_of_week'].value_counts()
+        dow_counts = self.profile.counts('day_of_week')
         for day in dow_order:
             if day in dow_counts.index:
                 count = dow_counts[day]
-                pct = count / len(self.df) * 100
+                pct = count / self.profile.n_rows * 100
                 print(f"  {day:<12}: {count:>8,} ({pct:>5.1f}%)")
 
         # Time of day
@@ -154,11 +181,11 @@ class NYCrashAnalyzer:
         print("-" * 50)
         time_order = ['Morning Rush (6-10am)', 'Midday (10am-4pm)',
                      'Evening Rush (4-8pm)', 'Night (8pm-6am)', 'Unknown']
-        time_counts = self.df['time_category'].value_counts()
+        time_counts = self.profile.counts('time_category')
         for time_cat in time_order:
             if time_cat in time_counts.index:
                 count = time_counts[time_cat]
-                pct = count / len(self.df) * 100
+                pct = count / self.profile.n_rows * 100
                 print(f"  {time_cat:<25}: {count:>8,} ({pct:>5.1f}%)")
 
         # Store results
@@ -177,24 +204,26 @@ class NYCrashAnalyzer:
         # Overall severity
         print("\n1. ACCIDENT SEVERITY:")
         print("-" * 50)
-        severity_counts = self.df['accident_descriptor'].value_counts()
+        severity_counts = self.profile.counts('accident_descriptor')
         for severity, count in severity_counts.items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {severity:<40}: {count:>8,} ({pct:>5.1f}%)")
 
         # Calculate rates
-        injury_rate = self.df['is_injury'].sum() / len(self.df) * 100
-        fatal_rate = self.df['is_fatal'].sum() / len(self.df) * 100
+        injury_count = self.profile.summary['injury_count']
+        fatal_count = self.profile.summary['fatal_count']
+        injury_rate = injury_count / self.profile.n_rows * 100
+        fatal_rate = fatal_count / self.profile.n_rows * 100
 
-        print(f"\n  Total with injuries: {self.df['is_injury'].sum():,} ({injury_rate:.1f}%)")
-        print(f"  Total fatal: {self.df['is_fatal'].sum():,} ({fatal_rate:.2f}%)")
+        print(f"\n  Total with injuries: {injury_count:,} ({injury_rate:.1f}%)")
+        print(f"  Total fatal: {fatal_count:,} ({fatal_rate:.2f}%)")
 
         # Vehicles involved
         print("\n2. VEHICLES INVOLVED:")
         print("-" * 50)
-        vehicle_counts = self.df['number_of_vehicles_involved'].value_counts().sort_index()
+        vehicle_counts = self.profile.counts('number_of_vehicles_involved').sort_index()
         for num_vehicles, count in vehicle_counts.head(10).items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {num_vehicles} vehicle(s): {count:>8,} ({pct:>5.1f}%)")
 
         # Store results
@@ -214,33 +243,33 @@ class NYCrashAnalyzer:
         # Weather
         print("\n1. WEATHER CONDITIONS:")
         print("-" * 50)
-        weather_counts = self.df['weather_conditions'].value_counts()
+        weather_counts = self.profile.counts('weather_conditions')
         for weather, count in weather_counts.head(10).items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {weather:<30}: {count:>8,} ({pct:>5.1f}%)")
 
         # Lighting
         print("\n2. LIGHTING CONDITIONS:")
         print("-" * 50)
-        lighting_counts = self.df['lighting_conditions'].value_counts()
+        lighting_counts = self.profile.counts('lighting_conditions')
         for lighting, count in lighting_counts.items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {lighting:<30}: {count:>8,} ({pct:>5.1f}%)")
 
         # Road surface
         print("\n3. ROAD SURFACE CONDITIONS:")
         print("-" * 50)
-        surface_counts = self.df['road_surface_conditions'].value_counts()
+        surface_counts = self.profile.counts('road_surface_conditions')
         for surface, count in surface_counts.items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {surface:<30}: {count:>8,} ({pct:>5.1f}%)")
 
         # Road descriptor
         print("\n4. ROAD CHARACTERISTICS:")
         print("-" * 50)
-        road_counts = self.df['road_descriptor'].value_counts()
+        road_counts = self.profile.counts('road_descriptor')
         for road, count in road_counts.head(10).items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {road:<30}: {count:>8,} ({pct:>5.1f}%)")
 
         # Store results
@@ -260,25 +289,25 @@ class NYCrashAnalyzer:
         # Collision type
         print("\n1. COLLISION TYPES:")
         print("-" * 50)
-        collision_counts = self.df['collision_type_descriptor'].value_counts()
+        collision_counts = self.profile.counts('collision_type_descriptor')
         for collision, count in collision_counts.head(15).items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {collision:<30}: {count:>8,} ({pct:>5.1f}%)")
 
         # Event descriptor
         print("\n2. EVENT DESCRIPTORS (Top 15):")
         print("-" * 50)
-        event_counts = self.df['event_descriptor'].value_counts()
+        event_counts = self.profile.counts('event_descriptor')
         for event, count in event_counts.head(15).items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {event:<40}: {count:>8,} ({pct:>5.1f}%)")
 
         # Traffic control
         print("\n3. TRAFFIC CONTROL DEVICES:")
         print("-" * 50)
-        control_counts = self.df['traffic_control_device'].value_counts()
+        control_counts = self.profile.counts('traffic_control_device')
         for control, count in control_counts.items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {control:<30}: {count:>8,} ({pct:>5.1f}%)")
 
         # Store results
@@ -297,35 +326,35 @@ class NYCrashAnalyzer:
         # County distribution
         print("\n1. TOP 20 COUNTIES BY CRASH COUNT:")
         print("-" * 50)
-        county_counts = self.df['county_name'].value_counts()
+        county_counts = self.profile.counts('county_name')
 
-        print(f"  Total counties: {self.df['county_name'].nunique()}")
+        print(f"  Total counties: {self.profile.nunique('county_name')}")
         print(f"\n  {'County':<20} {'Crashes':>10} {'% of Total':>12}")
         print("  " + "-" * 45)
 
         for county, count in county_counts.head(20).items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {county:<20} {count:>10,} {pct:>11.1f}%")
 
         # Municipality distribution
         print("\n2. TOP 20 MUNICIPALITIES BY CRASH COUNT:")
         print("-" * 50)
-        muni_counts = self.df['municipality'].value_counts()
+        muni_counts = self.profile.counts('municipality')
 
-        print(f"  Total municipalities: {self.df['municipality'].nunique()}")
+        print(f"  Total municipalities: {self.profile.nunique('municipality')}")
         print(f"\n  {'Municipality':<20} {'Crashes':>10} {'% of Total':>12}")
         print("  " + "-" * 45)
 
         for muni, count in muni_counts.head(20).items():
-            pct = count / len(self.df) * 100
+            pct = count / self.profile.n_rows * 100
             print(f"  {muni:<20} {count:>10,} {pct:>11.1f}%")
 
         # Store results
         self.analysis_results['geographic'] = {
             'by_county': county_counts.to_dict(),
             'by_municipality': muni_counts.to_dict(),
-            'unique_counties': int(self.df['county_name'].nunique()),
-            'unique_municipalities': int(self.df['municipality'].nunique())
+            'unique_counties': int(self.profile.nunique('county_name')),
+            'unique_municipalities': int(self.profile.nunique('municipality'))
         }
 
     def identify_high_risk_patterns(self):
@@ -334,54 +363,52 @@ class NYCrashAnalyzer:
         print("HIGH-RISK PATTERN ANALYSIS")
         print("="*70)
 
-        # Fatal crashes by condition
-        fatal_df = self.df[self.df['is_fatal']]
+        # Fatal crashes by condition (severity-conditional counts from the profile)
+        total_fatal = self.profile.summary['fatal_count']
 
-        if len(fatal_df) > 0:
-            print(f"\n1. FATAL CRASH CHARACTERISTICS ({len(fatal_df):,} fatal crashes):")
+        if total_fatal > 0:
+            print(f"\n1. FATAL CRASH CHARACTERISTICS ({total_fatal:,} fatal crashes):")
             print("-" * 50)
 
             # Weather in fatal crashes
             print("\n  Weather conditions in fatal crashes:")
-            fatal_weather = fatal_df['weather_conditions'].value_counts()
-            total_fatal = len(fatal_df)
+            fatal_weather = self.profile.counts('weather_conditions', 'fatal')
             for weather, count in fatal_weather.head(5).items():
                 pct = count / total_fatal * 100
                 print(f"    {weather:<25}: {count:>6,} ({pct:>5.1f}%)")
 
             # Lighting in fatal crashes
             print("\n  Lighting conditions in fatal crashes:")
-            fatal_lighting = fatal_df['lighting_conditions'].value_counts()
+            fatal_lighting = self.profile.counts('lighting_conditions', 'fatal')
             for lighting, count in fatal_lighting.head(5).items():
                 pct = count / total_fatal * 100
                 print(f"    {lighting:<25}: {count:>6,} ({pct:>5.1f}%)")
 
             # Time of day in fatal crashes
             print("\n  Time of day in fatal crashes:")
-            fatal_time = fatal_df['time_category'].value_counts()
+            fatal_time = self.profile.counts('time_category', 'fatal')
             for time_cat, count in fatal_time.items():
                 pct = count / total_fatal * 100
                 print(f"    {time_cat:<25}: {count:>6,} ({pct:>5.1f}%)")
 
         # Injury crashes
-        injury_df = self.df[self.df['is_injury']]
-        print(f"\n2. INJURY CRASH PATTERNS ({len(injury_df):,} injury crashes):")
+        total_injury = self.profile.summary['injury_count']
+        print(f"\n2. INJURY CRASH PATTERNS ({total_injury:,} injury crashes):")
         print("-" * 50)
 
         # Collision types in injury crashes
         print("\n  Top collision types in injury crashes:")
-        injury_collision = injury_df['collision_type_descriptor'].value_counts()
-        total_injury = len(injury_df)
+        injury_collision = self.profile.counts('collision_type_descriptor', 'injury')
         for collision, count in injury_collision.head(5).items():
             pct = count / total_injury * 100
             print(f"    {collision:<25}: {count:>6,} ({pct:>5.1f}%)")
 
         # Store results
         self.analysis_results['high_risk'] = {
-            'fatal_count': int(len(fatal_df)),
-            'injury_count': int(len(injury_df)),
-            'fatal_weather': fatal_weather.to_dict() if len(fatal_df) > 0 else {},
-            'fatal_lighting': fatal_lighting.to_dict() if len(fatal_df) > 0 else {},
+            'fatal_count': int(total_fatal),
+            'injury_count': int(total_injury),
+            'fatal_weather': fatal_weather.to_dict() if total_fatal > 0 else {},
+            'fatal_lighting': fatal_lighting.to_dict() if total_fatal > 0 else {},
             'injury_collision_types': injury_collision.to_dict()
         }
 
@@ -516,14 +543,14 @@ class NYCrashAnalyzer:
 
         print(f"\n✓ Analysis report saved to: {output_path}")
 
-    def run_full_analysis(self):
+    def run_full_analysis(self, use_cache=True, output_path='outputs/ny_crash_analysis.json'):
         """Run complete analysis pipeline"""
         print("\n" + "="*80)
         print(" " * 25 + "NY CRASH DATA ANALYSIS")
         print("="*80)
 
-        # Load data
-        self.load_data()
+        # Load (or reuse) the profile every report section reads from
+        self.load_profile(use_cache=use_cache)
 
         # Run all analyses
         self.analyze_completeness()
@@ -536,24 +563,35 @@ class NYCrashAnalyzer:
         self.generate_ml_recommendations()
 
         # Save report
-        self.save_analysis_report()
+        self.save_analysis_report(output_path)
 
         print("\n" + "="*80)
         print("ANALYSIS COMPLETE")
         print("="*80)
-        print(f"\nTotal crashes analyzed: {len(self.df):,}")
-        print(f"Date range: {self.df['date_parsed'].min()} to {self.df['date_parsed'].max()}")
-        print(f"Counties covered: {self.df['county_name'].nunique()}")
-        print(f"Fatal crashes: {self.df['is_fatal'].sum():,}")
-        print(f"Injury crashes: {self.df['is_injury'].sum():,}")
+        summary = self.profile.summary
+        print(f"\nTotal crashes analyzed: {summary['n_rows']:,}")
+        print(f"Date range: {summary['date_min']} to {summary['date_max']}")
+        print(f"Counties covered: {self.profile.nunique('county_name')}")
+        print(f"Fatal crashes: {summary['fatal_count']:,}")
+        print(f"Injury crashes: {summary['injury_count']:,}")
         print("\nNext step: Run county-level integration with work zones")
         print("="*80)
 
 
 def main():
     """Main execution"""
-    analyzer = NYCrashAnalyzer()
-    analyzer.run_full_analysis()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Analyze NY crash data')
+    parser.add_argument('--data', default='data/raw/crashes/ny_crashes.csv', help='Crashes CSV path')
+    parser.add_argument('--output', default='outputs/ny_crash_analysis.json', help='Analysis report path')
+    parser.add_argument('--cache-dir', default='data/cache/profiles', help='Crash profile cache directory')
+    parser.add_argument('--no-cache', action='store_true', help='Rebuild the crash profile')
+
+    args = parser.parse_args()
+
+    analyzer = NYCrashAnalyzer(data_path=args.data, cache_dir=args.cache_dir)
+    analyzer.run_full_analysis(use_cache=not args.no_cache, output_path=args.output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for crash feature categorization
+
+Compares the shared vectorized categorizers in src/features/categorize.py
+(time of day, weather and temperature from build_ml_training_dataset.py,
+the NY traffic period from analyze_ny_crashes.py and the work zone risk
+level from integrate_ny_county_data.py) against the original row-wise
+.apply versions on synthetic rows, and checks that both produce the same
+categories. It also compares the per-segment-month highway_type mode of
+build_segment_dataset.py (one grouped count, see _pick_mode) against the
+original per-group Series.mode() lambda.
+
+Usage:
+    python scripts/benchmark_feature_engineering.py
+    python scripts/benchmark_feature_engineering.py --rows 1000000 --repeat 5
+    python scripts/benchmark_feature_engineering.py --mode-rows 150000 --mode-segments 4000
+"""
+
+import argparse
+import sys
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Add project root and scripts to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+sys.path.append(str(project_root / 'scripts'))
+
+from src.features.categorize import (
+    categorize_time_of_day, categorize_weather, categorize_temperature,
+    categorize_traffic_period, categorize_risk_score
+)
+from build_segment_dataset import _pick_mode
+
+# OSM highway types of segment crashes (missing where no road was matched)
+HIGHWAY_TYPES = ['motorway', 'trunk', 'primary', 'secondary', 'tertiary', 'residential', None]
+
+# A realistic spread of Kaggle Weather_Condition values
+WEATHER_CONDITIONS = [
+    'Fair', 'Clear', 'Mostly Cloudy', 'Partly Cloudy', 'Overcast', 'Cloudy',
+    'Light Rain', 'Rain', 'Heavy Rain', 'Light Drizzle', 'Showers in the Vicinity',
+    'Fog', 'Mist', 'Patches of Fog', 'Light Snow', 'Sleet', 'Thunderstorm',
+    'T-Storm', 'Heavy T-Storm', 'Thunder in the Vicinity', 'Haze', 'Smoke',
+    'Fair / Windy', 'Cloudy / Windy', 'Light Rain with Thunder', 'Widespread Dust', None
+]
+
+
+def legacy_time_of_day(hour):
+    if 6 <= hour < 12:
+        return 'morning'
+    elif 12 <= hour < 18:
+        return 'afternoon'
+    elif 18 <= hour < 22:
+        return 'evening'
+    else:
+        return 'night'
+
+
+def legacy_weather(condition):
+    if pd.isna(condition):
+        return 'unknown'
+    condition = str(condition).lower()
+    if 'clear' in condition or 'fair' in condition:
+        return 'clear'
+    elif 'cloud' in condition or 'overcast' in condition:
+        return 'cloudy'
+    elif 'rain' in condition or 'drizzle' in condition or 'shower' in condition:
+        return 'rain'
+    elif 'fog' in condition or 'mist' in condition:
+        return 'fog'
+    elif 'snow' in condition or 'sleet' in condition:
+        return 'snow'
+    elif 'thunder' in condition or 'storm' in condition:
+        return 'storm'
+    else:
+        return 'other'
+
+
+def legacy_temp(temp):
+    if pd.isna(temp):
+        return 'unknown'
+    if temp < 32:
+        return 'freezing'
+    elif temp < 50:
+        return 'cold'
+    elif temp < 70:
+        return 'mild'
+    elif temp < 85:
+        return 'warm'
+    else:
+        return 'hot'
+
+
+def legacy_traffic_period(hour):
+    if pd.isna(hour):
+        return 'Unknown'
+    elif 6 <= hour < 10:
+        return 'Morning Rush (6-10am)'
+    elif 10 <= hour < 16:
+        return 'Midday (10am-4pm)'
+    elif 16 <= hour < 20:
+        return 'Evening Rush (4-8pm)'
+    elif 20 <= hour < 24 or 0 <= hour < 6:
+        return 'Night (8pm-6am)'
+    else:
+        return 'Unknown'
+
+
+def legacy_risk(score):
+    if pd.isna(score):
+        return 'Unknown'
+    elif score < 10:
+        return 'Low'
+    elif score < 50:
+        return 'Medium'
+    elif score < 100:
+        return 'High'
+    else:
+        return 'Very High'
+
+
+def legacy_group_mode(df, group_cols, col):
+    return df.groupby(group_cols)[col].agg(lambda x: x.mode()[0] if len(x.mode()) > 0 else 'unknown')
+
+
+def vectorized_group_mode(df, group_cols, col):
+    counts = df.groupby(group_cols + [col], observed=True, sort=False).size().reset_index(name='_count')
+    groups = df[group_cols].drop_duplicates().sort_values(group_cols)
+    modes = groups.merge(_pick_mode(counts, group_cols, col), on=group_cols, how='left')
+    return modes.set_index(group_cols)[col].fillna('unknown')
+
+
+def make_segment_crashes(n_rows, n_segments, seed=42):
+    """Synthetic crashes with segment_id, year, month and highway_type"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'segment_id': rng.integers(0, n_segments, n_rows),
+        'year': rng.integers(2016, 2024, n_rows),
+        'month': rng.integers(1, 13, n_rows),
+        'highway_type': rng.choice(np.array(HIGHWAY_TYPES, dtype=object), n_rows),
+    })
+
+
+def make_rows(n_rows, seed=42):
+    """Synthetic hour / Weather_Condition / Temperature(F) / NY hour / risk score columns"""
+    rng = np.random.default_rng(seed)
+    temp = rng.normal(70, 18, n_rows).round(1)
+    temp[rng.random(n_rows) < 0.02] = np.nan
+
+    # NY hours come from parsed times, so some are missing
+    ny_hour = rng.integers(0, 24, n_rows).astype(float)
+    ny_hour[rng.random(n_rows) < 0.01] = np.nan
+
+    risk = rng.lognormal(3.5, 1.2, n_rows)
+    risk[rng.random(n_rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        'hour': rng.integers(0, 24, n_rows),
+        'Weather_Condition': rng.choice(np.array(WEATHER_CONDITIONS, dtype=object), n_rows),
+        'Temperature(F)': temp,
+        'ny_hour': ny_hour,
+        'risk_score': risk,
+    })
+
+
+def best_time(fn, repeat):
+    """Best wall time of fn() over repeat runs, and its last result"""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark crash feature categorization')
+    parser.add_argument('--rows', type=int, default=10_000_000,
+                       help='Synthetic rows (default: 10,000,000)')
+    parser.add_argument('--mode-rows', type=int, default=150_000,
+                       help='Synthetic crashes for the grouped mode benchmark (default: 150,000)')
+    parser.add_argument('--mode-segments', type=int, default=4_000,
+                       help='Segments for the grouped mode benchmark (default: 4,000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='Runs per implementation; best time is reported (default: 3)')
+    args = parser.parse_args()
+
+    df = make_rows(args.rows)
+
+    cases = [
+        ('time_of_day', 'hour', legacy_time_of_day, categorize_time_of_day),
+        ('weather_category', 'Weather_Condition', legacy_weather, categorize_weather),
+        ('temp_category', 'Temperature(F)', legacy_temp, categorize_temperature),
+        ('time_category (NY)', 'ny_hour', legacy_traffic_period, categorize_traffic_period),
+        ('risk_category', 'risk_score', legacy_risk, categorize_risk_score),
+    ]
+
+    print(f'\n{"="*70}')
+    print(f'FEATURE CATEGORIZATION BENCHMARK ({args.rows:,} rows, best of {args.repeat})')
+    print(f'{"="*70}')
+    print(f'\n{"feature":20s} {"row-wise":>10s} {"vectorized":>11s} {"speedup":>8s}  match')
+
+    for name, col, legacy_fn, vectorized_fn in cases:
+        legacy_s, legacy = best_time(lambda: df[col].apply(legacy_fn), args.repeat)
+        vector_s, vector = best_time(lambda: vectorized_fn(df[col]), args.repeat)
+
+        match = np.array_equal(legacy.to_numpy(dtype=object), np.asarray(vector, dtype=object))
+        print(f'{name:20s} {legacy_s:9.3f}s {vector_s:10.3f}s {legacy_s / vector_s:7.1f}x  '
+              f'{"✓" if match else "✗"}')
+
+    crashes = make_segment_crashes(args.mode_rows, args.mode_segments)
+    group_cols = ['segment_id', 'year', 'month']
+    n_groups = len(crashes[group_cols].drop_duplicates())
+
+    print(f'\n{"="*70}')
+    print(f'SEGMENT-MONTH MODE BENCHMARK ({args.mode_rows:,} crashes, {n_groups:,} groups, '
+          f'best of {args.repeat})')
+    print(f'{"="*70}')
+    print(f'\n{"feature":20s} {"per-group":>10s} {"vectorized":>11s} {"speedup":>8s}  match')
+
+    legacy_s, legacy = best_time(lambda: legacy_group_mode(crashes, group_cols, 'highway_type'),
+                                 args.repeat)
+    vector_s, vector = best_time(lambda: vectorized_group_mode(crashes, group_cols, 'highway_type'),
+                                 args.repeat)
+    match = np.array_equal(legacy.to_numpy(dtype=object), vector.to_numpy(dtype=object))
+    print(f'{"highway_type":20s} {legacy_s:9.3f}s {vector_s:10.3f}s {legacy_s / vector_s:7.1f}x  '
+          f'{"✓" if match else "✗"}')
+
+
+if __name__ == '__main__':
+    main()
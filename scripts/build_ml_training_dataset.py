@@ -5,61 +5,180 @@ Build ML Training Dataset for Work Zone Crash Risk Prediction
 This script creates a training dataset by:
 1. Loading historical crash data (2016-2023)
 2. Extracting road features using OSMnx
-3. Attaching AADT traffic data
+3. Attaching AADT traffic data and nearest-station NOAA daily weather
 4. Engineering temporal and weather features
 5. Creating train/val/test splits
 
+Each step is checkpointed under data/cache/stages, keyed on a hash of its
+inputs, parameters and code, so a rerun resumes from the first step that
+changed. --from-stage forces recomputation from a given step.
+
 Usage:
     python build_ml_training_dataset.py --city Houston --sample 10000
     python build_ml_training_dataset.py --all-cities --output data/processed/ml_dataset.csv
+    python build_ml_training_dataset.py --from-stage features
 """
 
 import argparse
+import os
+import sys
 import pandas as pd
 import geopandas as gpd
-import osmnx as ox
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from shapely.geometry import Point
 import warnings
 warnings.filterwarnings('ignore')
 
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.data.road_network import RoadNetworkCache, METERS_PER_DEGREE
+from src.data.osm_tags import normalize_osm_tags, fill_missing_flags
+from src.data.checkpoints import StageCheckpoints, run_stages, code_version, file_fingerprint
+from src.data import weather as noaa_weather
+from src.data.memory import apply_dtype_plan, frame_memory_mb, downcast_report, split_indices
+from src.features import categorize
+from src.features.categorize import categorize_time_of_day, categorize_weather, categorize_temperature
+
+
+# Kaggle US Accidents columns used downstream, with their Arrow types
+CRASH_COLUMNS = {
+    'ID': pa.string(),
+    'Severity': pa.int8(),
+    'Start_Time': pa.string(),
+    'End_Time': pa.string(),
+    'Start_Lat': pa.float64(),
+    'Start_Lng': pa.float64(),
+    'City': pa.string(),
+    'County': pa.string(),
+    'Temperature(F)': pa.float32(),
+    'Humidity(%)': pa.float32(),
+    'Visibility(mi)': pa.float32(),
+    'Wind_Speed(mph)': pa.float32(),
+    'Precipitation(in)': pa.float32(),
+    'Weather_Condition': pa.string(),
+    'Junction': pa.bool_(),
+    'Traffic_Signal': pa.bool_(),
+    'Stop': pa.bool_(),
+    'Crossing': pa.bool_(),
+}
+
+# Timestamps look like '2016-02-08 05:46:00' with an optional fractional part
+CRASH_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def scan_crash_csv(crash_file, cities=None, start_date=None, end_date=None, block_size=64 << 20):
+    """
+    Stream the crash CSV in blocks, keeping only needed columns and matching rows
+
+    City and date filters are applied to each Arrow record batch as it is
+    read, so rows outside them are never converted to pandas.
+
+    Args:
+        crash_file: Path to Kaggle US Accidents CSV
+        cities: Optional list of cities to keep
+        start_date: Optional first date to keep (YYYY-MM-DD)
+        end_date: Optional last date to keep (YYYY-MM-DD, inclusive)
+        block_size: Bytes of CSV per record batch
+
+    Returns:
+        tuple: (DataFrame of matching rows, total rows scanned)
+    """
+    reader = pacsv.open_csv(
+        crash_file,
+        read_options=pacsv.ReadOptions(block_size=block_size),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=list(CRASH_COLUMNS),
+            include_missing_columns=True,
+            column_types=CRASH_COLUMNS,
+            # Empty fields are missing values, as with pd.read_csv
+            strings_can_be_null=True
+        )
+    )
+
+    # ISO timestamps compare correctly as strings
+    end_exclusive = None
+    if end_date:
+        end_exclusive = (pd.Timestamp(end_date) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+
+    batches = []
+    total_rows = 0
+    for batch in reader:
+        total_rows += batch.num_rows
+
+        conditions = []
+        if cities:
+            conditions.append(pc.is_in(batch.column('City'), value_set=pa.array(cities)))
+        if start_date:
+            conditions.append(pc.greater_equal(batch.column('Start_Time'), start_date))
+        if end_exclusive:
+            conditions.append(pc.less(batch.column('Start_Time'), end_exclusive))
+
+        if conditions:
+            mask = conditions[0]
+            for condition in conditions[1:]:
+                mask = pc.and_(mask, condition)
+            batch = batch.filter(pc.fill_null(mask, False))
 
-def load_crashes(crash_file, cities=None, sample_size=None):
-    """Load and filter crash data"""
+        if batch.num_rows > 0:
+            batches.append(batch)
+
+    table = pa.Table.from_batches(batches, schema=reader.schema)
+    return table.to_pandas(), total_rows
+
+
+def parse_crash_times(values):
+    """Parse crash timestamps with one explicit format (fractional seconds dropped)"""
+    return pd.to_datetime(values.str.slice(0, 19), format=CRASH_TIME_FORMAT, errors='coerce')
+
+
+def load_crashes(crash_file, cities=None, sample_size=None, start_date=None, end_date=None):
+    """
+    Load and filter crash data
+
+    The CSV is streamed with only the needed columns and matching rows kept.
+    The result is checkpointed as the pipeline's 'load' stage, so later runs
+    with the same file and filters do not read the CSV again.
+    """
     print(f'\n{"="*80}')
     print('STEP 1: LOADING CRASH DATA')
     print(f'{"="*80}')
 
-    print(f'\nReading {crash_file}...')
-    crashes_df = pd.read_csv(crash_file)
+    print(f'\nStreaming {crash_file}...')
+    crashes_df, total_rows = scan_crash_csv(
+        crash_file, cities=cities, start_date=start_date, end_date=end_date
+    )
 
-    print(f'  Total crashes in file: {len(crashes_df):,}')
+    print(f'  Total crashes in file: {total_rows:,}')
+    if cities or start_date or end_date:
+        print(f'  After city/date filter: {len(crashes_df):,}')
+
+    # Parse datetime
+    crashes_df['Start_Time'] = parse_crash_times(crashes_df['Start_Time'])
+    crashes_df['End_Time'] = parse_crash_times(crashes_df['End_Time'])
 
-    # Filter by cities if specified
-    if cities:
-        crashes_df = crashes_df[crashes_df['City'].isin(cities)]
-        print(f'  After city filter: {len(crashes_df):,}')
+    # Add year for splitting
+    crashes_df['year'] = crashes_df['Start_Time'].dt.year
 
     # Sample if specified
     if sample_size and sample_size < len(crashes_df):
         crashes_df = crashes_df.sample(sample_size, random_state=42)
         print(f'  After sampling: {len(crashes_df):,}')
 
-    # Parse datetime
-    crashes_df['Start_Time'] = pd.to_datetime(crashes_df['Start_Time'], format='mixed')
-
-    # Add year for splitting
-    crashes_df['year'] = crashes_df['Start_Time'].dt.year
-
     print(f'\nDate range: {crashes_df["Start_Time"].min()} to {crashes_df["Start_Time"].max()}')
-    print(f'Years: {sorted(crashes_df["year"].unique())}')
+    print(f'Years: {sorted(int(year) for year in crashes_df["year"].dropna().unique())}')
 
     # Convert to GeoDataFrame
     crashes_gdf = gpd.GeoDataFrame(
         crashes_df,
-        geometry=[Point(lon, lat) for lon, lat in zip(crashes_df['Start_Lng'], crashes_df['Start_Lat'])],
+        geometry=gpd.points_from_xy(crashes_df['Start_Lng'], crashes_df['Start_Lat']),
         crs='EPSG:4326'
     )
 
@@ -68,131 +187,207 @@ def load_crashes(crash_file, cities=None, sample_size=None):
     return crashes_gdf
 
 
-def extract_road_features_batch(crashes_gdf, batch_size=1000, buffer_dist=50):
+def tile_crash_locations(crashes_gdf, tile_size_m=10000, margin_m=500):
+    """
+    Assign every crash to a square network-download tile
+
+    Tiles are laid on one fixed lat/lon grid and only tiles holding crashes
+    are kept, so every crash with coordinates falls in exactly one tile.
+
+    Args:
+        crashes_gdf: GeoDataFrame of crashes (EPSG:4326)
+        tile_size_m: Tile edge length in meters
+        margin_m: Extra network radius beyond the tile edge, so roads just
+            outside the tile are still candidates for crashes near its edge
+
+    Returns:
+        tuple: (tile_ids array aligned with crashes_gdf, -1 for crashes without
+            coordinates; DataFrame of tiles with center_lat, center_lon, dist)
+    """
+    lat = crashes_gdf.geometry.y.to_numpy()
+    lon = crashes_gdf.geometry.x.to_numpy()
+    valid = np.isfinite(lat) & np.isfinite(lon)
+
+    dlat = tile_size_m / METERS_PER_DEGREE
+    dlon = tile_size_m / (METERS_PER_DEGREE * np.cos(np.radians(np.nanmean(lat[valid]))))
+
+    rows = np.floor(lat[valid] / dlat).astype(np.int64)
+    cols = np.floor(lon[valid] / dlon).astype(np.int64)
+    codes, uniques = pd.MultiIndex.from_arrays([rows, cols]).factorize()
+
+    tile_ids = np.full(len(crashes_gdf), -1, dtype=np.int64)
+    tile_ids[valid] = codes
+
+    tile_rows = uniques.get_level_values(0).to_numpy()
+    tile_cols = uniques.get_level_values(1).to_numpy()
+    tiles = pd.DataFrame({
+        'center_lat': (tile_rows + 0.5) * dlat,
+        'center_lon': (tile_cols + 0.5) * dlon,
+    })
+
+    # Half-width in meters: the grid's fixed longitude step is wider than
+    # tile_size_m on the tile's equator-side edge
+    south_edge = np.radians(tile_rows * dlat)
+    half_width = dlon / 2 * METERS_PER_DEGREE * np.cos(south_edge)
+    tiles['dist'] = np.maximum(half_width, tile_size_m / 2) + margin_m
+    tiles['num_crashes'] = np.bincount(codes, minlength=len(tiles))
+
+    return tile_ids, tiles
+
+
+def match_crashes_to_roads(crashes_gdf, edges_gdf, max_road_dist=50):
+    """
+    Attach OSM road attributes to crashes from their nearest road edge
+
+    Each crash gets exactly one edge - the nearest within max_road_dist -
+    and the distance to it.
+
+    Args:
+        crashes_gdf: GeoDataFrame of crashes (EPSG:4326)
+        edges_gdf: OSMnx edges GeoDataFrame covering the crashes
+        max_road_dist: Maximum crash-to-road distance in meters for a match
+
+    Returns:
+        pd.DataFrame: Crashes with road features (no geometry)
+    """
+    # Create edge ID and typed road features, once per edge
+    edges_gdf = edges_gdf.reset_index(drop=True)
+    road_features = normalize_osm_tags(edges_gdf)
+    road_features['edge_id'] = range(len(edges_gdf))
+    edges_gdf = gpd.GeoDataFrame(road_features, geometry=edges_gdf.geometry, crs=edges_gdf.crs)
+
+    # Convert to UTM for distance calculations
+    edges_utm = edges_gdf.to_crs('EPSG:3083')
+    crashes_utm = crashes_gdf.to_crs('EPSG:3083')
+
+    # Nearest edge LineString within max_road_dist (STRtree query)
+    crashes_with_roads = gpd.sjoin_nearest(
+        crashes_utm,
+        edges_utm,
+        how='left',
+        max_distance=max_road_dist,
+        distance_col='distance_to_road_m'
+    )
+
+    # Equidistant edges come back as extra rows; keep one edge per crash
+    crashes_with_roads = crashes_with_roads[~crashes_with_roads.index.duplicated(keep='first')]
+    crashes_with_roads = crashes_with_roads.drop(columns=['index_right'])
+    crashes_with_roads = fill_missing_flags(crashes_with_roads)
+
+    # Drop geometry for efficiency
+    return pd.DataFrame(crashes_with_roads.drop(columns=['geometry'], errors='ignore'))
+
+
+# Concurrent Overpass downloads; more workers only trip its rate limit
+DOWNLOAD_WORKERS = 2
+
+# Per-process road network cache, reused across the tiles a worker handles
+_worker_cache = None
+
+
+def _extract_tile_road_features(task):
+    """Process-pool worker: load one tile's road network and match its crashes"""
+    global _worker_cache
+    tile_id, tile_crashes, center, dist, max_road_dist, cache_config = task
+
+    if _worker_cache is None or _worker_cache.config != cache_config:
+        _worker_cache = RoadNetworkCache(**cache_config, verbose=False)
+    edges_gdf = _worker_cache.get_edges(center, dist=dist, network_type='drive')
+
+    return tile_id, match_crashes_to_roads(tile_crashes, edges_gdf, max_road_dist), len(edges_gdf)
+
+
+def extract_road_features_batch(crashes_gdf, tile_size_m=10000, max_road_dist=50,
+                                network_cache=None, workers=None):
     """
-    Extract road features for crashes in batches using OSMnx
+    Extract road features for all crashes using OSMnx, one tile per worker
+
+    Crash locations are tiled into network-download regions that together
+    cover every crash; tiles are processed in parallel and merged.
 
     Args:
         crashes_gdf: GeoDataFrame of crashes
-        batch_size: Number of crashes to process per batch
-        buffer_dist: Buffer distance in meters around crash for road matching
+        tile_size_m: Edge length in meters of each network-download tile
+        max_road_dist: Maximum crash-to-road distance in meters for a match
+        network_cache: RoadNetworkCache serving road networks (default: data/cache/osm_networks)
+        workers: Number of worker processes (default: all cores offline,
+            DOWNLOAD_WORKERS when networks may be downloaded)
+
+    Raises:
+        RuntimeError: If any tile fails; downloaded tiles stay cached for the rerun
     """
+    if network_cache is None:
+        network_cache = RoadNetworkCache()
+    if workers is None:
+        workers = os.cpu_count() if network_cache.offline else DOWNLOAD_WORKERS
+
     print(f'\n{"="*80}')
     print('STEP 2: EXTRACTING ROAD FEATURES FROM OSMnx')
     print(f'{"="*80}')
 
-    print(f'\nProcessing {len(crashes_gdf):,} crashes in batches of {batch_size}...')
-    print(f'Buffer distance: {buffer_dist}m')
+    print(f'\nProcessing {len(crashes_gdf):,} crashes...')
+    print(f'Max crash-to-road distance: {max_road_dist}m')
 
-    # Group crashes by city for efficiency
+    # Crash counts by city, for reference
     cities = crashes_gdf['City'].value_counts()
     print(f'\nCrashes by city:')
     for city, count in cities.head(10).items():
         print(f'  {city}: {count:,}')
 
-    all_results = []
+    tile_ids, tiles = tile_crash_locations(crashes_gdf, tile_size_m=tile_size_m,
+                                           margin_m=10 * max_road_dist)
+    print(f'\nTiles: {len(tiles):,} ({tile_size_m / 1000:.0f}km, {workers} workers)')
+    print(f'  Crashes per tile: median {tiles["num_crashes"].median():.0f}, max {tiles["num_crashes"].max():,}')
 
-    for city in cities.index[:5]:  # Process top 5 cities for now
-        print(f'\n--- Processing {city} ---')
-        city_crashes = crashes_gdf[crashes_gdf['City'] == city].copy()
-
-        print(f'  Crashes: {len(city_crashes):,}')
-
-        # Get city center and download road network
-        center_lat = city_crashes.geometry.y.mean()
-        center_lon = city_crashes.geometry.x.mean()
-
-        # Determine appropriate radius based on crash extent
-        lat_range = city_crashes.geometry.y.max() - city_crashes.geometry.y.min()
-        lon_range = city_crashes.geometry.x.max() - city_crashes.geometry.x.min()
-        max_range = max(lat_range, lon_range) * 111000  # Convert degrees to meters (approx)
-        dist = min(max_range / 2, 5000)  # Cap at 5km radius
-
-        print(f'  Downloading road network (center: {center_lat:.4f}, {center_lon:.4f}, radius: {dist:.0f}m)...')
-
-        try:
-            G = ox.graph_from_point(
-                (center_lat, center_lon),
-                dist=dist,
-                network_type='drive',
-                simplify=True
-            )
-
-            edges_gdf = ox.graph_to_gdfs(G, nodes=False)
-            print(f'  ✓ Road network: {len(edges_gdf)} segments')
-
-            # Create edge ID
-            edges_gdf['edge_id'] = range(len(edges_gdf))
-
-            # Convert to UTM for distance calculations
-            edges_utm = edges_gdf.to_crs('EPSG:3083')
-            city_crashes_utm = city_crashes.to_crs('EPSG:3083')
-
-            # Create buffer around roads
-            edges_utm['buffer'] = edges_utm.geometry.buffer(buffer_dist)
-            edges_buffer = edges_utm.set_geometry('buffer')
-
-            # Spatial join
-            print(f'  Matching crashes to road segments...')
-            crashes_with_roads = gpd.sjoin(
-                city_crashes_utm,
-                edges_buffer[['buffer', 'edge_id', 'highway', 'name', 'lanes',
-                             'maxspeed', 'oneway', 'bridge', 'tunnel']],
-                how='left',
-                predicate='within'
-            )
-
-            # Calculate road features
-            def parse_val(val):
-                return val[0] if isinstance(val, list) else val
-
-            crashes_with_roads['highway_type'] = crashes_with_roads['highway'].apply(parse_val)
-
-            def parse_lanes(val):
-                try:
-                    return float(val[0] if isinstance(val, list) else val)
-                except:
-                    return np.nan
-
-            crashes_with_roads['num_lanes'] = crashes_with_roads['lanes'].apply(parse_lanes)
-
-            # Parse speed limit
-            def parse_speed(val):
-                try:
-                    if pd.isna(val):
-                        return np.nan
-                    val_str = str(val[0] if isinstance(val, list) else val)
-                    # Extract numeric value
-                    import re
-                    match = re.search(r'(\d+)', val_str)
-                    return float(match.group(1)) if match else np.nan
-                except:
-                    return np.nan
-
-            crashes_with_roads['speed_limit'] = crashes_with_roads['maxspeed'].apply(parse_speed)
-
-            # Binary features
-            crashes_with_roads['is_oneway'] = crashes_with_roads['oneway'].fillna(False).astype(int)
-            crashes_with_roads['is_bridge'] = crashes_with_roads['bridge'].notna().astype(int)
-            crashes_with_roads['is_tunnel'] = crashes_with_roads['tunnel'].notna().astype(int)
-            crashes_with_roads['road_name'] = crashes_with_roads['name']
-
-            # Drop geometry for efficiency
-            result_df = pd.DataFrame(crashes_with_roads.drop(columns=['geometry', 'buffer'], errors='ignore'))
-
-            all_results.append(result_df)
-
-            matched = crashes_with_roads['edge_id'].notna().sum()
-            print(f'  ✓ Matched {matched:,} / {len(city_crashes):,} crashes ({matched/len(city_crashes)*100:.1f}%)')
-
-        except Exception as e:
-            print(f'  ✗ Error processing {city}: {e}')
-            continue
+    # Parse a local extract once here; workers read bbox slices of its cache entry
+    if network_cache.offline and network_cache.osm_file is not None:
+        network_cache.cache_extract('drive')
+
+    tile_rows = pd.Series(tile_ids).groupby(tile_ids).indices
+    tasks = [
+        (tile_id, crashes_gdf.iloc[tile_rows[tile_id]],
+         (tile['center_lat'], tile['center_lon']), tile['dist'],
+         max_road_dist, network_cache.config)
+        for tile_id, tile in tiles.iterrows()
+    ]
+
+    all_results = []
+    failed_tiles = []
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_extract_tile_road_features, task): task[0] for task in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            tile_id = futures[future]
+            try:
+                _, result_df, num_edges = future.result()
+                all_results.append(result_df)
+            except Exception as e:
+                print(f'  ✗ Error processing tile {tile_id}: {e}')
+                failed_tiles.append(tile_id)
+
+            if done % 25 == 0 or done == len(futures):
+                print(f'  Tiles done: {done:,} / {len(futures):,}')
+
+    # A failed tile would silently leave its crashes without road features
+    if failed_tiles:
+        raise RuntimeError(
+            f'{len(failed_tiles):,} of {len(tasks):,} tiles failed '
+            f'({np.isin(tile_ids, failed_tiles).sum():,} crashes); rerun to retry them, '
+            f'finished tiles are served from {network_cache.cache_dir}'
+        )
+
+    # Crashes without coordinates are kept without road features
+    unprocessed = tile_ids == -1
+    if unprocessed.any():
+        print(f'  ⚠ {unprocessed.sum():,} crashes without road network (no coordinates)')
+        all_results.append(pd.DataFrame(crashes_gdf[unprocessed].drop(columns=['geometry'], errors='ignore')))
 
     # Combine all results
     if all_results:
         combined_df = pd.concat(all_results, ignore_index=True)
+        matched = combined_df['edge_id'].notna().sum() if 'edge_id' in combined_df.columns else 0
         print(f'\n✓ Total crashes with road features: {len(combined_df):,}')
+        print(f'  Matched to a road segment: {matched:,} ({matched/len(combined_df)*100:.1f}%)')
         return combined_df
     else:
         print('\n✗ No results generated')
@@ -241,6 +436,64 @@ def attach_aadt_traffic(crashes_df, aadt_file):
     return result_df
 
 
+def attach_weather(crashes_df, weather_file):
+    """Attach daily weather from each crash's nearest NOAA station"""
+    print(f'\n{"="*80}')
+    print('STEP 3b: ATTACHING NOAA STATION WEATHER')
+    print(f'{"="*80}')
+
+    print(f'\nLoading NOAA daily weather from {weather_file}...')
+    return noaa_weather.attach_noaa_weather(crashes_df, weather_file)
+
+
+# Narrowest dtypes for the feature frame; coordinates stay float64
+DATASET_DTYPES = {
+    # 0/1 flags and small integer codes
+    'Severity': 'int8',
+    'year': 'int16',
+    'month': 'int8',
+    'hour': 'int8',
+    'day_of_week': 'int8',
+    'is_weekend': 'int8',
+    'is_rush_hour': 'int8',
+    'adverse_weather': 'int8',
+    'low_visibility': 'int8',
+    'is_urban': 'int8',
+    'high_severity': 'int8',
+    'noaa_wet_day': 'int8',
+    'is_oneway': 'int8',
+    'is_bridge': 'int8',
+    'is_tunnel': 'int8',
+    'Junction': 'bool',
+    'Traffic_Signal': 'bool',
+    'Stop': 'bool',
+    'Crossing': 'bool',
+    # Repeated strings
+    'City': 'category',
+    'County': 'category',
+    'Weather_Condition': 'category',
+    'highway_type': 'category',
+    'time_of_day': 'category',
+    'weather_category': 'category',
+    'temp_category': 'category',
+    'noaa_station': 'category',
+    # Measurements
+    'Temperature(F)': 'float32',
+    'Humidity(%)': 'float32',
+    'Visibility(mi)': 'float32',
+    'Wind_Speed(mph)': 'float32',
+    'Precipitation(in)': 'float32',
+    'num_lanes': 'float32',
+    'speed_limit': 'float32',
+    'distance_to_road_m': 'float32',
+    'aadt': 'float32',
+    'distance_to_aadt_m': 'float32',
+}
+
+# Temporal split: everything through 2021 trains, 2022 validates, 2023 tests
+SPLIT_NAMES = ['train', 'val', 'test']
+
+
 def engineer_features(df):
     """Engineer temporal, weather, and categorical features"""
     print(f'\n{"="*80}')
@@ -250,9 +503,10 @@ def engineer_features(df):
     print('\nCreating features...')
 
     # Temporal features
-    df['hour'] = pd.to_datetime(df['Start_Time']).dt.hour
-    df['day_of_week'] = pd.to_datetime(df['Start_Time']).dt.dayofweek
-    df['month'] = pd.to_datetime(df['Start_Time']).dt.month
+    start_time = pd.to_datetime(df['Start_Time'])
+    df['hour'] = start_time.dt.hour
+    df['day_of_week'] = start_time.dt.dayofweek
+    df['month'] = start_time.dt.month
     df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
     df['is_rush_hour'] = (
         ((df['hour'] >= 6) & (df['hour'] <= 9)) |
@@ -260,58 +514,19 @@ def engineer_features(df):
     ).astype(int)
 
     # Time of day
-    def time_of_day(hour):
-        if 6 <= hour < 12:
-            return 'morning'
-        elif 12 <= hour < 18:
-            return 'afternoon'
-        elif 18 <= hour < 22:
-            return 'evening'
-        else:
-            return 'night'
-
-    df['time_of_day'] = df['hour'].apply(time_of_day)
+    df['time_of_day'] = categorize_time_of_day(df['hour'])
 
     # Weather features
-    def categorize_weather(condition):
-        if pd.isna(condition):
-            return 'unknown'
-        condition = str(condition).lower()
-        if 'clear' in condition or 'fair' in condition:
-            return 'clear'
-        elif 'cloud' in condition or 'overcast' in condition:
-            return 'cloudy'
-        elif 'rain' in condition or 'drizzle' in condition or 'shower' in condition:
-            return 'rain'
-        elif 'fog' in condition or 'mist' in condition:
-            return 'fog'
-        elif 'snow' in condition or 'sleet' in condition:
-            return 'snow'
-        elif 'thunder' in condition or 'storm' in condition:
-            return 'storm'
-        else:
-            return 'other'
-
-    df['weather_category'] = df['Weather_Condition'].apply(categorize_weather)
+    df['weather_category'] = categorize_weather(df['Weather_Condition'])
     df['adverse_weather'] = df['weather_category'].isin(['rain', 'fog', 'snow', 'storm']).astype(int)
     df['low_visibility'] = (df['Visibility(mi)'] < 5).astype(int)
 
     # Temperature categories
-    def temp_category(temp):
-        if pd.isna(temp):
-            return 'unknown'
-        if temp < 32:
-            return 'freezing'
-        elif temp < 50:
-            return 'cold'
-        elif temp < 70:
-            return 'mild'
-        elif temp < 85:
-            return 'warm'
-        else:
-            return 'hot'
-
-    df['temp_category'] = df['Temperature(F)'].apply(temp_category)
+    df['temp_category'] = categorize_temperature(df['Temperature(F)'])
+
+    # Station-measured precipitation, when NOAA weather was attached
+    if 'noaa_precipitation_mm' in df.columns:
+        df['noaa_wet_day'] = (df['noaa_precipitation_mm'] > 0).astype(int)
 
     # Location features
     urban_cities = ['Houston', 'Dallas', 'Austin', 'San Antonio', 'Fort Worth',
@@ -323,37 +538,53 @@ def engineer_features(df):
 
     print('  ✓ Temporal: hour, day_of_week, month, is_weekend, is_rush_hour, time_of_day')
     print('  ✓ Weather: weather_category, adverse_weather, low_visibility, temp_category')
+    if 'noaa_wet_day' in df.columns:
+        print('  ✓ NOAA: noaa_wet_day')
     print('  ✓ Location: is_urban')
     print('  ✓ Target: high_severity')
 
+    before_mb = frame_memory_mb(df)
+    df = apply_dtype_plan(df, DATASET_DTYPES)
+    print(f'  ✓ Dtype plan: {downcast_report(before_mb, df)}')
+
     return df
 
 
 def create_train_val_test_split(df):
-    """Split data by year: 2016-2021 train, 2022 val, 2023 test"""
+    """
+    Assign each row to a split by year: 2016-2021 train, 2022 val, 2023 test
+
+    Adds a categorical 'split' column instead of copying three slices of
+    the frame; split_indices(df['split']) gives each split's row positions.
+    """
     print(f'\n{"="*80}')
     print('STEP 5: CREATING TRAIN/VAL/TEST SPLITS')
     print(f'{"="*80}')
 
-    train = df[df['year'] <= 2021].copy()
-    val = df[df['year'] == 2022].copy()
-    test = df[df['year'] == 2023].copy()
+    year = df['year'].to_numpy()
+    codes = np.select([year <= 2021, year == 2022, year == 2023], [0, 1, 2], default=-1)
+    df['split'] = pd.Categorical.from_codes(codes, categories=SPLIT_NAMES)
+
+    splits = split_indices(df['split'].array)
+    train, val, test = (splits[name] for name in SPLIT_NAMES)
 
     print(f'\nTrain (2016-2021): {len(train):,} samples ({len(train)/len(df)*100:.1f}%)')
     print(f'Val   (2022):      {len(val):,} samples ({len(val)/len(df)*100:.1f}%)')
     print(f'Test  (2023):      {len(test):,} samples ({len(test)/len(df)*100:.1f}%)')
 
     # Check class balance
+    high_severity = df['high_severity'].to_numpy()
     print('\nClass distribution (high_severity):')
-    print(f'  Train: {train["high_severity"].sum():,} / {len(train):,} ({train["high_severity"].mean()*100:.1f}%)')
-    print(f'  Val:   {val["high_severity"].sum():,} / {len(val):,} ({val["high_severity"].mean()*100:.1f}%)')
-    print(f'  Test:  {test["high_severity"].sum():,} / {len(test):,} ({test["high_severity"].mean()*100:.1f}%)')
+    for label, name in [('Train', 'train'), ('Val', 'val'), ('Test', 'test')]:
+        positives = high_severity[splits[name]]
+        print(f'  {label + ":":6s} {positives.sum():,} / {len(positives):,} '
+              f'({positives.mean()*100 if len(positives) else 0:.1f}%)')
 
-    return train, val, test
+    return df
 
 
-def save_datasets(train, val, test, output_dir):
-    """Save train/val/test datasets"""
+def save_datasets(df, splits, output_dir):
+    """Save train/val/test datasets, materializing one split at a time"""
     print(f'\n{"="*80}')
     print('STEP 6: SAVING DATASETS')
     print(f'{"="*80}')
@@ -369,14 +600,12 @@ def save_datasets(train, val, test, output_dir):
 
     print(f'\nSaving datasets to {output_dir}...')
 
-    train.to_csv(train_path, index=False)
-    print(f'  ✓ Train: {train_path} ({train_path.stat().st_size / 1024 / 1024:.1f} MB)')
-
-    val.to_csv(val_path, index=False)
-    print(f'  ✓ Val:   {val_path} ({val_path.stat().st_size / 1024 / 1024:.1f} MB)')
-
-    test.to_csv(test_path, index=False)
-    print(f'  ✓ Test:  {test_path} ({test_path.stat().st_size / 1024 / 1024:.1f} MB)')
+    columns = [col for col in df.columns if col != 'split']
+    for label, name, path in [('Train', 'train', train_path),
+                              ('Val', 'val', val_path),
+                              ('Test', 'test', test_path)]:
+        df.iloc[splits[name]].to_csv(path, index=False, columns=columns)
+        print(f'  ✓ {label + ":":6s} {path} ({path.stat().st_size / 1024 / 1024:.1f} MB)')
 
     # Create symlinks to latest
     for name, path in [('train_latest.csv', train_path),
@@ -392,28 +621,30 @@ def save_datasets(train, val, test, output_dir):
     return train_path, val_path, test_path
 
 
-def print_dataset_summary(train, val, test):
+def print_dataset_summary(df, splits):
     """Print summary statistics"""
     print(f'\n{"="*80}')
     print('DATASET SUMMARY')
     print(f'{"="*80}')
 
-    print(f'\nTotal samples: {len(train) + len(val) + len(test):,}')
+    train = splits['train']
+    print(f'\nTotal samples: {sum(len(idx) for idx in splits.values()):,}')
     print(f'  Train: {len(train):,}')
-    print(f'  Val:   {len(val):,}')
-    print(f'  Test:  {len(test):,}')
+    print(f'  Val:   {len(splits["val"]):,}')
+    print(f'  Test:  {len(splits["test"]):,}')
 
     # Feature counts
-    feature_cols = [col for col in train.columns if col not in ['ID', 'Start_Time', 'End_Time']]
+    feature_cols = [col for col in df.columns if col not in ['ID', 'Start_Time', 'End_Time', 'split']]
     print(f'\nTotal features: {len(feature_cols)}')
+    print(f'In-memory size: {frame_memory_mb(df):,.1f} MB')
 
     # Completeness
     print('\nFeature completeness (train):')
     important_features = ['highway_type', 'num_lanes', 'speed_limit', 'aadt',
                          'Temperature(F)', 'Visibility(mi)', 'weather_category']
     for feat in important_features:
-        if feat in train.columns:
-            pct = train[feat].notna().sum() / len(train) * 100
+        if feat in df.columns and len(train):
+            pct = df[feat].iloc[train].notna().sum() / len(train) * 100
             print(f'  {feat:20s}: {pct:5.1f}%')
 
     print('\n' + '='*80)
@@ -433,15 +664,40 @@ def main():
     parser.add_argument('--aadt-file', type=str,
                        default='data/raw/texas/traffic/txdot_aadt_annual.gpkg',
                        help='Path to AADT traffic data')
+    parser.add_argument('--weather-file', type=str,
+                       default='data/raw/weather/texas_weather_latest.csv',
+                       help='NOAA daily weather CSV from download_noaa_weather.py (skipped if missing)')
     parser.add_argument('--cities', type=str, nargs='+',
                        help='Cities to include (default: top 5 cities)')
     parser.add_argument('--sample', type=int,
                        help='Sample size for testing (default: use all)')
+    parser.add_argument('--start-date', type=str,
+                       help='Only load crashes on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str,
+                       help='Only load crashes on or before this date (YYYY-MM-DD)')
     parser.add_argument('--output-dir', type=str,
                        default='data/processed',
                        help='Output directory for datasets')
     parser.add_argument('--skip-osmnx', action='store_true',
                        help='Skip OSMnx road feature extraction (faster for testing)')
+    parser.add_argument('--network-cache-dir', type=str,
+                       default='data/cache/osm_networks',
+                       help='Directory for cached OSMnx road networks')
+    parser.add_argument('--offline', action='store_true',
+                       help='Never download road networks; use the cache or --osm-file only')
+    parser.add_argument('--osm-file', type=str,
+                       help='Local OSM XML extract for building road networks offline')
+    parser.add_argument('--workers', type=int,
+                       help='Worker processes for road feature extraction (default: all cores '
+                            f'with --offline, {DOWNLOAD_WORKERS} when downloading from Overpass)')
+    parser.add_argument('--tile-size-km', type=float, default=10,
+                       help='Edge length of road network download tiles in km (default: 10)')
+    parser.add_argument('--stage-cache-dir', type=str,
+                       default='data/cache/stages',
+                       help='Directory for content-hashed stage checkpoints')
+    parser.add_argument('--from-stage', type=str,
+                       choices=['load', 'roads', 'aadt', 'weather', 'features', 'split'],
+                       help='Recompute from this stage onward, ignoring its checkpoints')
 
     args = parser.parse_args()
 
@@ -451,35 +707,76 @@ def main():
     print(f'\nTimestamp: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
     print(f'Crash file: {args.crash_file}')
     print(f'AADT file: {args.aadt_file}')
+    print(f'Weather file: {args.weather_file}')
     print(f'Output dir: {args.output_dir}')
 
-    # Load crashes
-    crashes_gdf = load_crashes(args.crash_file, cities=args.cities, sample_size=args.sample)
-
-    # Extract road features
-    if not args.skip_osmnx:
-        crashes_with_roads = extract_road_features_batch(crashes_gdf)
+    def load_stage(_):
+        return load_crashes(
+            args.crash_file,
+            cities=args.cities,
+            sample_size=args.sample,
+            start_date=args.start_date,
+            end_date=args.end_date
+        )
+
+    def roads_stage(crashes_gdf):
+        if args.skip_osmnx:
+            print('\n⚠ Skipping OSMnx road feature extraction')
+            return pd.DataFrame(crashes_gdf.drop(columns=['geometry'], errors='ignore'))
+
+        network_cache = RoadNetworkCache(
+            cache_dir=args.network_cache_dir,
+            offline=args.offline,
+            osm_file=args.osm_file
+        )
+        crashes_with_roads = extract_road_features_batch(
+            crashes_gdf,
+            tile_size_m=args.tile_size_km * 1000,
+            network_cache=network_cache,
+            workers=args.workers
+        )
         if crashes_with_roads is None:
             print('\n✗ Failed to extract road features, continuing without them...')
-            crashes_with_roads = pd.DataFrame(crashes_gdf)
-    else:
-        print('\n⚠ Skipping OSMnx road feature extraction')
-        crashes_with_roads = pd.DataFrame(crashes_gdf.drop(columns=['geometry'], errors='ignore'))
-
-    # Attach AADT
-    crashes_with_aadt = attach_aadt_traffic(crashes_with_roads, args.aadt_file)
-
-    # Engineer features
-    ml_dataset = engineer_features(crashes_with_aadt)
-
-    # Create splits
-    train, val, test = create_train_val_test_split(ml_dataset)
+            crashes_with_roads = pd.DataFrame(crashes_gdf.drop(columns=['geometry'], errors='ignore'))
+        return crashes_with_roads
+
+    # load → OSMnx → AADT → weather → features → split, each checkpointed by content hash
+    stages = [
+        {'name': 'load', 'fn': load_stage,
+         'params': {'crash_file': file_fingerprint(args.crash_file), 'cities': args.cities,
+                    'sample': args.sample, 'start_date': args.start_date, 'end_date': args.end_date,
+                    'columns': list(CRASH_COLUMNS)},
+         'code': code_version(load_crashes, scan_crash_csv, parse_crash_times)},
+        {'name': 'roads', 'fn': roads_stage,
+         'params': {'skip_osmnx': args.skip_osmnx, 'tile_size_km': args.tile_size_km,
+                    'osm_file': file_fingerprint(args.osm_file) if args.osm_file else None},
+         'code': code_version(extract_road_features_batch, tile_crash_locations,
+                              match_crashes_to_roads, _extract_tile_road_features,
+                              sys.modules[normalize_osm_tags.__module__],
+                              sys.modules[RoadNetworkCache.__module__])},
+        {'name': 'aadt', 'fn': lambda df: attach_aadt_traffic(df, args.aadt_file),
+         'params': {'aadt_file': file_fingerprint(args.aadt_file)},
+         'code': code_version(attach_aadt_traffic)},
+        {'name': 'weather', 'fn': lambda df: attach_weather(df, args.weather_file),
+         'params': {'weather_file': file_fingerprint(args.weather_file)},
+         'code': code_version(attach_weather, noaa_weather)},
+        {'name': 'features', 'fn': engineer_features,
+         'params': {},
+         'code': code_version(engineer_features, categorize)},
+        {'name': 'split', 'fn': create_train_val_test_split,
+         'params': {},
+         'code': code_version(create_train_val_test_split)},
+    ]
+
+    checkpoints = StageCheckpoints(cache_dir=args.stage_cache_dir)
+    df = run_stages(stages, checkpoints, from_stage=args.from_stage)
+    splits = split_indices(df['split'].array)
 
     # Save datasets
-    train_path, val_path, test_path = save_datasets(train, val, test, args.output_dir)
+    train_path, val_path, test_path = save_datasets(df, splits, args.output_dir)
 
     # Print summary
-    print_dataset_summary(train, val, test)
+    print_dataset_summary(df, splits)
 
     print(f'\n✅ Datasets saved:')
     print(f'   {train_path}')
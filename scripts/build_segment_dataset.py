@@ -18,6 +18,7 @@ Usage:
     python build_segment_dataset.py --input data/processed/crash_level/train_latest.csv
     python build_segment_dataset.py --time-window monthly
     python build_segment_dataset.py --min-crashes 5
+    python build_segment_dataset.py --weather-file data/raw/weather/texas_weather_latest.csv
 """
 
 import pandas as pd
@@ -25,22 +26,47 @@ import numpy as np
 import geopandas as gpd
 from pathlib import Path
 import argparse
+import sys
 from datetime import datetime
+from scipy import sparse
+from scipy.spatial import cKDTree
 import warnings
 warnings.filterwarnings('ignore')
 
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.data.weather import attach_noaa_weather, NOAA_WEATHER_FIELDS
+
 # Configuration
 DEFAULT_INPUT = "data/processed/crash_level/train_latest.csv"
 DEFAULT_OUTPUT_DIR = "data/processed/segment_level"
 TEXAS_CRS = "EPSG:3083"  # Texas Centric Mapping System (meters)
-
-def load_crash_data(crash_file, sample_size=None, verbose=True):
+SEGMENT_GRID_DEG = 0.001  # Segment grid cell size (~100m)
+METERS_PER_DEGREE = 111320  # Meters per degree of latitude
+TIME_WINDOWS = ['monthly', 'quarterly', 'yearly']
+CUBE_GROUP_COLS = ['segment_id', 'year', 'month']  # Base cube grain
+
+# Columns reported by print_summary (from the train split)
+SUMMARY_METRICS = ['crash_count', 'severity_rate', 'traffic_impact', 'crash_density', 'risk_score_simple']
+COMPLETENESS_COLUMNS = ['highway_type', 'num_lanes', 'speed_limit', 'aadt', 'Temperature(F)']
+RISK_CATEGORIES = ['LOW', 'MEDIUM', 'HIGH', 'VERY_HIGH']
+
+# Road and location attributes that describe a segment rather than its crashes
+STATIC_SEGMENT_COLUMNS = ['City', 'Start_Lat', 'Start_Lng', 'highway_type', 'num_lanes',
+                          'speed_limit', 'is_bridge', 'is_tunnel', 'aadt', 'distance_to_aadt_m',
+                          'is_urban', 'Junction', 'Traffic_Signal', 'Stop', 'Crossing']
+
+def load_crash_data(crash_file, sample_size=None, weather_file=None, verbose=True):
     """
     Load crash-level dataset
 
     Args:
         crash_file: Path to crash-level CSV
         sample_size: Optional sample size for testing
+        weather_file: Optional NOAA daily weather CSV, joined by nearest
+            station and crash date unless the input already carries it
         verbose: Print progress
 
     Returns:
@@ -66,6 +92,9 @@ def load_crash_data(crash_file, sample_size=None, verbose=True):
     df['month'] = df['Start_Time'].dt.month
     df['quarter'] = df['Start_Time'].dt.quarter
 
+    if weather_file and 'noaa_station' not in df.columns:
+        df = attach_noaa_weather(df, weather_file, verbose=verbose)
+
     if verbose:
         print(f"  Total crashes: {len(df):,}")
         print(f"  Date range: {df['Start_Time'].min()} to {df['Start_Time'].max()}")
@@ -82,12 +111,17 @@ def create_segment_identifiers(df, verbose=True):
       - Group by: highway_type, num_lanes, City (approximate segment)
       - Include: geographic bin (lat/lon rounded to ~100m precision)
 
+    Each key column is factorized to integer codes once, the codes are
+    combined into one int64 composite, and the composites are factorized
+    into a dense int64 segment_id. The returned lookup table maps every
+    segment_id back to its City, road attributes and grid cell.
+
     Args:
         df: Crash DataFrame
         verbose: Print progress
 
     Returns:
-        DataFrame with segment_id column
+        DataFrame with segment_id column, and the segment lookup table
     """
 
     if verbose:
@@ -95,26 +129,47 @@ def create_segment_identifiers(df, verbose=True):
         print("STEP 2: CREATING SEGMENT IDENTIFIERS")
         print("="*80 + "\n")
 
-    # Round coordinates to create geographic bins (~0.001 deg ≈ 100m)
-    df['lat_bin'] = (df['Start_Lat'] / 0.001).round() * 0.001
-    df['lon_bin'] = (df['Start_Lng'] / 0.001).round() * 0.001
-
-    # Create segment identifier from geographic and road characteristics
-    df['segment_id'] = (
-        df['City'].astype(str) + "_" +
-        df['highway_type'].fillna('unknown').astype(str) + "_" +
-        df['num_lanes'].fillna(0).astype(int).astype(str) + "_" +
-        df['lat_bin'].round(3).astype(str) + "_" +
-        df['lon_bin'].round(3).astype(str)
-    )
+    # Integer grid cells (~0.001 deg ≈ 100m)
+    lat_cell = np.round(df['Start_Lat'].to_numpy(dtype=float) / SEGMENT_GRID_DEG)
+    lon_cell = np.round(df['Start_Lng'].to_numpy(dtype=float) / SEGMENT_GRID_DEG)
+
+    key_parts = [
+        df['City'],
+        df['highway_type'].astype(object).fillna('unknown') if 'highway_type' in df.columns
+        else pd.Series('unknown', index=df.index),
+        df['num_lanes'].fillna(0).astype(int) if 'num_lanes' in df.columns
+        else pd.Series(0, index=df.index),
+        lat_cell,
+        lon_cell,
+    ]
+
+    # Mixed-radix composite of per-column codes (missing values get their own code)
+    composite = np.zeros(len(df), dtype=np.int64)
+    for part in key_parts:
+        codes, uniques = pd.factorize(part, use_na_sentinel=False)
+        composite = composite * len(uniques) + codes
+
+    segment_id, composites = pd.factorize(composite, sort=True)
+    df['segment_id'] = segment_id.astype(np.int64)
+
+    # Reversible lookup: attributes of each segment's first crash
+    _, first_rows = np.unique(segment_id, return_index=True)
+    segments = pd.DataFrame({
+        'segment_id': np.arange(len(composites), dtype=np.int64),
+        'City': df['City'].to_numpy()[first_rows],
+        'highway_type': np.asarray(key_parts[1])[first_rows],
+        'num_lanes': np.asarray(key_parts[2])[first_rows],
+        'lat_bin': (lat_cell[first_rows] * SEGMENT_GRID_DEG).round(3),
+        'lon_bin': (lon_cell[first_rows] * SEGMENT_GRID_DEG).round(3),
+    })
 
     if verbose:
-        n_segments = df['segment_id'].nunique()
+        n_segments = len(segments)
         print(f"  Created {n_segments:,} unique road segments")
         print(f"  Mean crashes per segment: {len(df) / n_segments:.1f}")
 
         # Distribution
-        crashes_per_segment = df.groupby('segment_id').size()
+        crashes_per_segment = pd.Series(np.bincount(segment_id))
         print(f"\n  Crashes per segment distribution:")
         print(f"    Min: {crashes_per_segment.min()}")
         print(f"    25th: {crashes_per_segment.quantile(0.25):.0f}")
@@ -122,48 +177,30 @@ def create_segment_identifiers(df, verbose=True):
         print(f"    75th: {crashes_per_segment.quantile(0.75):.0f}")
         print(f"    Max: {crashes_per_segment.max()}")
 
-        print(f"\n✓ Segment identifiers created")
+        print(f"\n✓ Segment identifiers created (int64 keys, lookup table of {n_segments:,} rows)")
 
-    return df
+    return df, segments
 
-def aggregate_by_segment_and_time(df, time_window='quarterly', min_crashes=1, verbose=True):
+def _pick_mode(counts, group_cols, value_col):
     """
-    Aggregate crashes by segment and time window
-
-    Args:
-        df: Crash DataFrame with segment_id
-        time_window: 'monthly', 'quarterly', or 'yearly'
-        min_crashes: Minimum crashes per segment-time to include
-        verbose: Print progress
+    Keep each group's most counted value from a (group, value, _count) table
 
-    Returns:
-        Aggregated DataFrame (segment-time level)
+    Ties go to the smallest value, as with Series.mode()[0].
     """
+    counts = counts.sort_values(
+        group_cols + ['_count', value_col],
+        ascending=[True] * len(group_cols) + [False, True],
+        kind='stable'
+    )
+    return counts.drop_duplicates(group_cols, keep='first').drop(columns='_count')
 
-    if verbose:
-        print("\n" + "="*80)
-        print(f"STEP 3: AGGREGATING BY SEGMENT AND TIME ({time_window.upper()})")
-        print("="*80 + "\n")
-
-    # Determine time grouping column
-    if time_window == 'monthly':
-        time_col = 'year_month'
-        df['year_month'] = df['year'].astype(str) + "_" + df['month'].astype(str).str.zfill(2)
-        group_cols = ['segment_id', 'year_month', 'year', 'month']
-    elif time_window == 'quarterly':
-        time_col = 'year_quarter'
-        df['year_quarter'] = df['year'].astype(str) + "_Q" + df['quarter'].astype(str)
-        group_cols = ['segment_id', 'year_quarter', 'year', 'quarter']
-    elif time_window == 'yearly':
-        time_col = 'year'
-        group_cols = ['segment_id', 'year']
-    else:
-        raise ValueError(f"Invalid time_window: {time_window}")
-
-    if verbose:
-        print(f"  Grouping by: {group_cols}")
-        print(f"  Time windows: {df[time_col].nunique()}")
+def build_aggregation_spec(df):
+    """
+    Segment-period aggregation for each available crash column
 
+    Returns:
+        dict: column -> 'count', 'sum', 'mean', 'max', 'first' or 'mode'
+    """
     # Build aggregation dict dynamically based on available columns
     agg_dict = {
         # Crash counts
@@ -181,7 +218,7 @@ def aggregate_by_segment_and_time(df, time_window='quarterly', min_crashes=1, ve
 
     # Add optional road features if they exist
     if 'highway_type' in df.columns:
-        agg_dict['highway_type'] = lambda x: x.mode()[0] if len(x.mode()) > 0 else 'unknown'
+        agg_dict['highway_type'] = 'mode'
     if 'num_lanes' in df.columns:
         agg_dict['num_lanes'] = 'mean'
     if 'speed_limit' in df.columns:
@@ -223,6 +260,13 @@ def aggregate_by_segment_and_time(df, time_window='quarterly', min_crashes=1, ve
     if 'Wind_Speed(mph)' in df.columns:
         agg_dict['Wind_Speed(mph)'] = 'mean'
 
+    # Add NOAA station weather if it exists
+    for field in NOAA_WEATHER_FIELDS:
+        if f'noaa_{field}' in df.columns:
+            agg_dict[f'noaa_{field}'] = 'mean'
+    if 'noaa_wet_day' in df.columns:
+        agg_dict['noaa_wet_day'] = 'mean'
+
     # Add infrastructure features if they exist
     if 'Junction' in df.columns:
         agg_dict['Junction'] = 'max'
@@ -233,17 +277,309 @@ def aggregate_by_segment_and_time(df, time_window='quarterly', min_crashes=1, ve
     if 'Crossing' in df.columns:
         agg_dict['Crossing'] = 'max'
 
-    # Perform aggregation
+    return agg_dict
+
+def build_monthly_cube(df, verbose=True):
+    """
+    Aggregate crashes once into a segment × month cube of additive pieces
+
+    Every aggregate is stored in a form that rolls up exactly to coarser
+    periods: counts and sums (means keep their sum and non-missing count),
+    maxes and first values, and (segment, month, value) counts for modes.
+
+    Args:
+        df: Crash DataFrame with segment_id
+        verbose: Print progress
+
+    Returns:
+        dict with 'cube' (one row per segment-month), 'mode_counts'
+        (column -> pair-count table) and 'spec' (the aggregation spec)
+    """
+
+    if verbose:
+        print("\n" + "="*80)
+        print("STEP 3: AGGREGATING BY SEGMENT AND MONTH (BASE CUBE)")
+        print("="*80 + "\n")
+
+    spec = build_aggregation_spec(df)
+    group_cols = CUBE_GROUP_COLS
+
+    named = {}
+    for col, how in spec.items():
+        if how == 'mean':
+            named[f'{col}__sum'] = (col, 'sum')
+            named[f'{col}__n'] = (col, 'count')
+        elif how != 'mode':
+            named[col] = (col, how)
+
+    if verbose:
+        print(f"  Grouping by: {group_cols}")
+        print(f"  Aggregating {len(df):,} crashes...")
+
+    cube = df.groupby(group_cols, as_index=False).agg(**named)
+
+    mode_counts = {
+        col: (
+            df.groupby(group_cols + [col], observed=True, sort=False)
+            .size()
+            .reset_index(name='_count')
+        )
+        for col, how in spec.items() if how == 'mode'
+    }
+
+    if verbose:
+        print(f"\n✓ Base cube: {len(cube):,} segment-months")
+
+    return {'cube': cube, 'mode_counts': mode_counts, 'spec': spec}
+
+def _aggregate_cube(base, keys, cube, mode_counts):
+    """Finished aggregates (means, modes) of the cube grouped by keys"""
+    spec = base['spec']
+
+    if keys == CUBE_GROUP_COLS:
+        agg_df = cube.copy()
+    else:
+        rollup = {}
+        for col, how in spec.items():
+            if how == 'mean':
+                rollup[f'{col}__sum'] = 'sum'
+                rollup[f'{col}__n'] = 'sum'
+            elif how in ('count', 'sum'):
+                rollup[col] = 'sum'
+            elif how in ('max', 'first'):
+                rollup[col] = how
+        agg_df = cube.groupby(keys, as_index=False).agg(rollup)
+
+    # Means from their additive pieces
+    for col, how in spec.items():
+        if how == 'mean':
+            agg_df[col] = agg_df[f'{col}__sum'] / agg_df[f'{col}__n'].replace(0, np.nan)
+            agg_df = agg_df.drop(columns=[f'{col}__sum', f'{col}__n'])
+
+    # Modes from summed (group, value) counts
+    for col, counts in mode_counts.items():
+        counts = counts.groupby(keys + [col], observed=True, as_index=False)['_count'].sum()
+        agg_df = agg_df.merge(_pick_mode(counts, keys, col), on=keys, how='left')
+        agg_df[col] = agg_df[col].fillna('unknown')
+
+    return agg_df
+
+def segment_static_attributes(base):
+    """
+    One row per segment with its static road and location attributes
+
+    Taken over all of a segment's crashes; used to describe the segment in
+    periods where it had none.
+    """
+    if 'static' not in base:
+        static = _aggregate_cube(base, ['segment_id'], base['cube'], base['mode_counts'])
+        columns = [col for col in STATIC_SEGMENT_COLUMNS if col in static.columns]
+        base['static'] = static[['segment_id'] + columns].sort_values('segment_id', ignore_index=True)
+    return base['static']
+
+def iter_segment_panel(agg_df, static, group_cols, spec, chunk_segments=50_000):
+    """
+    Full segment × period grid in chunks of segments, crash-free periods filled in
+
+    Observed segment-periods are placed into each chunk by their grid
+    position, so the grid is never merged against the observed rows. Count
+    and sum columns are 0 in crash-free periods and other per-crash measures
+    missing. Static attributes keep their per-period values in observed
+    periods; crash-free periods take them from the per-segment table (string
+    attributes as categoricals sharing one set of categories). Only one
+    chunk's rows exist at a time.
+
+    Args:
+        agg_df: Observed segment-periods (group_cols + spec columns)
+        static: segment_static_attributes result
+        group_cols: segment_id followed by the period columns
+        spec: Aggregation spec (column -> reducer)
+        chunk_segments: Segments per yielded chunk
+
+    Yields:
+        DataFrame chunks with the columns of agg_df
+    """
+    period_cols = group_cols[1:]
+    periods = segment_periods(agg_df, group_cols)
+    n_periods = len(periods)
+
+    # Grid position of every observed row: segment rank × periods + period index
+    static_ids = static['segment_id'].to_numpy()
+    period_pos = pd.MultiIndex.from_frame(periods).get_indexer(
+        pd.MultiIndex.from_frame(agg_df[period_cols])
+    )
+    grid_pos = np.searchsorted(static_ids, agg_df['segment_id'].to_numpy()) * n_periods + period_pos
+    order = np.argsort(grid_pos, kind='stable')
+    grid_pos = grid_pos[order]
+
+    # Per-segment values (numeric arrays, or category codes) and observed per-period values
+    static_values, observed, categories = {}, {}, {}
+    for col in spec:
+        values = agg_df[col].to_numpy()[order]
+        if col in static.columns and static[col].dtype.kind not in 'biuf':
+            categories[col] = pd.Index(static[col].dropna().unique()).union(
+                pd.Index(pd.unique(values[pd.notna(values)]))
+            )
+            static_values[col] = categories[col].get_indexer(static[col])
+            values = categories[col].get_indexer(values)
+        elif col in static.columns:
+            static_values[col] = static[col].to_numpy()
+        observed[col] = values
+
+    for start in range(0, len(static_ids), chunk_segments):
+        ranks = np.arange(start, min(start + chunk_segments, len(static_ids)))
+        row_rank = np.repeat(ranks, n_periods)
+        lo, hi = np.searchsorted(grid_pos, [ranks[0] * n_periods, (ranks[-1] + 1) * n_periods])
+        local = grid_pos[lo:hi] - ranks[0] * n_periods
+
+        chunk = {'segment_id': static_ids[row_rank]}
+        for col in period_cols:
+            chunk[col] = np.tile(periods[col].to_numpy(), len(ranks))
+
+        for col, how in spec.items():
+            if col in static_values:
+                values = static_values[col].take(row_rank)
+                if col not in categories and values.dtype.kind not in 'bf':
+                    values = values.astype(float)
+            else:
+                fill = 0 if how in ('count', 'sum') else np.nan
+                values = np.full(len(row_rank), fill, dtype=float)
+            values[local] = observed[col][lo:hi]
+            if col in categories:
+                values = pd.Categorical.from_codes(values, categories[col])
+            elif how in ('count', 'sum'):
+                values = values.astype(np.int64)
+            chunk[col] = values
+
+        yield pd.DataFrame(chunk)[list(agg_df.columns)]
+
+def segment_periods(agg_df, group_cols):
+    """Distinct periods of a segment-period table, in time order"""
+    period_cols = group_cols[1:]
+    sort_cols = [col for col in period_cols if col in ('year', 'month', 'quarter')]
+    return agg_df[period_cols].drop_duplicates().sort_values(sort_cols, ignore_index=True)
+
+def _roll_up_observed(base, time_window, verbose=True):
+    """Observed segment-periods of one time window and their group columns"""
+
+    if verbose:
+        print("\n" + "="*80)
+        print(f"STEP 3b: ROLLING UP BY SEGMENT AND TIME ({time_window.upper()})")
+        print("="*80 + "\n")
+
+    spec = base['spec']
+    cube = base['cube']
+    mode_counts = base['mode_counts']
+
+    # Determine time grouping columns
+    if time_window == 'monthly':
+        period_cols = ['year', 'month']
+    elif time_window == 'quarterly':
+        period_cols = ['year', 'quarter']
+        cube = cube.assign(quarter=(cube['month'] - 1) // 3 + 1)
+        mode_counts = {col: counts.assign(quarter=(counts['month'] - 1) // 3 + 1)
+                       for col, counts in mode_counts.items()}
+    elif time_window == 'yearly':
+        period_cols = ['year']
+    else:
+        raise ValueError(f"Invalid time_window: {time_window}")
+
+    agg_df = _aggregate_cube(base, ['segment_id'] + period_cols, cube, mode_counts)
+
+    # Period label, then the original column order
+    if time_window == 'monthly':
+        agg_df['year_month'] = agg_df['year'].astype(str) + "_" + agg_df['month'].astype(str).str.zfill(2)
+        group_cols = ['segment_id', 'year_month', 'year', 'month']
+    elif time_window == 'quarterly':
+        agg_df['year_quarter'] = agg_df['year'].astype(str) + "_Q" + agg_df['quarter'].astype(str)
+        group_cols = ['segment_id', 'year_quarter', 'year', 'quarter']
+    else:
+        group_cols = ['segment_id', 'year']
+    agg_df = agg_df[group_cols + list(spec)]
+
     if verbose:
-        print(f"\n  Aggregating {len(df):,} crashes...")
+        print(f"  Time windows: {agg_df[group_cols[1]].nunique()}")
+
+    return agg_df, group_cols
+
+def roll_up_cube(base, time_window='quarterly', min_crashes=1, verbose=True):
+    """
+    Segment-period dataset for one time window, rolled up from the monthly cube
+
+    Args:
+        base: Result of build_monthly_cube
+        time_window: 'monthly', 'quarterly', or 'yearly'
+        min_crashes: Minimum crashes per segment-time to include
+        verbose: Print progress
+
+    Returns:
+        Aggregated DataFrame (segment-time level)
+    """
+    agg_df, _ = _roll_up_observed(base, time_window, verbose=verbose)
+    return finalize_segment_periods(agg_df, min_crashes=min_crashes, verbose=verbose)
+
+def iter_zero_filled_window(base, segments, time_window='quarterly', chunk_segments=50_000,
+                            verbose=True):
+    """
+    Engineered segment-period dataset with crash-free periods, in chunks of segments
 
-    agg_df = df.groupby(group_cols, as_index=False).agg(agg_dict)
+    Each chunk from iter_segment_panel goes through finalize_segment_periods
+    and engineer_segment_features on its own, so the full panel is never
+    held in memory. History features only need a segment's own periods, all
+    of which are in its chunk. Neighbor features are looked up in totals
+    computed once from the observed segment-periods, since crash-free
+    periods add nothing to them.
 
+    Args:
+        base: Result of build_monthly_cube
+        segments: Segment lookup table from create_segment_identifiers
+        time_window: 'monthly', 'quarterly', or 'yearly'
+        chunk_segments: Segments per chunk
+        verbose: Print progress
+
+    Yields:
+        Engineered DataFrame chunks (segment-time level)
+    """
+    agg_df, group_cols = _roll_up_observed(base, time_window, verbose=verbose)
+    static = segment_static_attributes(base)
+
+    observed = agg_df.rename(columns={'ID': 'crash_count'})
+    first_period = int(period_ordinal(observed)[0].min())
+    neighbor_totals = neighbor_crash_totals(observed, segments)
+
+    if verbose:
+        n_periods = len(segment_periods(agg_df, group_cols))
+        n_rows = len(static) * n_periods
+        n_zero = n_rows - len(agg_df)
+        print(f"  Panel: {len(static):,} segments × {n_periods:,} periods "
+              f"= {n_rows:,} rows ({n_zero:,} crash-free, {n_zero / max(n_rows, 1):.1%}), "
+              f"{chunk_segments:,} segments per chunk")
+
+    for chunk in iter_segment_panel(agg_df, static, group_cols, base['spec'],
+                                    chunk_segments=chunk_segments):
+        chunk = finalize_segment_periods(chunk, verbose=False)
+        yield engineer_segment_features(chunk, segments=segments, first_period=first_period,
+                                        neighbor_totals=neighbor_totals, verbose=False)
+
+def finalize_segment_periods(agg_df, min_crashes=1, verbose=True):
+    """
+    Derived metrics and minimum-crash filter for aggregated segment-periods
+
+    Args:
+        agg_df: Segment-period aggregates with an 'ID' count column
+        min_crashes: Minimum crashes per segment-time to include
+        verbose: Print progress
+
+    Returns:
+        Aggregated DataFrame (segment-time level)
+    """
     # Rename count column
-    agg_df.rename(columns={'ID': 'crash_count'}, inplace=True)
+    agg_df = agg_df.rename(columns={'ID': 'crash_count'})
 
     # Calculate derived metrics
-    agg_df['severity_rate'] = agg_df['high_severity'] / agg_df['crash_count']
+    agg_df['severity_rate'] = np.where(
+        agg_df['crash_count'] > 0, agg_df['high_severity'] / agg_df['crash_count'].clip(lower=1), 0.0
+    )
     agg_df['traffic_impact'] = agg_df['aadt'] * agg_df['severity_rate']
     agg_df['crash_density'] = agg_df['crash_count'] / agg_df['aadt'] * 1000  # crashes per 1000 vehicles
 
@@ -264,12 +600,263 @@ def aggregate_by_segment_and_time(df, time_window='quarterly', min_crashes=1, ve
 
     return agg_df
 
-def engineer_segment_features(df, verbose=True):
+def aggregate_by_segment_and_time(df, time_window='quarterly', min_crashes=1, verbose=True):
+    """
+    Aggregate crashes by segment and time window
+
+    Builds the monthly base cube and rolls it up; to produce several
+    windows from one pass over the crashes, call build_monthly_cube once
+    and roll_up_cube per window instead.
+
+    Args:
+        df: Crash DataFrame with segment_id
+        time_window: 'monthly', 'quarterly', or 'yearly'
+        min_crashes: Minimum crashes per segment-time to include
+        verbose: Print progress
+
+    Returns:
+        Aggregated DataFrame (segment-time level)
+    """
+    base = build_monthly_cube(df, verbose=verbose)
+    return roll_up_cube(base, time_window=time_window, min_crashes=min_crashes, verbose=verbose)
+
+def period_ordinal(df):
+    """
+    Consecutive integer index of each row's period, and periods per year
+
+    Monthly rows count months, quarterly rows quarters and yearly rows years,
+    so adjacent periods always differ by 1.
+    """
+    year = df['year'].to_numpy(dtype=np.int64)
+    if 'month' in df.columns:
+        return year * 12 + df['month'].to_numpy(dtype=np.int64) - 1, 12
+    if 'quarter' in df.columns:
+        return year * 4 + df['quarter'].to_numpy(dtype=np.int64) - 1, 4
+    return year, 1
+
+def add_history_features(df, ewm_halflife=None, first_period=None):
+    """
+    Crash history of each segment from strictly earlier periods
+
+    Rows are sorted once by (segment_id, period). Sums over any run of past
+    periods are then differences of one running total, looked up by
+    (segment, period) key with searchsorted. Periods with no row for a
+    segment count as zero crashes, so the features are the same whether or
+    not the panel is zero-filled. Nothing from the current or later periods
+    is used, so no test-year crashes reach training rows.
+
+    Adds:
+        crash_count_prev: crashes in the previous period
+        crash_count_trailing_mean: mean crashes per period over the previous
+            year (4 quarters, 12 months or 1 year)
+        crash_count_ewm: exponentially weighted mean of past crash counts
+        segment_crash_mean/std/max: over all earlier periods
+
+    Args:
+        df: Segment-period DataFrame with segment_id, year, period and crash_count
+        ewm_halflife: Half-life of crash_count_ewm in periods (default: one year)
+        first_period: period_ordinal value the data starts at (default: the
+            earliest in df; pass it when df is one chunk of a larger panel)
+
+    Returns:
+        DataFrame with history columns added (NaN where a row has no earlier period)
+    """
+    period, per_year = period_ordinal(df)
+    halflife = ewm_halflife or per_year
+    segment = df['segment_id'].to_numpy(dtype=np.int64)
+    if first_period is None:
+        first_period = period.min()
+
+    order = np.lexsort((period, segment))
+    seg = segment[order]
+    per = period[order] - first_period  # periods since the data starts
+    count = df['crash_count'].to_numpy(dtype=float)[order]
+
+    # key orders rows by segment then period; a segment's keys lie in [seg*span, (seg+1)*span)
+    span = int(per.max()) + 1
+    key = seg * span + per
+    seg_start = seg * span
+    running = np.concatenate([[0.0], np.cumsum(count)])
+    running_sq = np.concatenate([[0.0], np.cumsum(count ** 2)])
+
+    def before(totals, k):
+        """Sum over this segment's rows with key < k (k >= segment start)"""
+        return totals[np.searchsorted(key, k, side='left')]
+
+    def window_sum(n_periods):
+        return before(running, key) - before(running, np.maximum(key - n_periods, seg_start))
+
+    n_prior = per.astype(float)
+    n_prior[n_prior == 0] = np.nan
+
+    history = {}
+    history['crash_count_prev'] = np.where(per > 0, window_sum(1), np.nan)
+    history['crash_count_trailing_mean'] = window_sum(per_year) / np.minimum(per_year, n_prior)
+
+    # Expanding moments over all earlier periods
+    past_sum = before(running, key) - before(running, seg_start)
+    past_sq = before(running_sq, key) - before(running_sq, seg_start)
+    mean = past_sum / n_prior
+    variance = (past_sq - n_prior * mean ** 2) / (n_prior - 1)
+    history['segment_crash_mean'] = mean
+    history['segment_crash_std'] = np.sqrt(np.clip(variance, 0, None))
+    by_segment = pd.Series(count).groupby(seg)
+    past_max = by_segment.cummax().groupby(seg).shift(1).to_numpy()
+    history['segment_crash_max'] = np.where(per > 0, np.nan_to_num(past_max, nan=0.0), np.nan)
+
+    # EWM with gaps: sum of c_q * decay^(p-1-q) over earlier rows q of the segment,
+    # using periods relative to the segment's first row to keep the powers small
+    decay = 0.5 ** (1 / halflife)
+    first = pd.Series(per).groupby(seg).transform('min').to_numpy()
+    rel = per - first
+    weighted = pd.Series(count * decay ** (-rel)).groupby(seg).cumsum()
+    past_weighted = weighted.groupby(seg).shift(1).fillna(0).to_numpy()
+    history['crash_count_ewm'] = np.where(
+        per > 0, (1 - decay) * past_weighted * decay ** (rel - 1.0), np.nan
+    )
+
+    for col, values in history.items():
+        out = np.empty(len(df))
+        out[order] = values
+        df[col] = out
+
+    return df
+
+def segment_neighbor_matrices(segments, k_nearest=8):
+    """
+    Sparse segment adjacency from the grid and from nearest centroids
+
+    Args:
+        segments: Segment lookup table (segment_id, lat_bin, lon_bin), with
+            dense segment_ids 0..n-1
+        k_nearest: Neighbors per segment for the KD-tree matrix
+
+    Returns:
+        (cell_adjacency, knn_adjacency): n × n CSR matrices of 0/1 weights.
+        cell_adjacency links each segment to every other segment in its own
+        or one of the 8 surrounding grid cells; knn_adjacency to its
+        k_nearest closest segment centroids. Neither includes the segment itself.
+    """
+    n = len(segments)
+    ids = segments['segment_id'].to_numpy(dtype=np.int64)
+    lat_cell = np.round(segments['lat_bin'].to_numpy(dtype=float) / SEGMENT_GRID_DEG).astype(np.int64)
+    lon_cell = np.round(segments['lon_bin'].to_numpy(dtype=float) / SEGMENT_GRID_DEG).astype(np.int64)
+
+    # Grid adjacency: join segments to segments in each of the 9 offset cells
+    lon_span = int(lon_cell.max() - lon_cell.min()) + 3
+    cell = (lat_cell - lat_cell.min() + 1) * lon_span + (lon_cell - lon_cell.min() + 1)
+    members = pd.DataFrame({'cell': cell, 'dst': ids})
+    pairs = []
+    for d_lat in (-1, 0, 1):
+        for d_lon in (-1, 0, 1):
+            shifted = pd.DataFrame({'cell': cell + d_lat * lon_span + d_lon, 'src': ids})
+            pairs.append(shifted.merge(members, on='cell')[['src', 'dst']])
+    pairs = pd.concat(pairs, ignore_index=True)
+    pairs = pairs[pairs['src'] != pairs['dst']]
+    cell_adjacency = sparse.csr_matrix(
+        (np.ones(len(pairs)), (pairs['src'].to_numpy(), pairs['dst'].to_numpy())), shape=(n, n)
+    )
+
+    # k nearest centroids (equirectangular meters; fine at segment scale)
+    lat = segments['lat_bin'].to_numpy(dtype=float)
+    lon = segments['lon_bin'].to_numpy(dtype=float)
+    xy = np.column_stack([lon * np.cos(np.radians(np.nanmean(lat))), lat]) * METERS_PER_DEGREE
+    k = min(k_nearest, n - 1)
+    if k > 0:
+        _, nearest = cKDTree(xy).query(xy, k=k + 1)
+        src = np.repeat(ids, k + 1)
+        dst = ids[nearest.ravel()]
+        keep = src != dst
+        src, dst = src[keep], dst[keep]
+        # A point can come back without itself among ties; keep its first k others
+        rank = pd.Series(src).groupby(src).cumcount().to_numpy()
+        src, dst = src[rank < k], dst[rank < k]
+        knn_adjacency = sparse.csr_matrix((np.ones(len(src)), (src, dst)), shape=(n, n))
+    else:
+        knn_adjacency = sparse.csr_matrix((n, n))
+
+    return cell_adjacency, knn_adjacency
+
+def neighbor_crash_totals(df, segments, k_nearest=8):
+    """
+    Crashes on each segment's neighbors over the previous year, for every period
+
+    The segment × period crash counts form a sparse matrix C. Multiplying by
+    a banded period matrix turns them into trailing-year totals H (earlier
+    periods only, as in add_history_features), and multiplying H by each
+    neighbor matrix sums those totals over a segment's neighbors.
+
+    Args:
+        df: Segment-period DataFrame with segment_id, period columns and crash_count
+        segments: Segment lookup table from create_segment_identifiers
+        k_nearest: Neighbors for knn_crashes
+
+    Returns:
+        (first_period, totals): period_ordinal value of column 0, and
+        feature name -> segment × period CSR matrix
+    """
+    period, per_year = period_ordinal(df)
+    first_period = int(period.min())
+    per = period - first_period
+    n_periods = int(per.max()) + 1
+
+    counts = sparse.csr_matrix(
+        (df['crash_count'].to_numpy(dtype=float), (df['segment_id'].to_numpy(dtype=np.int64), per)),
+        shape=(len(segments), n_periods)
+    )
+    # trailing[q, p] = 1 for the per_year periods before p (all zero with one period)
+    trailing = sparse.csr_matrix((n_periods, n_periods))
+    for d in range(1, min(per_year, n_periods - 1) + 1):
+        trailing += sparse.eye(n_periods, k=d, format='csr')
+    history = counts @ trailing
+
+    cell_adjacency, knn_adjacency = segment_neighbor_matrices(segments, k_nearest=k_nearest)
+    totals = {
+        'adjacent_cell_crashes': (cell_adjacency @ history).tocsr(),
+        'knn_crashes': (knn_adjacency @ history).tocsr(),
+    }
+    return first_period, totals
+
+def add_neighbor_features(df, segments, k_nearest=8, totals=None):
+    """
+    Crashes on neighboring segments over the previous year (see neighbor_crash_totals)
+
+    Adds:
+        adjacent_cell_crashes: crashes on other segments in the same or the
+            8 surrounding grid cells during the previous year
+        knn_crashes: crashes on the k_nearest closest segments during the
+            previous year
+
+    Args:
+        df: Segment-period DataFrame with segment_id, period columns and crash_count
+        segments: Segment lookup table from create_segment_identifiers
+        k_nearest: Neighbors for knn_crashes
+        totals: neighbor_crash_totals result to look rows up in (default:
+            computed from df; pass it when df is one chunk of a larger panel)
+
+    Returns:
+        DataFrame with neighbor columns added (NaN where a row has no earlier period)
+    """
+    first_period, totals = totals or neighbor_crash_totals(df, segments, k_nearest=k_nearest)
+    per = period_ordinal(df)[0] - first_period
+    segment = df['segment_id'].to_numpy(dtype=np.int64)
+
+    for col, matrix in totals.items():
+        values = np.asarray(matrix[segment, per]).ravel()
+        df[col] = np.where(per > 0, values, np.nan)
+
+    return df
+
+def engineer_segment_features(df, segments=None, first_period=None, neighbor_totals=None,
+                              verbose=True):
     """
     Engineer additional features for segment-level dataset
 
     Args:
         df: Aggregated segment DataFrame
+        segments: Optional segment lookup table; adds spatial neighbor features
+        first_period: Start of the data when df is one chunk (see add_history_features)
+        neighbor_totals: Precomputed neighbor_crash_totals when df is one chunk
         verbose: Print progress
 
     Returns:
@@ -281,11 +868,12 @@ def engineer_segment_features(df, verbose=True):
         print("STEP 4: ENGINEERING SEGMENT FEATURES")
         print("="*80 + "\n")
 
-    # Historical crash rate for this segment (across all time periods)
-    segment_history = df.groupby('segment_id')['crash_count'].agg(['mean', 'std', 'max']).reset_index()
-    segment_history.columns = ['segment_id', 'segment_crash_mean', 'segment_crash_std', 'segment_crash_max']
+    # Historical crash rate for this segment (earlier periods only)
+    df = add_history_features(df, first_period=first_period)
 
-    df = df.merge(segment_history, on='segment_id', how='left')
+    # Crashes on neighboring segments (earlier periods only)
+    if segments is not None:
+        df = add_neighbor_features(df, segments, totals=neighbor_totals)
 
     # Risk score components
     df['risk_score_simple'] = (
@@ -295,14 +883,20 @@ def engineer_segment_features(df, verbose=True):
     )
 
     # Categorical risk bins
+    # include_lowest keeps crash-free rows (score 0) in LOW
     df['risk_category'] = pd.cut(
         df['risk_score_simple'],
         bins=[0, 2, 5, 10, np.inf],
-        labels=['LOW', 'MEDIUM', 'HIGH', 'VERY_HIGH']
+        labels=RISK_CATEGORIES,
+        include_lowest=True
     )
 
     if verbose:
-        print("  ✓ Historical segment features")
+        print("  ✓ Historical segment features (earlier periods only)")
+        print("    crash_count_prev, crash_count_trailing_mean, crash_count_ewm,")
+        print("    segment_crash_mean, segment_crash_std, segment_crash_max")
+        if segments is not None:
+            print("  ✓ Spatial neighbor features: adjacent_cell_crashes, knn_crashes")
         print("  ✓ Risk score components")
         print("  ✓ Risk categories")
         print(f"\n  Risk category distribution:")
@@ -339,27 +933,102 @@ def create_train_val_test_split(df, train_years, val_years, test_years, verbose=
     test = df[df['year'].isin(test_years)]
 
     if verbose:
-        print(f"Train ({min(train_years)}-{max(train_years)}): {len(train):,} samples ({len(train)/len(df)*100:.1f}%)")
-        print(f"Val   ({min(val_years)}-{max(val_years)}): {len(val):,} samples ({len(val)/len(df)*100:.1f}%)")
-        print(f"Test  ({min(test_years)}-{max(test_years)}): {len(test):,} samples ({len(test)/len(df)*100:.1f}%)")
-
-        print(f"\n  Risk category distribution:")
-        for split_name, split_df in [('Train', train), ('Val', val), ('Test', test)]:
-            counts = split_df['risk_category'].value_counts()
-            print(f"    {split_name}:")
-            for cat in ['LOW', 'MEDIUM', 'HIGH', 'VERY_HIGH']:
-                if cat in counts.index:
-                    print(f"      {cat}: {counts[cat]:,} ({counts[cat]/len(split_df)*100:.1f}%)")
+        print_split_report(split_statistics(df, train, val, test), train_years, val_years, test_years)
 
     return train, val, test
 
-def save_datasets(train, val, test, output_dir, verbose=True):
+def split_chunks(chunks, train_years, val_years, test_years, stats):
     """
-    Save segment-level datasets
+    Split each chunk of a segment dataset by year (see create_train_val_test_split)
 
     Args:
-        train, val, test: DataFrames
+        chunks: Iterable of segment DataFrames
+        train_years, val_years, test_years: Years of each split
+        stats: List collecting each chunk's split_statistics
+
+    Yields:
+        (train, val, test) DataFrames of each chunk
+    """
+    for chunk in chunks:
+        train, val, test = create_train_val_test_split(
+            chunk, train_years, val_years, test_years, verbose=False
+        )
+        stats.append(split_statistics(chunk, train, val, test))
+        yield train, val, test
+
+def split_statistics(df, train, val, test):
+    """
+    Row counts and summary sums of a split dataset, additive across chunks
+
+    Returns:
+        pd.Series: rows, columns, per-split rows and risk category counts,
+        and for train the count, sum and sum of squares of each
+        SUMMARY_METRICS column and non-null counts of COMPLETENESS_COLUMNS
+    """
+    stats = {'rows': len(df), 'columns': len(train.columns)}
+    for name, split_df in [('train', train), ('val', val), ('test', test)]:
+        stats[f'{name}_rows'] = len(split_df)
+        counts = split_df['risk_category'].value_counts()
+        for cat in RISK_CATEGORIES:
+            stats[f'{name}_{cat}'] = counts.get(cat, 0)
+
+    for col in SUMMARY_METRICS:
+        values = train[col].to_numpy(dtype=float)
+        values = values[~np.isnan(values)]
+        stats[f'{col}_n'] = len(values)
+        stats[f'{col}_sum'] = values.sum()
+        stats[f'{col}_sumsq'] = (values ** 2).sum()
+    for col in COMPLETENESS_COLUMNS:
+        if col in train.columns:
+            stats[f'{col}_notna'] = train[col].notna().sum()
+
+    return pd.Series(stats, dtype=float)
+
+def combine_split_statistics(stats):
+    """split_statistics of a whole dataset from those of its chunks"""
+    total = sum(stats[1:], stats[0].copy())
+    total['columns'] = stats[0]['columns']
+    return total
+
+def print_split_report(stats, train_years, val_years, test_years):
+    """Print split sizes and risk category distributions from split_statistics"""
+    for label, name, years in [('Train', 'train', train_years), ('Val  ', 'val', val_years),
+                               ('Test ', 'test', test_years)]:
+        n = int(stats[f'{name}_rows'])
+        print(f"{label} ({min(years)}-{max(years)}): {n:,} samples ({n/stats['rows']*100:.1f}%)")
+
+    print(f"\n  Risk category distribution:")
+    for split_name in ['Train', 'Val', 'Test']:
+        print(f"    {split_name}:")
+        n = stats[f'{split_name.lower()}_rows']
+        for cat in RISK_CATEGORIES:
+            count = int(stats[f'{split_name.lower()}_{cat}'])
+            print(f"      {cat}: {count:,} ({count/max(n, 1)*100:.1f}%)")
+
+def save_datasets(train, val, test, output_dir, segments=None, time_window=None,
+                  primary=True, timestamp=None, verbose=True):
+    """
+    Save segment-level datasets (see save_dataset_chunks)
+
+    Returns:
+        Paths to saved files
+    """
+    return save_dataset_chunks([(train, val, test)], output_dir, segments=segments,
+                               time_window=time_window, primary=primary,
+                               timestamp=timestamp, verbose=verbose)
+
+def save_dataset_chunks(chunks, output_dir, segments=None, time_window=None,
+                        primary=True, timestamp=None, verbose=True):
+    """
+    Save segment-level datasets, appending one chunk at a time
+
+    Args:
+        chunks: Iterable of (train, val, test) DataFrames with the same columns
         output_dir: Output directory
+        segments: Optional segment lookup table (segment_id -> attributes)
+        time_window: Window name added to file names (e.g. segment_train_monthly_*.csv)
+        primary: Also point the unsuffixed segment_*_latest.csv symlinks at these files
+        timestamp: Shared timestamp for files written in one run
         verbose: Print progress
 
     Returns:
@@ -374,60 +1043,82 @@ def save_datasets(train, val, test, output_dir, verbose=True):
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = f"_{time_window}" if time_window else ""
 
     # Save files
-    train_file = output_dir / f"segment_train_{timestamp}.csv"
-    val_file = output_dir / f"segment_val_{timestamp}.csv"
-    test_file = output_dir / f"segment_test_{timestamp}.csv"
-
-    train.to_csv(train_file, index=False)
-    val.to_csv(val_file, index=False)
-    test.to_csv(test_file, index=False)
+    train_file = output_dir / f"segment_train{suffix}_{timestamp}.csv"
+    val_file = output_dir / f"segment_val{suffix}_{timestamp}.csv"
+    test_file = output_dir / f"segment_test{suffix}_{timestamp}.csv"
+
+    for i, parts in enumerate(chunks):
+        for part, path in zip(parts, (train_file, val_file, test_file)):
+            part.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+    links = [(f'train{suffix}', train_file), (f'val{suffix}', val_file), (f'test{suffix}', test_file)]
+    if suffix and primary:
+        links += [('train', train_file), ('val', val_file), ('test', test_file)]
+    if segments is not None:
+        segments_file = output_dir / f"segment_lookup_{timestamp}.csv"
+        segments.to_csv(segments_file, index=False)
+        links.append(('lookup', segments_file))
 
     if verbose:
         print(f"Saving datasets to {output_dir}...")
         print(f"  ✓ Train: {train_file.name} ({train_file.stat().st_size / 1024 / 1024:.1f} MB)")
         print(f"  ✓ Val:   {val_file.name} ({val_file.stat().st_size / 1024 / 1024:.1f} MB)")
         print(f"  ✓ Test:  {test_file.name} ({test_file.stat().st_size / 1024 / 1024:.1f} MB)")
+        if segments is not None:
+            print(f"  ✓ Segment lookup: {segments_file.name} ({len(segments):,} segments)")
 
     # Create symlinks
-    for name, path in [('train', train_file), ('val', val_file), ('test', test_file)]:
+    for name, path in links:
         link = output_dir / f"segment_{name}_latest.csv"
-        if link.exists():
+        if link.exists() or link.is_symlink():
             link.unlink()
         link.symlink_to(path.name)
 
     if verbose:
-        print(f"\n  ✓ Created symlinks: segment_train_latest.csv, segment_val_latest.csv, segment_test_latest.csv")
+        print(f"\n  ✓ Created symlinks: segment_train{suffix}_latest.csv, "
+              f"segment_val{suffix}_latest.csv, segment_test{suffix}_latest.csv")
+        if suffix and primary:
+            print(f"  ✓ segment_train_latest.csv, segment_val_latest.csv, segment_test_latest.csv "
+                  f"point to the {time_window} files")
 
     return train_file, val_file, test_file
 
-def print_summary(train, val, test):
-    """Print final dataset summary"""
+def print_summary(stats):
+    """Print final dataset summary from split_statistics"""
 
     print("\n" + "="*80)
     print("SEGMENT-LEVEL DATASET SUMMARY")
     print("="*80 + "\n")
 
-    print(f"Total samples: {len(train) + len(val) + len(test):,}")
-    print(f"  Train: {len(train):,}")
-    print(f"  Val:   {len(val):,}")
-    print(f"  Test:  {len(test):,}")
+    n_train, n_val, n_test = (int(stats[f'{name}_rows']) for name in ('train', 'val', 'test'))
+    print(f"Total samples: {n_train + n_val + n_test:,}")
+    print(f"  Train: {n_train:,}")
+    print(f"  Val:   {n_val:,}")
+    print(f"  Test:  {n_test:,}")
+
+    print(f"\nTotal features: {int(stats['columns'])}")
 
-    print(f"\nTotal features: {len(train.columns)}")
+    def mean_std(col):
+        n, total, total_sq = stats[f'{col}_n'], stats[f'{col}_sum'], stats[f'{col}_sumsq']
+        mean = total / n if n > 0 else np.nan
+        variance = (total_sq - total * mean) / (n - 1) if n > 1 else np.nan
+        return mean, np.sqrt(max(variance, 0.0))
 
     print(f"\nKey metrics (train):")
-    print(f"  crash_count       : {train['crash_count'].mean():.2f} ± {train['crash_count'].std():.2f}")
-    print(f"  severity_rate     : {train['severity_rate'].mean():.2%} ± {train['severity_rate'].std():.2%}")
-    print(f"  traffic_impact    : {train['traffic_impact'].mean():.0f} ± {train['traffic_impact'].std():.0f}")
-    print(f"  crash_density     : {train['crash_density'].mean():.3f} ± {train['crash_density'].std():.3f}")
-    print(f"  risk_score_simple : {train['risk_score_simple'].mean():.2f} ± {train['risk_score_simple'].std():.2f}")
+    print("  crash_count       : {:.2f} ± {:.2f}".format(*mean_std('crash_count')))
+    print("  severity_rate     : {:.2%} ± {:.2%}".format(*mean_std('severity_rate')))
+    print("  traffic_impact    : {:.0f} ± {:.0f}".format(*mean_std('traffic_impact')))
+    print("  crash_density     : {:.3f} ± {:.3f}".format(*mean_std('crash_density')))
+    print("  risk_score_simple : {:.2f} ± {:.2f}".format(*mean_std('risk_score_simple')))
 
     print(f"\nFeature completeness (train):")
-    for col in ['highway_type', 'num_lanes', 'speed_limit', 'aadt', 'Temperature(F)']:
-        if col in train.columns:
-            completeness = (1 - train[col].isna().sum() / len(train)) * 100
+    for col in COMPLETENESS_COLUMNS:
+        if f'{col}_notna' in stats:
+            completeness = stats[f'{col}_notna'] / n_train * 100
             print(f"  {col:20s}: {completeness:5.1f}%")
 
     print("\n" + "="*80)
@@ -440,11 +1131,15 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
-  # Default: use latest crash-level training data, quarterly aggregation
+  # Default: use latest crash-level training data, write monthly, quarterly
+  # and yearly datasets (segment_*_latest.csv point to quarterly)
   python build_segment_dataset.py
 
-  # Monthly aggregation
-  python build_segment_dataset.py --time-window monthly
+  # Only monthly aggregation
+  python build_segment_dataset.py --time-window monthly --time-windows monthly
+
+  # Include crash-free segment-periods
+  python build_segment_dataset.py --zero-fill
 
   # Require minimum 5 crashes per segment-time
   python build_segment_dataset.py --min-crashes 5
@@ -459,12 +1154,23 @@ Examples:
     parser.add_argument('--output-dir', type=str, default=DEFAULT_OUTPUT_DIR,
                        help=f'Output directory (default: {DEFAULT_OUTPUT_DIR})')
     parser.add_argument('--time-window', type=str, default='quarterly',
-                       choices=['monthly', 'quarterly', 'yearly'],
-                       help='Time aggregation window (default: quarterly)')
+                       choices=TIME_WINDOWS,
+                       help='Primary time window, linked as segment_*_latest.csv (default: quarterly)')
+    parser.add_argument('--time-windows', type=str, nargs='+', default=TIME_WINDOWS,
+                       choices=TIME_WINDOWS,
+                       help='Time windows to write, all rolled up from one monthly cube '
+                            '(default: monthly quarterly yearly)')
     parser.add_argument('--min-crashes', type=int, default=1,
                        help='Minimum crashes per segment-time (default: 1)')
+    parser.add_argument('--zero-fill', action='store_true',
+                       help='Include crash-free segment-periods (every segment in every period; '
+                            'not with --min-crashes > 1)')
+    parser.add_argument('--panel-chunk-segments', type=int, default=50_000,
+                       help='Segments per chunk when building the zero-filled panel (default: 50,000)')
     parser.add_argument('--sample', type=int,
                        help='Sample size for testing (optional)')
+    parser.add_argument('--weather-file', type=str,
+                       help='NOAA daily weather CSV to join when the input lacks noaa_* columns (optional)')
     parser.add_argument('--train-years', type=str, default='2016,2017,2018,2019,2020,2021',
                        help='Comma-separated train years (default: 2016-2021)')
     parser.add_argument('--val-years', type=str, default='2022',
@@ -476,6 +1182,11 @@ Examples:
 
     args = parser.parse_args()
 
+    # Crash-free periods would all fall below any threshold above 1
+    if args.zero_fill and args.min_crashes > 1:
+        parser.error('--zero-fill adds crash-free periods, which --min-crashes > 1 would drop again; '
+                     'use one or the other')
+
     # Parse year arguments
     train_years = [int(y) for y in args.train_years.split(',')]
     val_years = [int(y) for y in args.val_years.split(',')]
@@ -483,6 +1194,9 @@ Examples:
 
     verbose = not args.quiet
 
+    # Primary window is always written
+    windows = [w for w in TIME_WINDOWS if w in args.time_windows or w == args.time_window]
+
     if verbose:
         print("\n" + "="*80)
         print("SEGMENT-LEVEL DATASET BUILDER")
@@ -490,32 +1204,68 @@ Examples:
         print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"Input file: {args.input}")
         print(f"Output dir: {args.output_dir}")
-        print(f"Time window: {args.time_window}")
+        print(f"Time windows: {', '.join(windows)} (primary: {args.time_window})")
         print(f"Min crashes: {args.min_crashes}")
+        print(f"Zero-fill crash-free periods: {args.zero_fill}")
         if args.sample:
             print(f"Sample size: {args.sample:,}")
 
     # Build dataset
-    df = load_crash_data(args.input, sample_size=args.sample, verbose=verbose)
-    df = create_segment_identifiers(df, verbose=verbose)
-    df = aggregate_by_segment_and_time(df, time_window=args.time_window,
-                                      min_crashes=args.min_crashes, verbose=verbose)
-    df = engineer_segment_features(df, verbose=verbose)
-
-    train, val, test = create_train_val_test_split(
-        df, train_years, val_years, test_years, verbose=verbose
-    )
+    df = load_crash_data(args.input, sample_size=args.sample,
+                         weather_file=args.weather_file, verbose=verbose)
+    df, segments = create_segment_identifiers(df, verbose=verbose)
 
-    train_file, val_file, test_file = save_datasets(
-        train, val, test, args.output_dir, verbose=verbose
-    )
+    # One pass over the crashes; every window is rolled up from the cube
+    base = build_monthly_cube(df, verbose=verbose)
+    del df
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    saved = []
+    for i, window in enumerate(windows):
+        if verbose:
+            print("\n" + "#"*80)
+            print(f"TIME WINDOW: {window.upper()}")
+            print("#"*80)
+
+        save_kwargs = dict(segments=segments if i == 0 else None, time_window=window,
+                           primary=(window == args.time_window), timestamp=timestamp,
+                           verbose=verbose)
+
+        if args.zero_fill:
+            # Chunks of segments stream through features, splits and CSV writing
+            chunks = iter_zero_filled_window(base, segments, time_window=window,
+                                             chunk_segments=args.panel_chunk_segments,
+                                             verbose=verbose)
+            chunk_stats = []
+            files = save_dataset_chunks(
+                split_chunks(chunks, train_years, val_years, test_years, chunk_stats),
+                args.output_dir, **save_kwargs
+            )
+            stats = combine_split_statistics(chunk_stats)
+            if verbose:
+                print(f"\n  Splits:")
+                print_split_report(stats, train_years, val_years, test_years)
+        else:
+            window_df = roll_up_cube(base, time_window=window,
+                                     min_crashes=args.min_crashes, verbose=verbose)
+            window_df = engineer_segment_features(window_df, segments=segments, verbose=verbose)
+
+            train, val, test = create_train_val_test_split(
+                window_df, train_years, val_years, test_years, verbose=verbose
+            )
+            files = save_datasets(train, val, test, args.output_dir, **save_kwargs)
+            stats = split_statistics(window_df, train, val, test)
+            del window_df, train, val, test
+
+        saved.extend(files)
+
+        if verbose:
+            print_summary(stats)
 
     if verbose:
-        print_summary(train, val, test)
         print(f"\n✅ Datasets saved:")
-        print(f"   {train_file}")
-        print(f"   {val_file}")
-        print(f"   {test_file}")
+        for path in saved:
+            print(f"   {path}")
         print()
 
 if __name__ == "__main__":
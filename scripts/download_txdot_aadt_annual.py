@@ -174,6 +174,16 @@ def download_txdot_aadt_annual(output_dir='data/raw/traffic'):
         if field in gdf.columns:
             print(f"  ✓ {field}")
 
+    # Route name for integrate_texas_aadt.py --route-column
+    route_fields = [col for col in gdf.columns
+                    if any(key in col.upper() for key in ('RTE', 'ROUTE', 'ROAD', 'RDWY', 'HWY'))]
+    print(f"\nRoute-name fields (for integrate_texas_aadt.py --route-column):")
+    if route_fields:
+        for field in route_fields:
+            print(f"  - {field} (e.g. {gdf[field].dropna().astype(str).head(3).tolist()})")
+    else:
+        print("  ⚠ None found; route-constrained AADT matching needs --no-route-constraint")
+
     return gdf
 
 def main():
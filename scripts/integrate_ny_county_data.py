@@ -18,6 +18,20 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 import json
+import sys
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.append(str(project_root))
+
+from src.data.wzdx import parse_wzdx_feed
+from src.data.county_index import CountyBoundaryIndex
+from src.data.crash_calendar import PROJECTION_HORIZON_DAYS, CrashCalendar
+from src.features.categorize import categorize_risk_score
+
+# County boundaries are read from a local copy only (download once)
+TIGER_COUNTIES_URL = "https://www2.census.gov/geo/tiger/TIGER2024/COUNTY/tl_2024_us_county.zip"
+DEFAULT_TIGER_COUNTIES = 'data/raw/boundaries/tl_2024_us_county.zip'
 
 
 class NYCountyIntegrator:
@@ -44,6 +58,9 @@ class NYCountyIntegrator:
         self.crashes_df = None
         self.county_stats = None
         self.integrated_wz = None
+        self.county_index = None
+        self.zone_county_weights = None
+        self.crash_calendar = None
 
     def load_work_zones(self):
         """Load and process work zone data"""
@@ -51,48 +68,19 @@ class NYCountyIntegrator:
         print("LOADING NY WORK ZONES")
         print("="*70)
 
-        # Load WZDx feed as GeoDataFrame
-        self.work_zones_gdf = gpd.read_file(self.wzdx_path)
+        # Stream the WZDx feed into typed columns (one pass, bounded memory)
+        self.work_zones_gdf = parse_wzdx_feed(self.wzdx_path)
 
         print(f"✓ Loaded {len(self.work_zones_gdf):,} work zones")
         print(f"  Geometry type: {self.work_zones_gdf.geometry.type.unique()}")
         print(f"  CRS: {self.work_zones_gdf.crs}")
 
-        # Extract core properties
+        # road_names, direction, description and vehicle_impact come from the parser
         print("\nExtracting work zone features...")
-
-        # Parse core_details JSON string
-        def parse_core_details(core_details_str):
-            try:
-                if isinstance(core_details_str, str):
-                    return json.loads(core_details_str)
-                elif isinstance(core_details_str, dict):
-                    return core_details_str
-                else:
-                    return {}
-            except:
-                return {}
-
-        self.work_zones_gdf['core_details_parsed'] = self.work_zones_gdf['core_details'].apply(parse_core_details)
-
-        # Extract road names
-        def extract_road_names(core_details):
-            road_names = core_details.get('road_names', [])
-            return ', '.join(road_names) if road_names else 'Unknown'
-
-        self.work_zones_gdf['road_names'] = self.work_zones_gdf['core_details_parsed'].apply(extract_road_names)
-
-        # Extract direction
-        self.work_zones_gdf['direction'] = self.work_zones_gdf['core_details_parsed'].apply(
-            lambda x: x.get('direction', 'unknown')
-        )
-
-        # Extract description
-        self.work_zones_gdf['description'] = self.work_zones_gdf['core_details_parsed'].apply(
-            lambda x: x.get('description', '')
+        self.work_zones_gdf['direction'] = (
+            self.work_zones_gdf['direction'].astype(object).fillna('unknown').astype('category')
         )
-
-        # Vehicle impact already exists as a column, no need to extract
+        self.work_zones_gdf['description'] = self.work_zones_gdf['description'].fillna('')
 
         # Parse dates
         self.work_zones_gdf['start_date_parsed'] = pd.to_datetime(
@@ -113,68 +101,57 @@ class NYCountyIntegrator:
 
         return self.work_zones_gdf
 
-    def assign_counties_to_work_zones(self, county_shapefile=None):
+    def assign_counties_to_work_zones(self, county_shapefile=None, state_fips='36',
+                                      county_cache_dir='data/cache/counties'):
         """
-        Assign county to each work zone using spatial join
+        Assign county to each work zone using a cached county boundary index
+
+        The index is built once from a local TIGER county file and cached
+        (memory-mappable grid plus simplified polygons); later runs reuse it
+        without the file. Nothing is downloaded. Zones crossing county lines
+        are split at the boundaries: zone_county_weights holds each zone's
+        length share per county, and county_name/county_fips the county with
+        the largest share.
 
         Args:
-            county_shapefile: Path to NY county boundaries (optional)
-                If not provided, will attempt to download from Census
+            county_shapefile: Local TIGER county shapefile or .zip (default: DEFAULT_TIGER_COUNTIES)
+            state_fips: State FIPS code of the counties to index
+            county_cache_dir: Directory of cached county indexes
+
+        Raises:
+            FileNotFoundError: If there is neither a cached index nor a local TIGER file
         """
         print("\n" + "="*70)
         print("ASSIGNING COUNTIES TO WORK ZONES")
         print("="*70)
 
-        if county_shapefile is None:
-            # Download NY county boundaries from Census TIGER
-            print("\nDownloading NY county boundaries from Census TIGER...")
-
-            try:
-                # US Counties
-                counties_url = "https://www2.census.gov/geo/tiger/TIGER2024/COUNTY/tl_2024_us_county.zip"
-                all_counties = gpd.read_file(counties_url)
-
-                # Filter to NY (STATEFP = '36')
-                ny_counties = all_counties[all_counties['STATEFP'] == '36'].copy()
-
-                print(f"✓ Downloaded {len(ny_counties)} NY counties")
-
-                # Simplify to relevant columns
-                ny_counties = ny_counties[['COUNTYFP', 'NAME', 'geometry']]
-                ny_counties = ny_counties.rename(columns={'NAME': 'county_name'})
-
-            except Exception as e:
-                print(f"✗ Error downloading counties: {e}")
-                print("\nFalling back to centroid-based county assignment...")
-                print("⚠ This is less accurate. Consider providing county shapefile.")
-                return self._assign_counties_fallback()
-
-        else:
-            # Load provided shapefile
-            print(f"\nLoading county boundaries from: {county_shapefile}")
-            ny_counties = gpd.read_file(county_shapefile)
-
-        # Ensure same CRS
-        if self.work_zones_gdf.crs != ny_counties.crs:
-            print(f"Reprojecting work zones from {self.work_zones_gdf.crs} to {ny_counties.crs}")
-            self.work_zones_gdf = self.work_zones_gdf.to_crs(ny_counties.crs)
-
-        # Spatial join
-        print("\nPerforming spatial join...")
-        wz_with_county = gpd.sjoin(
-            self.work_zones_gdf,
-            ny_counties,
-            how='left',
-            predicate='intersects'
-        )
-
-        # Handle multiple matches (work zone spans multiple counties)
-        # Keep first match for simplicity
-        wz_with_county = wz_with_county.groupby(wz_with_county.index).first()
-
-        # Copy back to main dataframe
-        self.work_zones_gdf['county_name'] = wz_with_county['county_name']
-        self.work_zones_gdf['county_fips'] = wz_with_county['COUNTYFP']
+        tiger_file = county_shapefile or DEFAULT_TIGER_COUNTIES
+        try:
+            self.county_index = CountyBoundaryIndex.load_or_build(
+                state_fips, tiger_file=tiger_file, cache_dir=county_cache_dir
+            )
+        except FileNotFoundError as e:
+            raise FileNotFoundError(
+                f"{e}. Download {TIGER_COUNTIES_URL} once and pass it with --counties"
+            ) from e
+
+        # Length share of each zone in every county it crosses (long form)
+        print("\nApportioning work zones to counties...")
+        weights = self.county_index.apportion(self.work_zones_gdf.geometry.to_crs('EPSG:4326').values)
+        weights.insert(1, 'work_zone_id', self.work_zones_gdf['id'].to_numpy()[weights['zone'].to_numpy()])
+        self.zone_county_weights = weights
+
+        # Primary county: the one holding the largest share of the zone
+        primary = weights.sort_values(['zone', 'length_share'], ascending=[True, False]).drop_duplicates('zone')
+        county_name = np.full(len(self.work_zones_gdf), None, dtype=object)
+        county_fips = np.full(len(self.work_zones_gdf), None, dtype=object)
+        county_name[primary['zone'].to_numpy()] = primary['county_name'].to_numpy()
+        county_fips[primary['zone'].to_numpy()] = primary['county_fips'].to_numpy()
+        self.work_zones_gdf['county_name'] = county_name
+        self.work_zones_gdf['county_fips'] = county_fips
+        self.work_zones_gdf['num_counties'] = np.bincount(
+            weights['zone'].to_numpy(), minlength=len(self.work_zones_gdf)
+        ).astype(np.int16)
 
         # Stats
         matched = self.work_zones_gdf['county_name'].notna().sum()
@@ -183,6 +160,7 @@ class NYCountyIntegrator:
         print(f"\n✓ County assignment complete")
         print(f"  Matched: {matched:,} / {len(self.work_zones_gdf):,} ({match_rate:.1f}%)")
         print(f"  Unique counties: {self.work_zones_gdf['county_name'].nunique()}")
+        print(f"  Spanning 2+ counties: {(self.work_zones_gdf['num_counties'] > 1).sum():,}")
 
         # Show top counties
         print(f"\nTop counties by work zone count:")
@@ -192,21 +170,6 @@ class NYCountyIntegrator:
 
         return self.work_zones_gdf
 
-    def _assign_counties_fallback(self):
-        """
-        Fallback: Assign counties using work zone centroids and approximate matching
-
-        This is less accurate but works without county shapefiles
-        """
-        print("\nUsing fallback method: Cannot assign accurate counties without boundaries")
-        print("⚠ County assignment will be incomplete")
-
-        # For now, mark as unknown
-        self.work_zones_gdf['county_name'] = None
-        self.work_zones_gdf['county_fips'] = None
-
-        return self.work_zones_gdf
-
     def load_crashes(self):
         """Load and process crash data"""
         print("\n" + "="*70)
@@ -287,7 +250,12 @@ class NYCountyIntegrator:
 
         self.county_stats = county_stats
 
+        # County x day counts for exact work zone windows
+        self.crash_calendar = CrashCalendar.from_crashes(self.crashes_df)
+
         print(f"✓ Aggregated crash data for {len(county_stats)} counties")
+        print(f"  Daily calendar: {len(self.crash_calendar.counties)} counties × "
+              f"{self.crash_calendar.n_days:,} days")
         print(f"\nTop 10 counties by total crashes:")
         print(county_stats.nlargest(10, 'total_crashes')[
             ['county_name', 'total_crashes', 'injury_crashes', 'fatal_crashes']
@@ -295,8 +263,13 @@ class NYCountyIntegrator:
 
         return county_stats
 
-    def integrate_work_zones_with_crashes(self):
-        """Integrate work zone data with county-level crash statistics"""
+    def integrate_work_zones_with_crashes(self, seasonal=False):
+        """
+        Integrate work zone data with county-level crash statistics
+
+        Args:
+            seasonal: Use month-of-year crash rates for window days outside the crash history
+        """
         print("\n" + "="*70)
         print("INTEGRATING WORK ZONES WITH CRASH DATA")
         print("="*70)
@@ -329,30 +302,26 @@ class NYCountyIntegrator:
             'unknown': 1.5
         }
 
-        integrated['vehicle_impact_weight'] = integrated['vehicle_impact'].map(
+        integrated['vehicle_impact_weight'] = integrated['vehicle_impact'].astype(object).map(
             vehicle_impact_weight
-        ).fillna(1.5)
+        ).fillna(1.5).astype(float)
+
+        # County crash rate apportioned over the counties each zone crosses
+        integrated['apportioned_crashes_per_day'] = self._apportion_county_stat('crashes_per_day')
 
+        # Crashes in each zone's own active window, apportioned the same way
+        window = self._window_crash_counts(seasonal)
+        for column in window.columns:
+            integrated[column] = window[column].to_numpy()
+
+        # Score = (crashes during the work zone's window) * (vehicle impact severity)
         integrated['work_zone_crash_risk_score'] = (
-            integrated['crashes_per_day'] *
-            integrated['duration_days'].fillna(30) *  # Assume 30 days if missing
+            integrated['window_crashes'] *
             integrated['vehicle_impact_weight']
         )
 
         # Add categorical risk level
-        def categorize_risk(score):
-            if pd.isna(score):
-                return 'Unknown'
-            elif score < 10:
-                return 'Low'
-            elif score < 50:
-                return 'Medium'
-            elif score < 100:
-                return 'High'
-            else:
-                return 'Very High'
-
-        integrated['risk_category'] = integrated['work_zone_crash_risk_score'].apply(categorize_risk)
+        integrated['risk_category'] = categorize_risk_score(integrated['work_zone_crash_risk_score']).astype(object)
 
         self.integrated_wz = integrated
 
@@ -362,6 +331,12 @@ class NYCountyIntegrator:
 
         print(f"\n✓ Integration complete")
         print(f"  Work zones matched to crash data: {matched:,} / {len(integrated):,} ({match_rate:.1f}%)")
+        print(f"  Window days inside crash history: {integrated['window_observed_share'].mean():.1%} "
+              f"(rest estimated from {'monthly' if seasonal else 'overall'} county rates)")
+        clipped = integrated['window_clipped'].sum()
+        if clipped:
+            print(f"  ⚠️  {clipped:,} work zone windows clipped to {PROJECTION_HORIZON_DAYS} days "
+                  f"past the crash history (check their dates)")
         print(f"\nRisk category distribution:")
         risk_dist = integrated['risk_category'].value_counts()
         for category, count in risk_dist.items():
@@ -370,6 +345,61 @@ class NYCountyIntegrator:
 
         return integrated
 
+    def _apportion_county_stat(self, column):
+        """Length-share weighted average of a county_stats column for each work zone"""
+        stat = self.county_stats.set_index('county_name')[column]
+        return self._apportion_to_zones(
+            stat.reindex(self.zone_county_weights['county_name'].str.strip().str.upper()).to_numpy(dtype=float)
+        )
+
+    def _window_crash_counts(self, seasonal=False):
+        """
+        Crash counts in each work zone's active window from the county x day calendar
+
+        Windows run from start_date to end_date (30 days when the end is
+        missing). Counts are looked up per zone x county pair and apportioned
+        by length share.
+
+        Returns:
+            pd.DataFrame: window_crashes, window_injury_crashes,
+            window_fatal_crashes, window_observed_share and window_clipped
+            (window cut at the calendar's projection horizon), one row per work zone
+        """
+        weights = self.zone_county_weights
+        zone = weights['zone'].to_numpy()
+        start = self.work_zones_gdf['start_date_parsed']
+        end = self.work_zones_gdf['end_date_parsed'].fillna(start + pd.Timedelta(days=30))
+
+        counts = self.crash_calendar.window_counts(
+            weights['county_name'].str.strip().str.upper().to_numpy(),
+            start.iloc[zone], end.iloc[zone], seasonal=seasonal
+        )
+        return pd.DataFrame({
+            'window_crashes': self._apportion_to_zones(counts['crashes'].to_numpy()),
+            'window_injury_crashes': self._apportion_to_zones(counts['injury'].to_numpy()),
+            'window_fatal_crashes': self._apportion_to_zones(counts['fatal'].to_numpy()),
+            'window_observed_share': self._apportion_to_zones(counts['observed_share'].to_numpy()),
+            'window_clipped': self._apportion_to_zones(counts['clipped'].to_numpy(dtype=float)) > 0,
+        })
+
+    def _apportion_to_zones(self, values):
+        """
+        Length-share weighted average per work zone of values given per zone x county row
+
+        Rows with NaN values (e.g. counties without crash data) are left out
+        of the average; zones with none left get NaN.
+        """
+        weights = self.zone_county_weights
+        known = ~np.isnan(values)
+
+        zone = weights['zone'].to_numpy()[known]
+        share = weights['length_share'].to_numpy()[known]
+        n_zones = len(self.work_zones_gdf)
+        total = np.bincount(zone, weights=share * values[known], minlength=n_zones)
+        covered = np.bincount(zone, weights=share, minlength=n_zones)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(covered > 0, total / covered, np.nan)
+
     def save_outputs(self):
         """Save processed data to files"""
         print("\n" + "="*70)
@@ -393,7 +423,12 @@ class NYCountyIntegrator:
         integrated_df.to_csv(integrated_csv, index=False)
         print(f"✓ Integrated work zones (CSV): {integrated_csv}")
 
-        # 4. Summary statistics (JSON)
+        # 4. Zone x county length-share weights (CSV)
+        weights_csv = self.output_dir / 'ny_work_zone_county_weights.csv'
+        self.zone_county_weights.drop(columns=['zone', 'county']).to_csv(weights_csv, index=False)
+        print(f"✓ Work zone county weights: {weights_csv}")
+
+        # 5. Summary statistics (JSON)
         summary = {
             'generated_at': datetime.now().isoformat(),
             'data_sources': {
@@ -421,7 +456,8 @@ class NYCountyIntegrator:
 
         print(f"\n✓ All outputs saved to: {self.output_dir}")
 
-    def run_full_integration(self, county_shapefile=None):
+    def run_full_integration(self, county_shapefile=None, state_fips='36',
+                             county_cache_dir='data/cache/counties', seasonal=False):
         """Run complete integration pipeline"""
         print("\n" + "="*80)
         print(" " * 20 + "NY COUNTY-LEVEL INTEGRATION")
@@ -429,12 +465,12 @@ class NYCountyIntegrator:
 
         # Load data
         self.load_work_zones()
-        self.assign_counties_to_work_zones(county_shapefile)
+        self.assign_counties_to_work_zones(county_shapefile, state_fips, county_cache_dir)
         self.load_crashes()
 
         # Process
         self.aggregate_crashes_by_county()
-        self.integrate_work_zones_with_crashes()
+        self.integrate_work_zones_with_crashes(seasonal=seasonal)
 
         # Save
         self.save_outputs()
@@ -468,7 +504,12 @@ def main():
     parser.add_argument('--wzdx', default='data/raw/ny_wzdx_feed.json', help='WZDx feed path')
     parser.add_argument('--crashes', default='data/raw/crashes/ny_crashes.csv', help='Crashes CSV path')
     parser.add_argument('--output', default='data/processed', help='Output directory')
-    parser.add_argument('--counties', help='Path to NY county shapefile (optional)')
+    parser.add_argument('--counties', help='Local TIGER county shapefile or .zip '
+                        f'(default: {DEFAULT_TIGER_COUNTIES}; only needed until the index is cached)')
+    parser.add_argument('--state-fips', default='36', help='State FIPS code of the counties (default: 36, NY)')
+    parser.add_argument('--county-cache', default='data/cache/counties', help='County index cache directory')
+    parser.add_argument('--seasonal', action='store_true',
+                        help='Month-of-year crash rates for work zone days outside the crash history')
 
     args = parser.parse_args()
 
@@ -478,7 +519,12 @@ def main():
         output_dir=args.output
     )
 
-    integrator.run_full_integration(county_shapefile=args.counties)
+    integrator.run_full_integration(
+        county_shapefile=args.counties,
+        state_fips=args.state_fips,
+        county_cache_dir=args.county_cache,
+        seasonal=args.seasonal
+    )
 
 
 if __name__ == "__main__":
@@ -6,13 +6,95 @@ and adds AADT (Annual Average Daily Traffic) as a feature for ML modeling.
 
 Usage:
     python scripts/integrate_texas_aadt.py
+    python scripts/integrate_texas_aadt.py --route-column RTE_NM
+    python scripts/integrate_texas_aadt.py --no-route-constraint
 """
 
+import argparse
 import geopandas as gpd
 import pandas as pd
 import numpy as np
+import shapely
 import os
 from pathlib import Path
+from scipy.spatial import cKDTree
+
+# Likely route-name columns in the AADT layer, tried first. The AADT Annuals
+# layer's schema is not pinned down here (download_txdot_aadt_annual.py
+# requests outFields='*'), so by default every route-like field is scored by
+# how many of its values parse as route keys; see detect_route_column.
+AADT_ROUTE_COLUMNS = ['RTE_NM', 'RTE_ID', 'ON_ROAD', 'RDWY_NM']
+# Name fragments of route-like fields (as listed by the downloader's summary)
+ROUTE_FIELD_KEYWORDS = ('RTE', 'ROUTE', 'ROAD', 'RDWY', 'HWY')
+# Stations sampled when scoring route columns
+ROUTE_COLUMN_SAMPLE = 10000
+
+# Route prefixes as they appear in WZDx road names and TxDOT route names
+ROUTE_PATTERN = (
+    r'\b(?P<prefix>INTERSTATE|IH|I|US HWY|US|STATE HIGHWAY|STATE HWY|SH|'
+    r'FM|RM|LOOP|SL|SPUR|SS|BUS|BU|PR|TOLL|TL)[\s\-]*0*(?P<number>\d+)'
+)
+ROUTE_PREFIX_ALIASES = {
+    'INTERSTATE': 'IH', 'I': 'IH',
+    'US HWY': 'US',
+    'STATE HIGHWAY': 'SH', 'STATE HWY': 'SH',
+    'LOOP': 'SL',
+    'SPUR': 'SS',
+    'BUS': 'BU',
+    'TOLL': 'TL',
+}
+FRONTAGE_PATTERN = r'\b(?:FRONTAGE|FRTG|FR|SVC|SVRD|SERVICE)\b'
+
+# WZDx road event geometry columns (WKT or GeoJSON text), first one present is used
+WZ_GEOMETRY_COLUMNS = ['geometry_linestring', 'geometry_multipoint']
+DEFAULT_SEGMENT_MILES = 0.5
+EARTH_RADIUS_MILES = 3958.8
+
+def normalize_route_names(names):
+    """
+    Normalize road names to route keys such as 'IH35', 'US183' or 'IH35-FR'
+
+    Frontage/service roads get a '-FR' suffix so they never share a key
+    with their mainline. Names without a recognizable route return NaN.
+    """
+
+    upper = pd.Series(names, dtype='object').astype('string').str.upper()
+    parts = upper.str.extract(ROUTE_PATTERN)
+
+    prefix = parts['prefix'].replace(ROUTE_PREFIX_ALIASES)
+    routes = prefix + parts['number']
+
+    is_frontage = upper.str.contains(FRONTAGE_PATTERN, regex=True).fillna(False).astype(bool)
+    routes = routes.where(~is_frontage, routes + '-FR')
+
+    return routes.astype(object).where(routes.notna(), np.nan)
+
+def detect_route_column(tx_aadt):
+    """
+    Pick the AADT column whose values parse as route names most often
+
+    Candidates are AADT_ROUTE_COLUMNS plus any text column whose name
+    contains one of ROUTE_FIELD_KEYWORDS; ties keep AADT_ROUTE_COLUMNS order.
+
+    Returns:
+    --------
+    (column, share of sampled values with a route key); column is None when
+    no candidate yields any route key
+    """
+
+    named = [col for col in tx_aadt.columns
+             if col != tx_aadt.geometry.name
+             and any(key in str(col).upper() for key in ROUTE_FIELD_KEYWORDS)]
+    candidates = [col for col in AADT_ROUTE_COLUMNS if col in tx_aadt.columns]
+    candidates += [col for col in named if col not in candidates]
+
+    sample = tx_aadt.head(ROUTE_COLUMN_SAMPLE)
+    best_col, best_share = None, 0.0
+    for col in candidates:
+        share = normalize_route_names(sample[col]).notna().mean()
+        if share > best_share:
+            best_col, best_share = col, share
+    return best_col, best_share
 
 def load_texas_data():
     """Load Texas work zones and AADT data"""
@@ -49,22 +131,204 @@ def load_texas_data():
 
     return wz_gdf, tx_aadt
 
-def spatial_join_with_aadt(wz_gdf, tx_aadt, max_distance_meters=500):
+def build_station_year_index(aadt_meter, route_col=None):
+    """
+    Build a station-year index over the AADT annual records
+
+    Each traffic station appears once per reporting year in
+    txdot_aadt_annual.gpkg. The index keeps one point per station in a
+    KD-tree and a dense station x year AADT matrix, so the count for any
+    (station, year) pair is a single array lookup. When route_col is given,
+    it also keeps a route key -> KD-tree map over each route's stations
+    and each station's route key.
+
+    Parameters:
+    -----------
+    aadt_meter : GeoDataFrame
+        Traffic station records in a metric CRS
+    route_col : str or None
+        Column holding the station's route name
+
+    Returns:
+    --------
+    dict with the KD-tree, per-station attributes and the AADT matrix
+    """
+
+    records = aadt_meter[
+        aadt_meter['AADT_RPT_QTY'].notna() &
+        aadt_meter['TRFC_STATN_ID'].notna()
+    ].copy()
+    records['AADT_RPT_YEAR'] = pd.to_numeric(records['AADT_RPT_YEAR'], errors='coerce')
+    records = records[records['AADT_RPT_YEAR'].notna()]
+
+    station_codes, station_ids = pd.factorize(records['TRFC_STATN_ID'])
+    years = records['AADT_RPT_YEAR'].to_numpy().astype(int)
+    first_year = int(years.min())
+    n_years = int(years.max()) - first_year + 1
+
+    # One extra all-NaN row: KD-tree misses come back as index == n_stations
+    aadt_by_year = np.full((len(station_ids) + 1, n_years), np.nan)
+    aadt_by_year[station_codes, years - first_year] = records['AADT_RPT_QTY'].to_numpy(dtype=float)
+
+    # Station attributes come from the first record seen for each station
+    first_rows = ~pd.Series(station_codes).duplicated().to_numpy()
+    stations = records[first_rows].reset_index(drop=True)
+    coords = np.column_stack([stations.geometry.x, stations.geometry.y])
+
+    # Route key -> (KD-tree over that route's stations, station positions)
+    route_trees = {}
+    station_routes = np.full(len(stations) + 1, np.nan, dtype=object)
+    if route_col is not None:
+        routes = normalize_route_names(stations[route_col])
+        station_routes[:-1] = routes.to_numpy()
+        for route, positions in routes.groupby(routes).indices.items():
+            route_trees[route] = (cKDTree(coords[positions]), positions)
+
+    return {
+        'tree': cKDTree(coords),
+        'coords': coords,
+        'stations': stations[['TRFC_STATN_ID', 'CNTY_NM', 'DIST_NM', 'CATEGORY']],
+        'aadt_by_year': aadt_by_year,
+        'first_year': first_year,
+        'n_years': n_years,
+        'route_trees': route_trees,
+        'station_routes': station_routes,
+    }
+
+def query_route_candidates(index, points, routes, k, max_distance):
+    """
+    Find the k nearest same-route stations for every work zone
+
+    Zones are grouped by route key and each group is queried in bulk
+    against that route's KD-tree. Zones with no route key, or whose route
+    has no stations, get no candidates.
+
+    Returns:
+    --------
+    (distances, candidates) arrays of shape (n_zones, k), nearest first;
+    missing candidates are inf / n_stations
+    """
+
+    n_stations = len(index['stations'])
+    distances = np.full((len(points), k), np.inf)
+    candidates = np.full((len(points), k), n_stations)
+
+    zone_routes = pd.Series(routes)
+    for route, zone_pos in zone_routes.groupby(zone_routes).indices.items():
+        if route not in index['route_trees']:
+            continue
+
+        tree, station_pos = index['route_trees'][route]
+        route_k = min(k, len(station_pos))
+        d, c = tree.query(points[zone_pos], k=route_k, distance_upper_bound=max_distance)
+        d = d.reshape(len(zone_pos), route_k)
+        c = c.reshape(len(zone_pos), route_k)
+
+        found = np.isfinite(d)
+        distances[zone_pos, :route_k] = d
+        candidates[zone_pos, :route_k] = np.where(
+            found, station_pos[np.minimum(c, len(station_pos) - 1)], n_stations
+        )
+
+    return distances, candidates
+
+def _year_offsets(year_tolerance):
+    """Year offsets in preference order: exact, then older before newer"""
+    offsets = [0]
+    for gap in range(1, year_tolerance + 1):
+        offsets.extend([-gap, gap])
+    return offsets
+
+def match_station_years(index, candidates, distances, target_years, year_tolerance=2):
+    """
+    Pick one station-year per work zone from its nearest candidate stations
+
+    A zone takes the nearest candidate with a count in its own year; failing
+    that, the nearest candidate with a count one year away, and so on up to
+    year_tolerance. Every step is a vectorized lookup over all zones.
+
+    Parameters:
+    -----------
+    index : dict
+        Station-year index from build_station_year_index
+    candidates : ndarray (n_zones, k)
+        Candidate station positions, nearest first (n_stations = no station)
+    distances : ndarray (n_zones, k)
+        Distance to each candidate (inf = no station)
+    target_years : ndarray (n_zones,)
+        Work zone year for each zone
+    year_tolerance : int
+        Maximum allowed gap in years between work zone and AADT count
+
+    Returns:
+    --------
+    (station, distance, year) arrays; station == n_stations where unmatched
     """
-    Perform spatial join to match work zones with nearest traffic stations
+
+    n_zones = len(candidates)
+    n_stations = len(index['stations'])
+    aadt_by_year = index['aadt_by_year']
+
+    station = np.full(n_zones, n_stations)
+    distance = np.full(n_zones, np.nan)
+    year = np.full(n_zones, np.nan)
+    resolved = np.zeros(n_zones, dtype=bool)
+    rows = np.arange(n_zones)
+
+    for offset in _year_offsets(year_tolerance):
+        cols = target_years - index['first_year'] + offset
+        usable = (cols >= 0) & (cols < index['n_years']) & ~resolved
+        cols = np.clip(cols, 0, index['n_years'] - 1)
+
+        has_count = ~np.isnan(aadt_by_year[candidates, cols[:, None]]) & usable[:, None]
+        hit = has_count.any(axis=1)
+        best = has_count.argmax(axis=1)
+
+        station[hit] = candidates[rows[hit], best[hit]]
+        distance[hit] = distances[rows[hit], best[hit]]
+        year[hit] = index['first_year'] + cols[hit]
+        resolved |= hit
+
+    return station, distance, year
+
+def spatial_join_with_aadt(wz_gdf, tx_aadt, max_distance_meters=500, year_tolerance=2,
+                           k_candidates=16, route_constrained=True, route_col=None):
+    """
+    Match work zones to the nearest traffic station with a count in the work zone's year
+
+    With route_constrained, candidates are first restricted to stations on
+    the same normalized route as the work zone's road_name. A zone falls
+    back to unconstrained nearest matching only when no same-route station
+    is within range; frontage-road zones never fall back to stations on
+    their mainline (an 'IH35-FR' zone skips 'IH35' stations).
 
     Parameters:
     -----------
     wz_gdf : GeoDataFrame
         Work zones with point geometry
     tx_aadt : GeoDataFrame
-        Traffic stations with AADT data
+        Traffic station records (one row per station-year) with AADT data
     max_distance_meters : int
         Maximum distance in meters to match (default: 500m)
+    year_tolerance : int
+        Maximum gap in years between work zone and AADT count (default: 2)
+    k_candidates : int
+        Nearest stations considered per work zone (default: 16)
+    route_constrained : bool
+        Prefer stations on the work zone's own route (default: True)
+    route_col : str or None
+        AADT column holding the station's route name (default: the column
+        picked by detect_route_column)
 
     Returns:
     --------
     GeoDataFrame with AADT data joined
+
+    Raises:
+    -------
+    ValueError
+        If route_constrained and route_col is missing, or no AADT column
+        holds route names
     """
 
     print("\n" + "="*60)
@@ -73,6 +337,26 @@ def spatial_join_with_aadt(wz_gdf, tx_aadt, max_distance_meters=500):
 
     print(f"\nParameters:")
     print(f"  Max distance: {max_distance_meters}m")
+    print(f"  Year tolerance: ±{year_tolerance} years")
+
+    if route_constrained:
+        if route_col is not None and route_col not in tx_aadt.columns:
+            raise ValueError(
+                f"Route column {route_col!r} not in AADT data "
+                f"(columns: {', '.join(map(str, tx_aadt.columns))})"
+            )
+        if route_col is None:
+            route_col, share = detect_route_column(tx_aadt)
+            if route_col is None:
+                raise ValueError(
+                    f"No AADT column holds route names (columns: {', '.join(map(str, tx_aadt.columns))}). "
+                    f"Pass route_col (--route-column) or route_constrained=False (--no-route-constraint)"
+                )
+            print(f"  Route column detected: {route_col} ({share:.0%} of sampled values are routes)")
+        print(f"  Route constraint: road_name ↔ {route_col}")
+    else:
+        route_col = None
+        print(f"  Route constraint: off (nearest station only)")
 
     # Reproject to meters for accurate distance calculation
     # EPSG:3857 is Web Mercator (meters)
@@ -80,15 +364,85 @@ def spatial_join_with_aadt(wz_gdf, tx_aadt, max_distance_meters=500):
     wz_meter = wz_gdf.to_crs('EPSG:3857')
     aadt_meter = tx_aadt.to_crs('EPSG:3857')
 
-    # Spatial join nearest
-    print(f"2. Finding nearest traffic station for each work zone...")
-    wz_with_aadt = gpd.sjoin_nearest(
-        wz_meter,
-        aadt_meter[['AADT_RPT_QTY', 'CNTY_NM', 'DIST_NM', 'TRFC_STATN_ID', 'CATEGORY', 'AADT_RPT_YEAR', 'geometry']],
-        how='left',
-        max_distance=max_distance_meters,
-        distance_col='distance_to_station_m'
+    print(f"2. Building station-year index...")
+    index = build_station_year_index(aadt_meter, route_col=route_col)
+    print(f"   Stations: {len(index['stations']):,}")
+    if route_col is not None:
+        print(f"   Routes: {len(index['route_trees']):,}")
+    print(f"   Years: {index['first_year']}-{index['first_year'] + index['n_years'] - 1}")
+
+    # Work zone year; zones without a start date use the latest count year
+    latest_year = index['first_year'] + index['n_years'] - 1
+    wz_year = pd.to_datetime(wz_meter['start_date_parsed'], errors='coerce').dt.year
+    target_years = wz_year.fillna(latest_year).to_numpy().astype(int)
+
+    points = np.column_stack([wz_meter.geometry.x, wz_meter.geometry.y])
+    n_stations = len(index['stations'])
+    k = min(k_candidates, n_stations)
+    station = np.full(len(points), n_stations)
+    distance = np.full(len(points), np.nan)
+    year = np.full(len(points), np.nan)
+    match_type = np.full(len(points), None, dtype=object)
+
+    if route_col is not None:
+        print(f"3. Matching work zones to stations on the same route...")
+        routes = normalize_route_names(wz_meter['road_name']).to_numpy()
+        route_distances, route_candidates = query_route_candidates(
+            index, points, routes, k, max_distance_meters
+        )
+        station, distance, year = match_station_years(
+            index, route_candidates, route_distances, target_years, year_tolerance=year_tolerance
+        )
+        match_type[station < n_stations] = 'same_route'
+        print(f"   Zones with a route key: {pd.notna(routes).sum():,}")
+        print(f"   Matched on same route: {(station < n_stations).sum():,}")
+
+    # Unconstrained nearest only for zones still unmatched
+    fallback = np.flatnonzero(station == n_stations)
+    print(f"4. Finding nearest traffic station for {len(fallback):,} remaining work zones...")
+    if len(fallback) > 0:
+        distances, candidates = index['tree'].query(
+            points[fallback], k=k, distance_upper_bound=max_distance_meters
+        )
+        distances = distances.reshape(len(fallback), k)
+        candidates = candidates.reshape(len(fallback), k)
+
+        # Frontage zones only reach this step without a frontage station in range;
+        # their mainline's stations count different traffic, so skip them too
+        if route_col is not None:
+            zone_routes = pd.Series(routes[fallback], dtype=object)
+            is_frontage = zone_routes.str.endswith('-FR', na=False)
+            mainline = zone_routes.str.removesuffix('-FR').where(is_frontage)
+            on_mainline = index['station_routes'][candidates] == mainline.to_numpy()[:, None]
+            candidates = np.where(on_mainline, n_stations, candidates)
+            distances = np.where(on_mainline, np.inf, distances)
+            print(f"   Frontage zones kept off their mainline: {(is_frontage & on_mainline.any(axis=1)).sum():,}")
+
+        fb_station, fb_distance, fb_year = match_station_years(
+            index, candidates, distances, target_years[fallback], year_tolerance=year_tolerance
+        )
+        station[fallback] = fb_station
+        distance[fallback] = fb_distance
+        year[fallback] = fb_year
+        match_type[fallback[fb_station < n_stations]] = 'nearest'
+
+    # Attach station attributes (sentinel row = unmatched)
+    stations = pd.concat(
+        [index['stations'], pd.DataFrame(index=[len(index['stations'])], columns=index['stations'].columns)]
     )
+    matched_attrs = stations.iloc[station].reset_index(drop=True)
+    matched_attrs.index = wz_meter.index
+
+    wz_with_aadt = wz_meter.copy()
+    for col in matched_attrs.columns:
+        wz_with_aadt[col] = matched_attrs[col]
+    year_cols = np.clip(year - index['first_year'], 0, index['n_years'] - 1)
+    year_cols = np.nan_to_num(year_cols).astype(int)
+    wz_with_aadt['AADT_RPT_QTY'] = index['aadt_by_year'][station, year_cols]
+    wz_with_aadt['AADT_RPT_YEAR'] = year
+    wz_with_aadt['aadt_year_gap'] = year - target_years
+    wz_with_aadt['distance_to_station_m'] = distance
+    wz_with_aadt['aadt_match_type'] = match_type
 
     # Convert back to WGS84
     wz_with_aadt = wz_with_aadt.to_crs('EPSG:4326')
@@ -111,6 +465,12 @@ def spatial_join_with_aadt(wz_gdf, tx_aadt, max_distance_meters=500):
         print(f"  Median distance: {distances.median():.0f}m")
         print(f"  Max distance: {distances.max():.0f}m")
 
+        print(f"\nMatch type:")
+        print(wz_with_aadt['aadt_match_type'].value_counts().to_string())
+
+        print(f"\nYear gap (AADT year - work zone year, for matched records):")
+        print(wz_with_aadt['aadt_year_gap'].dropna().astype(int).value_counts().sort_index().to_string())
+
         print(f"\nAADT statistics (for matched records):")
         aadt = wz_with_aadt[wz_with_aadt['AADT_RPT_QTY'].notna()]['AADT_RPT_QTY']
         print(f"  Mean AADT: {aadt.mean():,.0f} vehicles/day")
@@ -170,6 +530,98 @@ def handle_missing_aadt(wz_with_aadt):
 
     return wz_with_aadt
 
+def parse_wzdx_geometries(values):
+    """
+    Parse WZDx geometry text (WKT or GeoJSON, incl. Python dict reprs) to shapely
+
+    Unparseable or missing values come back as None.
+    """
+
+    text = pd.Series(values, dtype='object').astype('string').str.strip()
+    is_json = text.str.startswith('{').fillna(False).to_numpy(dtype=bool)
+
+    geoms = np.full(len(text), None, dtype=object)
+    wkt = text[~is_json].to_numpy(dtype=object, na_value=None)
+    geoms[~is_json] = shapely.from_wkt(wkt, on_invalid='ignore')
+    geojson = text[is_json].str.replace("'", '"').to_numpy(dtype=object, na_value=None)
+    if len(geojson) > 0:
+        geoms[is_json] = shapely.from_geojson(geojson, on_invalid='ignore')
+
+    return geoms
+
+def geodesic_length_miles(geoms):
+    """
+    Great-circle length in miles of every geometry, in one array pass
+
+    All vertices are flattened into a single coordinate array; haversine
+    distances between consecutive vertices of the same part are summed per
+    geometry with np.bincount. MultiPoints are measured as the path through
+    their points in order.
+    """
+
+    geoms = np.asarray(geoms, dtype=object)
+    lengths = np.zeros(len(geoms))
+    if len(geoms) == 0:
+        return lengths
+
+    # Split multi-part geometries so vertices of different lines are never joined
+    parts, part_geom = shapely.get_parts(geoms, return_index=True)
+    coords, vertex_part = shapely.get_coordinates(parts, return_index=True)
+    if len(coords) < 2:
+        return lengths
+    vertex_geom = part_geom[vertex_part]
+
+    # MultiPoint members are one part each; their path runs through all of them
+    is_multipoint = shapely.get_type_id(geoms) == 4
+    vertex_path = np.where(is_multipoint[vertex_geom], -1 - vertex_geom, vertex_part)
+
+    lon = np.radians(coords[:, 0])
+    lat = np.radians(coords[:, 1])
+    dlat = lat[1:] - lat[:-1]
+    dlon = lon[1:] - lon[:-1]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+    step = 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+    same_path = vertex_path[1:] == vertex_path[:-1]
+    return np.bincount(
+        vertex_geom[1:][same_path],
+        weights=step[same_path],
+        minlength=len(geoms)
+    )
+
+def estimate_segment_miles(wz_df):
+    """
+    Work zone segment length from its WZDx geometry, then its mileposts
+
+    Returns:
+    --------
+    (segment_miles, source) Series; zones with neither geometry nor usable
+    mileposts get DEFAULT_SEGMENT_MILES with source 'default'
+    """
+
+    segment_miles = pd.Series(np.nan, index=wz_df.index)
+    source = pd.Series('default', index=wz_df.index, dtype=object)
+
+    geom_col = next((col for col in WZ_GEOMETRY_COLUMNS if col in wz_df.columns), None)
+    if geom_col is not None:
+        geom_miles = pd.Series(
+            geodesic_length_miles(parse_wzdx_geometries(wz_df[geom_col])), index=wz_df.index
+        )
+        has_geom = geom_miles > 0
+        segment_miles[has_geom] = geom_miles[has_geom]
+        source[has_geom] = 'geometry'
+
+    if 'beginning_milepost' in wz_df.columns and 'ending_milepost' in wz_df.columns:
+        milepost_miles = (
+            pd.to_numeric(wz_df['ending_milepost'], errors='coerce') -
+            pd.to_numeric(wz_df['beginning_milepost'], errors='coerce')
+        ).abs()
+        use_milepost = segment_miles.isna() & (milepost_miles > 0)
+        segment_miles[use_milepost] = milepost_miles[use_milepost]
+        source[use_milepost] = 'milepost'
+
+    return segment_miles.fillna(DEFAULT_SEGMENT_MILES), source
+
 def calculate_crash_rate_features(wz_with_aadt):
     """
     Calculate crash rate and exposure-based features
@@ -186,9 +638,10 @@ def calculate_crash_rate_features(wz_with_aadt):
 
     # Vehicle-Miles of Travel (VMT) estimation
     # VMT = AADT × duration_days × segment_length_miles
-    # For now, assume 0.5 mile average segment length (adjust based on your data)
-
-    wz_with_aadt['estimated_segment_miles'] = 0.5  # REPLACE with actual segment length
+    # Segment length from WZDx geometry, then mileposts, then a 0.5 mile default
+    segment_miles, segment_source = estimate_segment_miles(wz_with_aadt)
+    wz_with_aadt['estimated_segment_miles'] = segment_miles
+    wz_with_aadt['segment_length_source'] = segment_source
 
     wz_with_aadt['vehicle_miles_traveled'] = (
         wz_with_aadt['aadt_filled'] *
@@ -204,6 +657,11 @@ def calculate_crash_rate_features(wz_with_aadt):
         np.nan
     )
 
+    print("\nSegment length (miles):")
+    print(f"  Mean: {segment_miles.mean():.2f}")
+    print(f"  Median: {segment_miles.median():.2f}")
+    print(wz_with_aadt['segment_length_source'].value_counts().to_string())
+
     print("\nVehicle-Miles Traveled (VMT):")
     print(f"  Mean VMT: {wz_with_aadt['vehicle_miles_traveled'].mean():,.0f}")
     print(f"  Median VMT: {wz_with_aadt['vehicle_miles_traveled'].median():,.0f}")
@@ -271,8 +729,9 @@ def save_enriched_data(wz_with_aadt):
         'latitude', 'longitude',
         'total_num_lanes', 'vehicle_impact',
         'AADT_RPT_QTY', 'aadt_filled', 'aadt_source',
-        'distance_to_station_m',
-        'CNTY_NM', 'DIST_NM', 'TRFC_STATN_ID', 'CATEGORY', 'AADT_RPT_YEAR',
+        'distance_to_station_m', 'aadt_match_type',
+        'CNTY_NM', 'DIST_NM', 'TRFC_STATN_ID', 'CATEGORY', 'AADT_RPT_YEAR', 'aadt_year_gap',
+        'estimated_segment_miles', 'segment_length_source',
         'vehicle_miles_traveled', 'crash_rate_per_mvmt',
         'traffic_volume_category', 'exposure_score', 'lane_closure_risk'
     ]
@@ -348,6 +807,14 @@ def print_next_steps():
 def main():
     """Main execution"""
 
+    parser = argparse.ArgumentParser(description='Integrate Texas AADT traffic data with work zones')
+    parser.add_argument('--route-column', type=str,
+                        help='AADT route-name column (default: the route-like field whose values '
+                             'parse as route names most often)')
+    parser.add_argument('--no-route-constraint', action='store_true',
+                        help='Match each work zone to the nearest station regardless of route')
+    args = parser.parse_args()
+
     print("\n" + "="*60)
     print("TEXAS WORK ZONES + AADT INTEGRATION")
     print("="*60)
@@ -356,7 +823,9 @@ def main():
     wz_gdf, tx_aadt = load_texas_data()
 
     # Spatial join
-    wz_with_aadt = spatial_join_with_aadt(wz_gdf, tx_aadt, max_distance_meters=500)
+    wz_with_aadt = spatial_join_with_aadt(wz_gdf, tx_aadt, max_distance_meters=500, year_tolerance=2,
+                                          route_constrained=not args.no_route_constraint,
+                                          route_col=args.route_column)
 
     # Handle missing values
     wz_with_aadt = handle_missing_aadt(wz_with_aadt)
@@ -0,0 +1,160 @@
+"""
+Crash Profile
+Single-pass marginal and severity-conditional counts for crash records
+
+Every profiled column is factorized once. Its codes are combined with a
+three-level severity stratum (no injury, injury, fatal) into one key per
+(column, value, stratum), and a single bincount over all columns produces
+every table at once: the overall value counts and the counts within injury
+and fatal crashes. The profile is small, so it is cached as JSON keyed on
+the input file's content hash and reloaded without reading the CSV.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# Categorical columns profiled by NYCrashAnalyzer
+PROFILE_COLUMNS = [
+    'year', 'day_of_week', 'time_category', 'accident_descriptor',
+    'number_of_vehicles_involved', 'weather_conditions', 'lighting_conditions',
+    'road_surface_conditions', 'road_descriptor', 'collision_type_descriptor',
+    'event_descriptor', 'traffic_control_device', 'county_name', 'municipality',
+]
+
+# Count columns of each table; injury includes fatal crashes
+SEVERITY_COUNTS = ['total', 'injury', 'fatal']
+
+
+def _python_value(value):
+    """Plain Python scalar for JSON (numpy ints/floats become int/float)"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class CrashProfile:
+    """Value counts of every profiled column, overall and by severity"""
+
+    def __init__(self, summary: Dict, tables: Dict[str, pd.DataFrame]):
+        """
+        Initialize from built or loaded parts (use build or load)
+
+        Args:
+            summary: n_rows, injury_count, fatal_count, date_min, date_max and
+                completeness (column -> non-null count, in file order)
+            tables: Column -> DataFrame indexed by value with SEVERITY_COUNTS columns
+        """
+        self.summary = summary
+        self.tables = tables
+
+    @property
+    def n_rows(self) -> int:
+        return self.summary['n_rows']
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, columns: Optional[List[str]] = None,
+              chunk_rows: int = 1_000_000) -> 'CrashProfile':
+        """
+        Profile a prepared crash frame (needs is_injury, is_fatal and date_parsed)
+
+        Args:
+            df: Crash records
+            columns: Columns to profile (default: PROFILE_COLUMNS present in df)
+            chunk_rows: Rows per bincount chunk (bounds the key matrix's memory)
+        """
+        columns = [col for col in (columns or PROFILE_COLUMNS) if col in df.columns]
+
+        # Factorize once; -1 marks missing values
+        codes, uniques = [], []
+        for col in columns:
+            col_codes, col_uniques = pd.factorize(df[col])
+            codes.append(col_codes)
+            uniques.append(col_uniques)
+        offsets = np.concatenate([[0], np.cumsum([len(u) for u in uniques])])
+        n_bins = int(offsets[-1]) * 3
+
+        stratum = df['is_injury'].to_numpy(dtype=bool).astype(np.int64) + df['is_fatal'].to_numpy(dtype=bool)
+
+        # One grouped count over every (column, value, stratum) key
+        counts = np.zeros(n_bins + 1, dtype=np.int64)
+        for lo in range(0, len(df), chunk_rows):
+            hi = min(lo + chunk_rows, len(df))
+            keys = np.empty((hi - lo, len(columns)), dtype=np.int64)
+            for j, col_codes in enumerate(codes):
+                keys[:, j] = np.where(col_codes[lo:hi] >= 0,
+                                      (offsets[j] + col_codes[lo:hi]) * 3 + stratum[lo:hi],
+                                      n_bins)
+            counts += np.bincount(keys.ravel(), minlength=n_bins + 1)
+        counts = counts[:n_bins].reshape(-1, 3)
+
+        tables = {}
+        for j, col in enumerate(columns):
+            by_stratum = counts[offsets[j]:offsets[j + 1]]
+            table = pd.DataFrame({
+                'total': by_stratum.sum(axis=1),
+                'injury': by_stratum[:, 1:].sum(axis=1),
+                'fatal': by_stratum[:, 2],
+            }, index=pd.Index(uniques[j], name=col))
+            tables[col] = table.sort_values('total', ascending=False, kind='stable')
+
+        dates = df['date_parsed']
+        summary = {
+            'n_rows': int(len(df)),
+            'injury_count': int(df['is_injury'].sum()),
+            'fatal_count': int(df['is_fatal'].sum()),
+            'date_min': str(dates.min()),
+            'date_max': str(dates.max()),
+            'completeness': {col: int(count) for col, count in df.notna().sum().items()},
+        }
+        return cls(summary, tables)
+
+    def counts(self, column: str, severity: str = 'total') -> pd.Series:
+        """
+        value_counts-style Series of a column, overall or within injury/fatal crashes
+
+        Args:
+            column: Profiled column
+            severity: 'total', 'injury' or 'fatal'
+
+        Returns:
+            pd.Series: Non-zero counts, largest first
+        """
+        counts = self.tables[column][severity]
+        return counts[counts > 0].sort_values(ascending=False, kind='stable').rename('count')
+
+    def nunique(self, column: str) -> int:
+        """Number of distinct non-null values of a column"""
+        return int(len(self.tables[column]))
+
+    def save(self, path: str):
+        """Write the profile as JSON (atomically)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            'summary': self.summary,
+            'tables': {
+                col: [[_python_value(value)] + [int(c) for c in row]
+                      for value, row in zip(table.index, table[SEVERITY_COUNTS].to_numpy())]
+                for col, table in self.tables.items()
+            },
+        }
+        tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'CrashProfile':
+        """Read a profile written by save"""
+        with open(path, 'r') as f:
+            payload = json.load(f)
+        tables = {}
+        for col, rows in payload['tables'].items():
+            index = pd.Index([row[0] for row in rows], name=col)
+            tables[col] = pd.DataFrame([row[1:] for row in rows], index=index,
+                                       columns=SEVERITY_COUNTS, dtype=np.int64)
+        return cls(payload['summary'], tables)
@@ -11,6 +11,23 @@ from typing import Dict, List, Any
 import requests
 
 
+# Columns of the work zone and device tables, in output order
+WORK_ZONE_COLUMNS = [
+    'id', 'event_type', 'road_names', 'direction', 'description', 'start_date', 'end_date',
+    'vehicle_impact', 'work_zone_type', 'reduced_speed_limit_kph', 'beginning_milepost',
+    'ending_milepost', 'num_lanes', 'lanes_closed', 'has_workers', 'geometry_type', 'num_coordinates',
+]
+DEVICE_COLUMNS = [
+    'id', 'device_type', 'device_status', 'road_names', 'road_direction', 'name', 'is_moving',
+    'has_automatic_location', 'update_date', 'geometry_type', 'coordinates',
+]
+# Device-specific properties only arrow boards carry
+ARROW_BOARD_COLUMNS = ['pattern', 'is_in_transport_position']
+# Work zone columns analyze_safety_metrics reads
+SAFETY_METRIC_COLUMNS = ['has_workers', 'lanes_closed', 'reduced_speed_limit_kph',
+                         'vehicle_impact', 'work_zone_type', 'direction']
+
+
 class WZDxAnalyzer:
     """Analyzes WZDx GeoJSON feeds for work zone safety insights"""
 
@@ -19,6 +36,16 @@ class WZDxAnalyzer:
         self.work_zones = []
         self.devices = []
 
+    @property
+    def feed_data(self) -> Dict:
+        """Parsed feed; assigning a new one clears the classify_features cache"""
+        return self._feed_data
+
+    @feed_data.setter
+    def feed_data(self, value: Dict):
+        self._feed_data = value
+        self._classified = None
+
     def load_feed(self, file_path: str) -> Dict:
         """Load a WZDx feed from a GeoJSON file"""
         with open(file_path, 'r') as f:
@@ -47,107 +74,190 @@ class WZDxAnalyzer:
             'num_data_sources': len(feed_info.get('data_sources', []))
         }
 
+    def classify_features(self) -> Dict[str, Any]:
+        """
+        Classify every feed feature in a single pass
+
+        Each feature is routed to the work-zone rows (event_type
+        'work-zone') and/or the device rows (core_details has a
+        device_type), while bounds coordinates and feature counters are
+        accumulated in the same traversal. Rows are transposed into columns
+        once at the end. The result is cached until feed_data is replaced.
+
+        Returns:
+            Dict: 'work_zones' and 'devices' (column -> list of values),
+            'arrow_boards' (per device, whether arrow-board columns apply),
+            'bounds' (see get_geographic_bounds) and 'counts'
+        """
+        if self._classified is not None:
+            return self._classified
+
+        work_zone_rows, device_rows = [], []
+        lons, lats = [], []
+        n_features = n_other = 0
+        nan = float('nan')
+
+        features = self.feed_data.get('features', []) if self.feed_data else []
+        for feature in features:
+            props = feature.get('properties') or {}
+            core = props.get('core_details') or {}
+            geom = feature.get('geometry') or {}
+            geom_type = geom.get('type')
+            coords = geom.get('coordinates', [])
+            n_features += 1
+            routed = False
+
+            # Work-zone events
+            if core.get('event_type') == 'work-zone':
+                lanes = props.get('lanes', [])
+                work_zone_rows.append((
+                    feature.get('id'),
+                    core.get('event_type'),
+                    ', '.join(core.get('road_names', [])),
+                    core.get('direction'),
+                    core.get('description', ''),
+                    props.get('start_date'),
+                    props.get('end_date'),
+                    props.get('vehicle_impact'),
+                    props.get('work_zone_type', 'static'),
+                    props.get('reduced_speed_limit_kph'),
+                    props.get('beginning_milepost'),
+                    props.get('ending_milepost'),
+                    len(lanes),
+                    [lane.get('status') for lane in lanes].count('closed'),
+                    (props.get('worker_presence') or {}).get('are_workers_present', False),
+                    geom_type,
+                    len(coords),
+                ))
+                routed = True
+
+            # Field devices (have a device_type); arrow-board columns are NaN for other devices
+            if 'device_type' in core:
+                is_arrow_board = core.get('device_type') == 'arrow-board'
+                device_rows.append((
+                    feature.get('id'),
+                    core.get('device_type'),
+                    core.get('device_status'),
+                    ', '.join(core.get('road_names', [])),
+                    core.get('road_direction'),
+                    core.get('name', ''),
+                    core.get('is_moving', False),
+                    core.get('has_automatic_location', False),
+                    core.get('update_date'),
+                    geom_type,
+                    coords,
+                    props.get('pattern') if is_arrow_board else nan,
+                    props.get('is_in_transport_position') if is_arrow_board else nan,
+                    is_arrow_board,
+                ))
+                routed = True
+
+            if not routed:
+                n_other += 1
+
+            # Bounds over LineString vertices and Points
+            if geom_type == 'LineString':
+                lons.extend([coord[0] for coord in coords])
+                lats.extend([coord[1] for coord in coords])
+            elif geom_type == 'Point':
+                lons.append(coords[0])
+                lats.append(coords[1])
+
+        work_zones = self._columns(WORK_ZONE_COLUMNS, work_zone_rows)
+        devices = self._columns(DEVICE_COLUMNS + ARROW_BOARD_COLUMNS + ['is_arrow_board'], device_rows)
+        arrow_boards = devices.pop('is_arrow_board')
+
+        # Arrow-board columns only exist when the feed has arrow boards
+        if not any(arrow_boards):
+            for col in ARROW_BOARD_COLUMNS:
+                del devices[col]
+
+        bounds = {}
+        if lons:
+            bounds = {
+                'min_lat': min(lats),
+                'max_lat': max(lats),
+                'min_lon': min(lons),
+                'max_lon': max(lons),
+                'center_lat': sum(lats) / len(lats),
+                'center_lon': sum(lons) / len(lons)
+            }
+
+        self._classified = {
+            'work_zones': work_zones,
+            'devices': devices,
+            'arrow_boards': arrow_boards,
+            'bounds': bounds,
+            'counts': {'features': n_features, 'work_zones': len(work_zone_rows),
+                       'devices': len(device_rows), 'other': n_other},
+        }
+        return self._classified
+
+    @staticmethod
+    def _columns(names: List[str], rows: List[tuple]) -> Dict[str, list]:
+        """Transpose row tuples into named column lists"""
+        if not rows:
+            return {name: [] for name in names}
+        return {name: list(values) for name, values in zip(names, zip(*rows))}
+
     def extract_work_zones(self) -> List[Dict]:
         """Extract work zone information from feed"""
         if not self.feed_data:
             return []
 
-        work_zones = []
-        features = self.feed_data.get('features', [])
-
-        for feature in features:
-            props = feature.get('properties', {})
-            core = props.get('core_details', {})
-
-            # Only process work-zone events (not devices)
-            if core.get('event_type') == 'work-zone':
-                wz = {
-                    'id': feature.get('id'),
-                    'event_type': core.get('event_type'),
-                    'road_names': ', '.join(core.get('road_names', [])),
-                    'direction': core.get('direction'),
-                    'description': core.get('description', ''),
-                    'start_date': props.get('start_date'),
-                    'end_date': props.get('end_date'),
-                    'vehicle_impact': props.get('vehicle_impact'),
-                    'work_zone_type': props.get('work_zone_type', 'static'),
-                    'reduced_speed_limit_kph': props.get('reduced_speed_limit_kph'),
-                    'beginning_milepost': props.get('beginning_milepost'),
-                    'ending_milepost': props.get('ending_milepost'),
-                    'num_lanes': len(props.get('lanes', [])),
-                    'lanes_closed': sum(1 for lane in props.get('lanes', []) if lane.get('status') == 'closed'),
-                    'has_workers': props.get('worker_presence', {}).get('are_workers_present', False),
-                    'geometry_type': feature.get('geometry', {}).get('type'),
-                    'num_coordinates': len(feature.get('geometry', {}).get('coordinates', []))
-                }
-                work_zones.append(wz)
-
-        self.work_zones = work_zones
-        return work_zones
+        columns = self.classify_features()['work_zones']
+        self.work_zones = [dict(zip(columns, row)) for row in zip(*columns.values())]
+        return self.work_zones
 
     def extract_devices(self) -> List[Dict]:
         """Extract field device information from feed"""
         if not self.feed_data:
             return []
 
-        devices = []
-        features = self.feed_data.get('features', [])
+        classified = self.classify_features()
+        columns = classified['devices']
+        base = [col for col in columns if col not in ARROW_BOARD_COLUMNS]
 
-        for feature in features:
-            props = feature.get('properties', {})
-            core = props.get('core_details', {})
-
-            # Check if this is a device (has device_type)
-            if 'device_type' in core:
-                device = {
-                    'id': feature.get('id'),
-                    'device_type': core.get('device_type'),
-                    'device_status': core.get('device_status'),
-                    'road_names': ', '.join(core.get('road_names', [])),
-                    'road_direction': core.get('road_direction'),
-                    'name': core.get('name', ''),
-                    'is_moving': core.get('is_moving', False),
-                    'has_automatic_location': core.get('has_automatic_location', False),
-                    'update_date': core.get('update_date'),
-                    'geometry_type': feature.get('geometry', {}).get('type'),
-                    'coordinates': feature.get('geometry', {}).get('coordinates', [])
-                }
-
-                # Add device-specific properties
-                if core.get('device_type') == 'arrow-board':
-                    device['pattern'] = props.get('pattern')
-                    device['is_in_transport_position'] = props.get('is_in_transport_position')
-
-                devices.append(device)
+        devices = []
+        for i, is_arrow_board in enumerate(classified['arrow_boards']):
+            # Device-specific properties only on arrow boards
+            keys = list(columns) if is_arrow_board else base
+            devices.append({col: columns[col][i] for col in keys})
 
         self.devices = devices
         return devices
 
     def to_dataframe(self, data_type: str = 'work_zones') -> pd.DataFrame:
-        """Convert extracted data to pandas DataFrame"""
-        if data_type == 'work_zones' and self.work_zones:
-            return pd.DataFrame(self.work_zones)
-        elif data_type == 'devices' and self.devices:
-            return pd.DataFrame(self.devices)
-        else:
+        """Convert extracted data to pandas DataFrame (built from the classified columns)"""
+        if data_type not in ('work_zones', 'devices') or not self.feed_data:
+            return pd.DataFrame()
+
+        columns = self.classify_features()[data_type]
+        if not next(iter(columns.values()), []):
             return pd.DataFrame()
+        return pd.DataFrame(columns)
 
     def analyze_safety_metrics(self) -> Dict:
         """Analyze key safety metrics from work zones"""
-        if not self.work_zones:
+        if not self.feed_data:
+            return {}
+
+        columns = self.classify_features()['work_zones']
+        if not columns['id']:
             return {}
 
-        df = self.to_dataframe('work_zones')
+        # Only the columns the metrics read
+        df = pd.DataFrame({col: columns[col] for col in SAFETY_METRIC_COLUMNS})
 
         metrics = {
             'total_work_zones': len(df),
-            'work_zones_with_workers': df['has_workers'].sum() if 'has_workers' in df else 0,
-            'work_zones_with_closures': (df['lanes_closed'] > 0).sum() if 'lanes_closed' in df else 0,
-            'avg_lanes_closed': df['lanes_closed'].mean() if 'lanes_closed' in df else 0,
-            'work_zones_with_speed_reduction': df['reduced_speed_limit_kph'].notna().sum() if 'reduced_speed_limit_kph' in df else 0,
-            'vehicle_impact_types': df['vehicle_impact'].value_counts().to_dict() if 'vehicle_impact' in df else {},
-            'work_zone_types': df['work_zone_type'].value_counts().to_dict() if 'work_zone_type' in df else {},
-            'directions': df['direction'].value_counts().to_dict() if 'direction' in df else {}
+            'work_zones_with_workers': df['has_workers'].sum(),
+            'work_zones_with_closures': (df['lanes_closed'] > 0).sum(),
+            'avg_lanes_closed': df['lanes_closed'].mean(),
+            'work_zones_with_speed_reduction': df['reduced_speed_limit_kph'].notna().sum(),
+            'vehicle_impact_types': df['vehicle_impact'].value_counts().to_dict(),
+            'work_zone_types': df['work_zone_type'].value_counts().to_dict(),
+            'directions': df['direction'].value_counts().to_dict()
         }
 
         return metrics
@@ -157,38 +267,16 @@ class WZDxAnalyzer:
         if not self.feed_data:
             return {}
 
-        lats, lons = [], []
-        for feature in self.feed_data.get('features', []):
-            geom = feature.get('geometry', {})
-            coords = geom.get('coordinates', [])
-
-            if geom.get('type') == 'LineString':
-                for coord in coords:
-                    lons.append(coord[0])
-                    lats.append(coord[1])
-            elif geom.get('type') == 'Point':
-                lons.append(coords[0])
-                lats.append(coords[1])
-
-        if lats and lons:
-            return {
-                'min_lat': min(lats),
-                'max_lat': max(lats),
-                'min_lon': min(lons),
-                'max_lon': max(lons),
-                'center_lat': sum(lats) / len(lats),
-                'center_lon': sum(lons) / len(lons)
-            }
-        return {}
+        return dict(self.classify_features()['bounds'])
 
     def summarize(self) -> str:
         """Generate a text summary of the feed"""
         if not self.feed_data:
             return "No feed data loaded."
 
+        # One pass over the features feeds the counts, metrics and bounds
         feed_info = self.get_feed_info()
-        work_zones = self.extract_work_zones()
-        devices = self.extract_devices()
+        counts = self.classify_features()['counts']
         metrics = self.analyze_safety_metrics()
         bounds = self.get_geographic_bounds()
 
@@ -203,8 +291,8 @@ class WZDxAnalyzer:
         summary.append(f"  Update Frequency: {feed_info.get('update_frequency')} seconds")
 
         summary.append(f"\nContent:")
-        summary.append(f"  Work Zones: {len(work_zones)}")
-        summary.append(f"  Field Devices: {len(devices)}")
+        summary.append(f"  Work Zones: {counts['work_zones']}")
+        summary.append(f"  Field Devices: {counts['devices']}")
 
         if metrics:
             summary.append(f"\nSafety Metrics:")
@@ -0,0 +1,170 @@
+"""
+Pipeline Stage Checkpoints
+Content-hashed Parquet artifacts for multi-stage dataset builds
+
+Each stage's artifact is keyed on a hash of its upstream stage's key, its
+parameters and the source code of the functions that implement it. A
+change anywhere in a stage therefore changes its key and every key after
+it, and a rerun resumes from the last stage whose artifact still exists.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import pandas as pd
+import geopandas as gpd
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.data.memory import peak_rss_mb, frame_memory_mb
+
+
+def code_version(*objects) -> str:
+    """Hash of the source code of the given functions, classes or modules"""
+    digest = hashlib.sha256()
+    for obj in objects:
+        digest.update(inspect.getsource(obj).encode())
+    return digest.hexdigest()[:16]
+
+
+def file_fingerprint(path: str) -> Dict:
+    """Identity of an input file (path, size, modification time)"""
+    path = Path(path)
+    if not path.exists():
+        return {'path': str(path), 'missing': True}
+    stat = path.stat()
+    return {'path': str(path.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def file_digest(path: str, chunk_size: int = 1 << 24) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StageCheckpoints:
+    """Stores and looks up stage artifacts by content hash"""
+
+    def __init__(self, cache_dir: str = 'data/cache/stages'):
+        """
+        Initialize checkpoint store
+
+        Args:
+            cache_dir: Directory holding stage artifacts
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def stage_key(stage: str, upstream_key: Optional[str], params: Dict, code: str) -> str:
+        """Hash of a stage's upstream key, parameters and code version"""
+        payload = json.dumps(
+            {'stage': stage, 'upstream': upstream_key, 'params': params, 'code': code},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def _meta_path(self, stage: str, key: str) -> Path:
+        return self.cache_dir / f'{stage}_{key}.json'
+
+    def _part_path(self, stage: str, key: str, part: int) -> Path:
+        return self.cache_dir / f'{stage}_{key}_{part}.parquet'
+
+    def exists(self, stage: str, key: str) -> bool:
+        """Whether a complete artifact is stored for this stage and key"""
+        return self._meta_path(stage, key).exists()
+
+    def save(self, stage: str, key: str, result: Any):
+        """
+        Store a stage result (a DataFrame or a tuple of DataFrames)
+
+        GeoDataFrames are written as GeoParquet. The JSON metadata file is
+        written last, so an interrupted save is never mistaken for a hit.
+        """
+        parts = result if isinstance(result, tuple) else (result,)
+        kinds = []
+        for i, part in enumerate(parts):
+            kinds.append('geo' if isinstance(part, gpd.GeoDataFrame) else 'frame')
+            part.to_parquet(self._part_path(stage, key, i))
+
+        meta_path = self._meta_path(stage, key)
+        tmp_path = meta_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'stage': stage, 'key': key, 'tuple': isinstance(result, tuple),
+                       'kinds': kinds}, f, indent=2)
+        os.replace(tmp_path, meta_path)
+
+    def load(self, stage: str, key: str) -> Any:
+        """Load a stored stage result"""
+        with open(self._meta_path(stage, key), 'r') as f:
+            meta = json.load(f)
+
+        parts = tuple(
+            gpd.read_parquet(self._part_path(stage, key, i)) if kind == 'geo'
+            else pd.read_parquet(self._part_path(stage, key, i))
+            for i, kind in enumerate(meta['kinds'])
+        )
+        return parts if meta['tuple'] else parts[0]
+
+
+def run_stages(stages: List[Dict], checkpoints: StageCheckpoints, from_stage: Optional[str] = None,
+               report_memory: bool = True) -> Any:
+    """
+    Run pipeline stages, resuming from the last valid checkpoint
+
+    Args:
+        stages: Ordered list of dicts with 'name', 'fn' (previous result ->
+            result; the first stage receives None), 'params' and 'code'
+        checkpoints: Artifact store
+        from_stage: Force recomputation from this stage onward
+        report_memory: Print each stage's result size and the process's
+            peak RSS before and after it, plus a per-stage table at the end
+
+    Returns:
+        Result of the last stage
+    """
+    names = [stage['name'] for stage in stages]
+    if from_stage is not None and from_stage not in names:
+        raise ValueError(f'Unknown stage: {from_stage} (stages: {", ".join(names)})')
+
+    # Keys depend only on upstream keys, so all of them are known before running
+    keys = []
+    upstream_key = None
+    for stage in stages:
+        upstream_key = checkpoints.stage_key(stage['name'], upstream_key, stage['params'], stage['code'])
+        keys.append(upstream_key)
+
+    # Resume after the last stored stage before the forced one
+    first_forced = names.index(from_stage) if from_stage is not None else len(stages)
+    start = 0
+    result = None
+    for i in reversed(range(first_forced)):
+        if checkpoints.exists(names[i], keys[i]):
+            print(f'\n✓ Resuming from checkpoint: {names[i]} ({keys[i]})')
+            result = checkpoints.load(names[i], keys[i])
+            start = i + 1
+            break
+
+    if start == len(stages):
+        print('  All stages up to date')
+
+    memory = []
+    for i in range(start, len(stages)):
+        peak_before = peak_rss_mb()
+        result = stages[i]['fn'](result)
+        checkpoints.save(names[i], keys[i], result)
+        if report_memory:
+            memory.append((names[i], frame_memory_mb(result), peak_before, peak_rss_mb()))
+            print(f'  Memory: result {memory[-1][1]:,.1f} MB, '
+                  f'peak RSS {peak_before:,.0f} → {memory[-1][3]:,.0f} MB')
+
+    if memory:
+        print(f'\n{"stage":12s} {"result MB":>10s} {"peak before":>12s} {"peak after":>11s}')
+        for name, result_mb, before, after in memory:
+            print(f'{name:12s} {result_mb:10,.1f} {before:12,.0f} {after:11,.0f}')
+
+    return result
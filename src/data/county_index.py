@@ -0,0 +1,343 @@
+"""
+County Boundary Index
+Offline point-in-county lookup built once from a local TIGER county file
+
+The index covers one state. A regular lon/lat grid stores, per cell, the
+county that fully contains it (or whether the cell straddles a boundary or
+lies outside the state). Most points resolve with one array lookup; only
+points in boundary cells are tested against the simplified county polygons
+through a shapely STRtree. The grid is saved as .npy, so it can be loaded
+memory-mapped, next to the simplified polygons (GeoParquet) and a JSON
+sidecar. Nothing here touches the network.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+from src.data.checkpoints import file_fingerprint
+
+
+# Grid cell codes other than county positions
+OUTSIDE = -2
+BOUNDARY = -1
+
+
+class CountyBoundaryIndex:
+    """Grid-accelerated county lookup for one state"""
+
+    def __init__(self, counties: gpd.GeoDataFrame, grid: np.ndarray, meta: dict):
+        """
+        Initialize from built or loaded parts (use build or load_or_build)
+
+        Args:
+            counties: Simplified county polygons (county_fips, county_name, geometry), EPSG:4326
+            grid: int16 cell codes (county position, BOUNDARY or OUTSIDE), rows by latitude
+            meta: Grid origin, cell size and provenance
+        """
+        self.counties = counties.reset_index(drop=True)
+        self.grid = grid
+        self.meta = meta
+        self.county_fips = self.counties['county_fips'].to_numpy()
+        self.county_name = self.counties['county_name'].to_numpy()
+        self._polygons = self.counties.geometry.to_numpy()
+        self._tree = shapely.STRtree(self._polygons)
+
+    @staticmethod
+    def cache_key(state_fips: str, tiger_file: str, cell_deg: float, tolerance_deg: float) -> str:
+        """Hash of the source file identity and build parameters"""
+        payload = json.dumps({'state_fips': state_fips, 'source': file_fingerprint(tiger_file),
+                              'cell_deg': cell_deg, 'tolerance_deg': tolerance_deg}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+    @classmethod
+    def build(cls, tiger_file: str, state_fips: str, cell_deg: float = 0.01,
+              tolerance_deg: float = 0.0001) -> 'CountyBoundaryIndex':
+        """
+        Build the index from a local TIGER county file
+
+        Args:
+            tiger_file: TIGER/Line county shapefile, or its .zip (national or state)
+            state_fips: Two-digit state FIPS code (e.g. '36' for New York)
+            cell_deg: Grid cell size in degrees (0.01 ≈ 1 km)
+            tolerance_deg: Polygon simplification tolerance in degrees (0.0001 ≈ 10 m)
+        """
+        counties = gpd.read_file(tiger_file)
+        counties = counties[(counties['STATEFP'] == state_fips) & counties.geometry.notna() & ~counties.geometry.is_empty]
+        if counties.empty:
+            raise ValueError(f'No counties with STATEFP={state_fips} in {tiger_file}')
+
+        counties = counties.to_crs('EPSG:4326')
+        counties = gpd.GeoDataFrame({
+            'county_fips': counties['COUNTYFP'].to_numpy(),
+            'county_name': counties['NAME'].to_numpy(),
+        }, geometry=counties.geometry.simplify(tolerance_deg, preserve_topology=True).values,
+            crs='EPSG:4326').sort_values('county_fips', ignore_index=True)
+
+        # Classify every cell: inside one county, straddling a boundary, or outside
+        minx, miny, maxx, maxy = counties.total_bounds
+        n_cols = int(np.ceil((maxx - minx) / cell_deg))
+        n_rows = int(np.ceil((maxy - miny) / cell_deg))
+        col, row = np.meshgrid(np.arange(n_cols), np.arange(n_rows))
+        x0 = minx + col.ravel() * cell_deg
+        y0 = miny + row.ravel() * cell_deg
+        cells = shapely.box(x0, y0, x0 + cell_deg, y0 + cell_deg)
+
+        tree = shapely.STRtree(counties.geometry.values)
+        grid = np.full(n_rows * n_cols, OUTSIDE, dtype=np.int16)
+        touched, _ = tree.query(cells, predicate='intersects')
+        grid[touched] = BOUNDARY
+        inside, county = tree.query(cells, predicate='within')
+        grid[inside] = county
+
+        meta = {'state_fips': state_fips, 'source': str(tiger_file), 'minx': float(minx),
+                'miny': float(miny), 'cell_deg': cell_deg, 'tolerance_deg': tolerance_deg,
+                'shape': [n_rows, n_cols]}
+        return cls(counties, grid.reshape(n_rows, n_cols), meta)
+
+    def save(self, index_dir: str):
+        """Write grid (.npy), polygons (GeoParquet) and the JSON sidecar last"""
+        index_dir = Path(index_dir)
+        index_dir.mkdir(parents=True, exist_ok=True)
+        np.save(index_dir / 'grid.npy', self.grid)
+        self.counties.to_parquet(index_dir / 'counties.parquet')
+
+        tmp_path = index_dir / f'index.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, index_dir / 'index.json')
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> 'CountyBoundaryIndex':
+        """Load a saved index (grid memory-mapped by default)"""
+        index_dir = Path(index_dir)
+        with open(index_dir / 'index.json', 'r') as f:
+            meta = json.load(f)
+        grid = np.load(index_dir / 'grid.npy', mmap_mode='r' if mmap else None)
+        counties = gpd.read_parquet(index_dir / 'counties.parquet')
+        return cls(counties, grid, meta)
+
+    @classmethod
+    def load_or_build(cls, state_fips: str, tiger_file: Optional[str] = None,
+                      cache_dir: str = 'data/cache/counties', cell_deg: float = 0.01,
+                      tolerance_deg: float = 0.0001, verbose: bool = True) -> 'CountyBoundaryIndex':
+        """
+        Cached index for a state, building it from tiger_file if needed
+
+        Without tiger_file, the most recently built index for the state is used.
+
+        Raises:
+            FileNotFoundError: No cached index for the state and no local TIGER file
+        """
+        cache_dir = Path(cache_dir)
+
+        if tiger_file is not None and Path(tiger_file).exists():
+            key = cls.cache_key(state_fips, tiger_file, cell_deg, tolerance_deg)
+            index_dir = cache_dir / f'{state_fips}_{key}'
+            if (index_dir / 'index.json').exists():
+                if verbose:
+                    print(f'  ✓ Using cached county index {index_dir}')
+                return cls.load(index_dir)
+
+            if verbose:
+                print(f'  Building county index for state {state_fips} from {tiger_file}...')
+            index = cls.build(tiger_file, state_fips, cell_deg=cell_deg, tolerance_deg=tolerance_deg)
+            index.save(index_dir)
+            if verbose:
+                n_rows, n_cols = index.grid.shape
+                boundary = (index.grid == BOUNDARY).mean()
+                print(f'  ✓ Cached {len(index.counties)} counties, {n_rows}×{n_cols} grid '
+                      f'({boundary:.1%} boundary cells) to {index_dir}')
+            return index
+
+        cached = sorted(cache_dir.glob(f'{state_fips}_*/index.json'), key=lambda p: p.stat().st_mtime)
+        if cached:
+            if verbose:
+                print(f'  ✓ Using cached county index {cached[-1].parent}')
+            return cls.load(cached[-1].parent)
+
+        raise FileNotFoundError(
+            f'No county index for state {state_fips} in {cache_dir} and no local TIGER file'
+            + (f' at {tiger_file}' if tiger_file else '')
+        )
+
+    def lookup(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """
+        County position (into county_fips / county_name) of each lon/lat point
+
+        Returns:
+            np.ndarray: int positions, -1 where the point is in no county
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        n_rows, n_cols = self.grid.shape
+        cell = self.meta['cell_deg']
+
+        with np.errstate(invalid='ignore'):
+            col = np.floor((x - self.meta['minx']) / cell)
+            row = np.floor((y - self.meta['miny']) / cell)
+        on_grid = (col >= 0) & (col < n_cols) & (row >= 0) & (row < n_rows)
+
+        result = np.full(len(x), -1, dtype=np.int64)
+        codes = np.full(len(x), OUTSIDE, dtype=np.int64)
+        codes[on_grid] = self.grid[row[on_grid].astype(np.int64), col[on_grid].astype(np.int64)]
+        inside = codes >= 0
+        result[inside] = codes[inside]
+
+        # Exact test only for points in boundary cells
+        boundary = np.flatnonzero(codes == BOUNDARY)
+        if len(boundary):
+            points = shapely.points(x[boundary], y[boundary])
+            point_idx, county = self._tree.query(points, predicate='within')
+            first = np.unique(point_idx, return_index=True)[1]
+            result[boundary[point_idx[first]]] = county[first]
+
+        return result
+
+    def assign(self, geometries) -> np.ndarray:
+        """
+        County position of each geometry's representative location
+
+        Lines use their midpoint along the line, other geometries their
+        centroid (a point's own location).
+        """
+        geometries = np.asarray(geometries, dtype=object)
+        result = np.full(len(geometries), -1, dtype=np.int64)
+        present = ~shapely.is_missing(geometries) & ~shapely.is_empty(geometries)
+
+        geometries = geometries[present]
+        type_id = shapely.get_type_id(geometries)
+        x = np.empty(len(geometries))
+        y = np.empty(len(geometries))
+
+        lines = type_id == 1
+        x[lines], y[lines] = line_midpoints(geometries[lines])
+        others = ~lines
+        multilines = type_id[others] == 5
+        anchors = np.empty(others.sum(), dtype=object)
+        anchors[multilines] = shapely.line_interpolate_point(geometries[others][multilines], 0.5, normalized=True)
+        anchors[~multilines] = shapely.centroid(geometries[others][~multilines])
+        x[others], y[others] = shapely.get_x(anchors), shapely.get_y(anchors)
+
+        result[present] = self.lookup(x, y)
+        return result
+
+
+    def _single_county(self, geometries: np.ndarray) -> np.ndarray:
+        """
+        County of geometries whose bounding box lies in cells of one county
+
+        Only boxes spanning at most 2×2 grid cells are checked; anything
+        else, or any box touching a boundary cell, returns -1.
+        """
+        n_rows, n_cols = self.grid.shape
+        cell = self.meta['cell_deg']
+        bounds = shapely.bounds(geometries)
+        col = np.floor((bounds[:, [0, 2]] - self.meta['minx']) / cell)
+        row = np.floor((bounds[:, [1, 3]] - self.meta['miny']) / cell)
+
+        result = np.full(len(geometries), -1, dtype=np.int64)
+        small = ((col[:, 1] - col[:, 0] <= 1) & (row[:, 1] - row[:, 0] <= 1)
+                 & (col[:, 0] >= 0) & (col[:, 1] < n_cols) & (row[:, 0] >= 0) & (row[:, 1] < n_rows))
+        col = col[small].astype(np.int64)
+        row = row[small].astype(np.int64)
+
+        corners = np.stack([self.grid[row[:, i], col[:, j]] for i in (0, 1) for j in (0, 1)], axis=1)
+        same = (corners >= 0).all(axis=1) & (corners == corners[:, :1]).all(axis=1)
+        result[np.flatnonzero(small)[same]] = corners[same, 0]
+        return result
+
+    def apportion(self, geometries) -> pd.DataFrame:
+        """
+        Length share of each geometry in every county it crosses
+
+        Lines are cut at county boundaries and weighted by the length of each
+        piece, normalized over the in-state length so a zone's shares sum to
+        1. Lines inside one county (by the grid) skip the overlay; points and
+        other geometries get their single assign() county with share 1.
+
+        Returns:
+            pd.DataFrame: Long-form zone (position), county (position),
+            county_fips, county_name, length_share; sorted by zone
+        """
+        geometries = np.asarray(geometries, dtype=object)
+        lengths = shapely.length(geometries)
+        lines = np.isin(shapely.get_type_id(geometries), [1, 5]) & (lengths > 0)
+
+        zones, counties, shares = [], [], []
+
+        def add(zone, county, share):
+            keep = county >= 0
+            zones.append(zone[keep])
+            counties.append(county[keep])
+            shares.append(share[keep])
+
+        other = np.flatnonzero(~lines)
+        add(other, self.assign(geometries[other]), np.ones(len(other)))
+
+        line_idx = np.flatnonzero(lines)
+        single = self._single_county(geometries[line_idx])
+        add(line_idx, single, np.ones(len(line_idx)))
+
+        # Overlay only for lines that may cross a boundary
+        rest = line_idx[single < 0]
+        if len(rest):
+            piece_zone, piece_county = self._tree.query(geometries[rest], predicate='intersects')
+
+            # Lines touching a single county need no clipping
+            candidates = np.bincount(piece_zone, minlength=len(rest))
+            one = candidates[piece_zone] == 1
+            add(rest[piece_zone[one]], piece_county[one], np.ones(one.sum()))
+            piece_zone, piece_county = piece_zone[~one], piece_county[~one]
+
+            pieces = shapely.intersection(geometries[rest][piece_zone], self._polygons[piece_county])
+            piece_length = shapely.length(pieces)
+            keep = piece_length > 0
+            piece_zone, piece_county, piece_length = piece_zone[keep], piece_county[keep], piece_length[keep]
+            in_state = np.bincount(piece_zone, weights=piece_length, minlength=len(rest))
+            add(rest[piece_zone], piece_county, piece_length / in_state[piece_zone])
+
+        weights = pd.DataFrame({
+            'zone': np.concatenate(zones),
+            'county': np.concatenate(counties),
+            'length_share': np.concatenate(shares),
+        }).sort_values(['zone', 'county'], ignore_index=True)
+        weights.insert(2, 'county_fips', self.county_fips[weights['county'].to_numpy()])
+        weights.insert(3, 'county_name', self.county_name[weights['county'].to_numpy()])
+        return weights
+
+
+def line_midpoints(lines: np.ndarray):
+    """
+    Points halfway along LineStrings, from their packed coordinates
+
+    Returns:
+        tuple: (x, y) arrays, one entry per line
+    """
+    if len(lines) == 0:
+        return np.empty(0), np.empty(0)
+    coords, owner = shapely.get_coordinates(lines, return_index=True)
+    starts = np.searchsorted(owner, np.arange(len(lines)))
+
+    # Cumulative length at each vertex, restarting at every line
+    step = np.hypot(*np.diff(coords, axis=0).T)
+    step[owner[1:] != owner[:-1]] = 0
+    along = np.concatenate([[0.0], np.cumsum(step)])
+    along -= np.repeat(along[starts], np.diff(np.append(starts, len(coords))))
+    ends = np.append(starts[1:], len(coords)) - 1
+    half = along[ends] / 2
+
+    # Segment containing the halfway point, then interpolate within it
+    seg = np.searchsorted(along + owner * (along.max() + 1), half + np.arange(len(lines)) * (along.max() + 1))
+    seg = np.clip(seg, starts + 1, ends)
+    a, b = seg - 1, seg
+    length = along[b] - along[a]
+    t = np.divide(half - along[a], length, out=np.zeros_like(half), where=length > 0)
+    return coords[a, 0] + t * (coords[b, 0] - coords[a, 0]), coords[a, 1] + t * (coords[b, 1] - coords[a, 1])
@@ -0,0 +1,215 @@
+"""
+County Crash Calendar
+County × day crash counts with prefix sums for exact-window lookups
+
+Crashes are counted once into a (county, day) array per kind (all crashes,
+injury, fatal). Cumulative sums along the day axis turn the count over any
+[start, end) window into two array reads, so every work zone's window is
+looked up at once with fancy indexing. Days outside the crash history are
+estimated from the county's mean daily count, overall or (seasonal=True) for
+each calendar month, times the number of such days in the window. Windows
+are clipped to a horizon around the history so bad end dates (e.g. year
+9999) cannot project thousands of years of crashes.
+"""
+
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Days a window may extend past either end of the crash history
+PROJECTION_HORIZON_DAYS = 730
+
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+def _day_numbers(dates: pd.Series) -> np.ndarray:
+    """Days since 1970-01-01 as float (NaN for missing dates), UTC for tz-aware input"""
+    dates = pd.to_datetime(dates, errors='coerce')
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert(None)
+    days = dates.dt.floor('D').to_numpy().astype('datetime64[D]').astype(np.int64).astype(float)
+    days[dates.isna().to_numpy()] = np.nan
+    return days
+
+
+def _leap_years_through(year: np.ndarray) -> np.ndarray:
+    """Leap years in [1, year] of the proleptic Gregorian calendar (relative count for year < 1)"""
+    return year // 4 - year // 100 + year // 400
+
+
+def _month_day_counts(day: np.ndarray) -> np.ndarray:
+    """
+    Days of each calendar month between 1970-01-01 and each day number
+
+    Differences between two rows give the days per month in [a, b) in
+    closed form, without materializing the days themselves.
+
+    Returns:
+        np.ndarray: (len(day), 12) signed counts (negative before 1970)
+    """
+    day = np.asarray(day, dtype=np.int64)
+    month_number = day.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    years, month = np.divmod(month_number, 12)
+    year = 1970 + years
+    is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+
+    # Whole years since 1970
+    counts = np.outer(years, DAYS_IN_MONTH)
+    counts[:, 1] += _leap_years_through(year - 1) - _leap_years_through(1969)
+
+    # Whole months of the current year, then the days of the current month
+    this_year = np.broadcast_to(DAYS_IN_MONTH, counts.shape).copy()
+    this_year[:, 1] += is_leap
+    before = np.arange(12) < month[:, None]
+    counts += np.where(before, this_year, 0)
+    month_start = month_number.astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+    counts[np.arange(len(day)), month] += day - month_start
+    return counts
+
+
+class CrashCalendar:
+    """Per-county daily crash counts over the crash history"""
+
+    def __init__(self, counties: pd.Index, first_day: int, counts: Dict[str, np.ndarray]):
+        """
+        Initialize from counted arrays (use from_crashes)
+
+        Args:
+            counties: County names, one per row of each count array
+            first_day: Day number (days since epoch) of column 0
+            counts: Kind -> (n_counties, n_days) crash counts
+        """
+        self.counties = counties
+        self.first_day = first_day
+        self.counts = counts
+        self.n_days = next(iter(counts.values())).shape[1]
+
+    @classmethod
+    def from_crashes(cls, crashes: pd.DataFrame, county_col: str = 'county_name',
+                     date_col: str = 'date_parsed',
+                     flag_cols: Sequence[str] = ('is_injury', 'is_fatal')) -> 'CrashCalendar':
+        """
+        Count crashes per county and day
+
+        Args:
+            crashes: Crash records
+            county_col: County name column
+            date_col: Parsed crash date column
+            flag_cols: Boolean columns counted as extra kinds (named without 'is_')
+
+        Returns:
+            CrashCalendar: Kinds 'crashes' plus one per flag column
+        """
+        day = _day_numbers(crashes[date_col])
+        valid = ~np.isnan(day) & crashes[county_col].notna().to_numpy()
+        county, counties = pd.factorize(crashes[county_col][valid], sort=True)
+        day = day[valid].astype(np.int64)
+
+        first_day = int(day.min())
+        n_days = int(day.max()) - first_day + 1
+        cell = county * n_days + (day - first_day)
+        size = len(counties) * n_days
+
+        counts = {'crashes': np.bincount(cell, minlength=size).reshape(len(counties), n_days)}
+        for col in flag_cols:
+            flags = crashes[col].to_numpy()[valid].astype(float)
+            kind = col[3:] if col.startswith('is_') else col
+            counts[kind] = np.bincount(cell, weights=flags, minlength=size).reshape(len(counties), n_days)
+        return cls(pd.Index(counties), first_day, counts)
+
+    def daily_means(self, kind: str = 'crashes', seasonal: bool = False) -> np.ndarray:
+        """
+        Mean crashes per day for each county, by calendar month if seasonal
+
+        Returns:
+            np.ndarray: (n_counties, 12) means; identical columns unless seasonal
+        """
+        counts = self.counts[kind]
+        if not seasonal:
+            return np.repeat(counts.mean(axis=1, keepdims=True), 12, axis=1)
+
+        month = self.months(self.first_day, self.n_days)
+        days_in_month = np.bincount(month, minlength=12)
+        totals = np.stack([counts[:, month == m].sum(axis=1) for m in range(12)], axis=1)
+        overall = counts.mean(axis=1, keepdims=True)
+        # Months the history never saw fall back to the overall mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(days_in_month > 0, totals / days_in_month, overall)
+
+    @staticmethod
+    def months(first_day: int, n_days: int) -> np.ndarray:
+        """Calendar month (0-11) of each day in a range of day numbers"""
+        days = np.arange(first_day, first_day + n_days).astype('datetime64[D]')
+        return days.astype('datetime64[M]').astype(np.int64) % 12
+
+    def prefix_sums(self, kind: str) -> np.ndarray:
+        """
+        Cumulative observed counts over the crash history
+
+        Returns:
+            np.ndarray: (n_counties, n_days + 1) prefix sums; column k is the
+            total before day first_day + k
+        """
+        prefix = np.zeros((len(self.counties), self.n_days + 1))
+        np.cumsum(self.counts[kind], axis=1, out=prefix[:, 1:])
+        return prefix
+
+    def window_counts(self, county: np.ndarray, start, end, kinds: Sequence[str] = None,
+                      seasonal: bool = False,
+                      horizon_days: int = PROJECTION_HORIZON_DAYS) -> pd.DataFrame:
+        """
+        Crash counts in each [start, end) window of its county
+
+        Args:
+            county: County names, one per window
+            start: Window start dates
+            end: Window end dates (exclusive)
+            kinds: Count kinds to look up (default: all)
+            seasonal: Month-of-year means for days outside the history
+            horizon_days: Days past either end of the history a window may
+                reach; windows are clipped to it
+
+        Returns:
+            pd.DataFrame: One column per kind, observed_share (fraction of
+            the clipped window inside the history) and clipped (window cut
+            at the horizon); NaN for unknown counties, missing dates or
+            windows ending before they start
+        """
+        kinds = list(self.counts) if kinds is None else list(kinds)
+        row = self.counties.get_indexer(pd.Index(county))
+        start = _day_numbers(pd.Series(start))
+        end = _day_numbers(pd.Series(end))
+        ok = (row >= 0) & ~np.isnan(start) & ~np.isnan(end) & (end >= start)
+
+        result = pd.DataFrame({kind: np.full(len(row), np.nan) for kind in kinds})
+        result['observed_share'] = np.nan
+        result['clipped'] = False
+        if not ok.any():
+            return result
+
+        history_start, history_end = self.first_day, self.first_day + self.n_days
+        row, start, end = row[ok], start[ok].astype(np.int64), end[ok].astype(np.int64)
+        clipped_start = np.clip(start, history_start - horizon_days, history_end + horizon_days)
+        clipped_end = np.clip(end, history_start - horizon_days, history_end + horizon_days)
+        result.loc[ok, 'clipped'] = (clipped_start != start) | (clipped_end != end)
+        start, end = clipped_start, clipped_end
+
+        # Observed part: two prefix-sum reads per window
+        lo = np.clip(start, history_start, history_end)
+        hi = np.clip(end, history_start, history_end)
+
+        # Expected part: days per calendar month before and after the history
+        outside_days = (
+            _month_day_counts(lo) - _month_day_counts(start)
+            + _month_day_counts(end) - _month_day_counts(hi)
+        )
+        for kind in kinds:
+            prefix = self.prefix_sums(kind)
+            observed = prefix[row, hi - history_start] - prefix[row, lo - history_start]
+            expected = (self.daily_means(kind, seasonal)[row] * outside_days).sum(axis=1)
+            result.loc[ok, kind] = observed + expected
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            result.loc[ok, 'observed_share'] = np.where(end > start, (hi - lo) / (end - start), np.nan)
+        return result
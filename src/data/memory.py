@@ -0,0 +1,70 @@
+"""
+Memory Helpers
+Schema-driven dtype plans and memory reporting for pipeline frames
+
+A dtype plan maps column names to the narrowest dtype that holds their
+values: int8 for 0/1 flags and small codes, 'category' for repeated
+strings, float32 for measurements that don't need double precision.
+Columns the plan doesn't mention, or that a frame doesn't have, are left
+alone.
+"""
+
+import resource
+import sys
+import numpy as np
+import pandas as pd
+from typing import Any, Dict
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def frame_memory_mb(result: Any) -> float:
+    """Deep memory usage of a DataFrame (or tuple of DataFrames), in MB"""
+    parts = result if isinstance(result, tuple) else (result,)
+    return sum(
+        part.memory_usage(deep=True).sum() for part in parts if isinstance(part, pd.DataFrame)
+    ) / 1024 / 1024
+
+
+def apply_dtype_plan(df: pd.DataFrame, plan: Dict[str, str]) -> pd.DataFrame:
+    """
+    Cast columns in place to the dtypes of a plan
+
+    Args:
+        df: Frame to shrink (modified and returned)
+        plan: Column name -> dtype ('int8', 'int16', 'float32', 'category', 'bool')
+
+    Returns:
+        pd.DataFrame: df with planned columns cast
+    """
+    for col, dtype in plan.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        values = df[col]
+        if dtype in ('int8', 'int16', 'int32') and values.isna().any():
+            # Integer columns with gaps keep NaN as float32 rather than fail
+            dtype = 'float32'
+        elif dtype == 'bool':
+            values = values.fillna(False)
+        elif dtype == 'category' and isinstance(values.dtype, pd.CategoricalDtype):
+            continue
+        df[col] = values.astype(dtype)
+    return df
+
+
+def downcast_report(before_mb: float, df: pd.DataFrame) -> str:
+    """One-line summary of a dtype plan's saving"""
+    after_mb = frame_memory_mb(df)
+    saved = (1 - after_mb / before_mb) * 100 if before_mb else 0.0
+    return f'{before_mb:,.1f} MB → {after_mb:,.1f} MB ({saved:.0f}% smaller)'
+
+
+def split_indices(split: pd.Categorical) -> Dict[str, np.ndarray]:
+    """Row positions of each split category (rows with no split are left out)"""
+    codes = np.asarray(split.codes)
+    return {name: np.flatnonzero(codes == i) for i, name in enumerate(split.categories)}
@@ -0,0 +1,137 @@
+"""
+OSM Tag Normalization
+Vectorized normalization of OSMnx edge tags into typed feature columns
+
+OSMnx edge tags are strings, and a simplified edge that merges several OSM
+ways carries a list of values instead (e.g. lanes=['2', '3']). Every
+normalizer here takes the first value of list-valued tags, like the
+per-row parsers it replaces, and works on whole columns at once.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Iterable
+
+
+KMH_PER_MPH = 1.609344
+
+# maxspeed values look like '45 mph', '60', '50 km/h', 'signals'
+SPEED_PATTERN = r'(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>mph|km/h|kmh|kph)?'
+KMH_UNITS = ['km/h', 'kmh', 'kph']
+
+# Tag values that mean "yes" for boolean-like tags (oneway=-1 is reversed one-way)
+TRUE_TAG_VALUES = ['yes', 'true', '1', '-1']
+FALSE_TAG_VALUES = ['no', 'false', '0']
+
+# Typed columns emitted by normalize_osm_tags
+OSM_FEATURE_COLUMNS = ['highway_type', 'num_lanes', 'speed_limit',
+                       'is_oneway', 'is_bridge', 'is_tunnel', 'road_name']
+OSM_FLAG_COLUMNS = ['is_oneway', 'is_bridge', 'is_tunnel']
+
+
+def first_tag_value(values: pd.Series) -> pd.Series:
+    """
+    First element of list-valued tags; scalar tags pass through
+
+    Args:
+        values: Tag column mixing scalars and lists
+
+    Returns:
+        pd.Series: One scalar per row, aligned with values
+    """
+    exploded = values.reset_index(drop=True).explode()
+    first = exploded[~exploded.index.duplicated(keep='first')]
+    return pd.Series(first.to_numpy(), index=values.index, name=values.name)
+
+
+def _tag_text(values: pd.Series) -> pd.Series:
+    """First tag value as lowercase string (NA where missing)"""
+    return first_tag_value(values).astype('string').str.strip().str.lower()
+
+
+def _to_float(text: pd.Series) -> pd.Series:
+    """Numeric strings to plain float64 (NaN where missing)"""
+    number = pd.to_numeric(text, errors='coerce')
+    return pd.Series(number.to_numpy(dtype='float64', na_value=np.nan), index=text.index)
+
+
+def parse_numeric_tag(values: pd.Series) -> pd.Series:
+    """Leading number of each tag value (e.g. lanes='2' -> 2.0), NaN if none"""
+    number = _tag_text(values).str.extract(r'(\d+(?:\.\d+)?)', expand=False)
+    return _to_float(number).astype('float32')
+
+
+def parse_speed_mph(values: pd.Series, default_unit: str = 'mph') -> pd.Series:
+    """
+    Speed limit in mph from maxspeed tags
+
+    Args:
+        values: maxspeed tag column
+        default_unit: Unit assumed when the value has none. OSM's default is
+            km/h, but untagged US speeds are almost always mph.
+
+    Returns:
+        pd.Series: float32 speed in mph, NaN where no number is present
+    """
+    parts = _tag_text(values).str.extract(SPEED_PATTERN)
+    speed = _to_float(parts['value'])
+    is_kmh = parts['unit'].fillna(default_unit).isin(KMH_UNITS).to_numpy(dtype=bool)
+    speed = speed.where(~is_kmh, speed / KMH_PER_MPH)
+    return speed.astype('float32')
+
+
+def parse_flag_tag(values: pd.Series, presence: bool = False) -> pd.Series:
+    """
+    0/1 flag from a boolean-like tag
+
+    Args:
+        values: Tag column (bools or strings)
+        presence: If True, any value other than an explicit "no" counts as
+            set (bridge='viaduct', tunnel='culvert'); otherwise only "yes"
+            style values do (oneway)
+
+    Returns:
+        pd.Series: int8 flag
+    """
+    text = _tag_text(values)
+    if presence:
+        flag = text.notna() & ~text.isin(FALSE_TAG_VALUES)
+    else:
+        flag = text.isin(TRUE_TAG_VALUES)
+    return flag.fillna(False).astype('int8')
+
+
+def normalize_osm_tags(edges: pd.DataFrame, default_speed_unit: str = 'mph') -> pd.DataFrame:
+    """
+    Typed road feature columns from OSMnx edge tags
+
+    Args:
+        edges: OSMnx edges (or any frame carrying their tag columns); missing
+            tag columns are treated as all-missing
+        default_speed_unit: Unit assumed for maxspeed values without one
+
+    Returns:
+        pd.DataFrame: OSM_FEATURE_COLUMNS aligned with edges.index
+    """
+    def tag(col: str) -> pd.Series:
+        if col in edges.columns:
+            return edges[col]
+        return pd.Series(np.nan, index=edges.index, dtype=object, name=col)
+
+    return pd.DataFrame({
+        'highway_type': first_tag_value(tag('highway')).astype('category'),
+        'num_lanes': parse_numeric_tag(tag('lanes')),
+        'speed_limit': parse_speed_mph(tag('maxspeed'), default_unit=default_speed_unit),
+        'is_oneway': parse_flag_tag(tag('oneway')),
+        'is_bridge': parse_flag_tag(tag('bridge'), presence=True),
+        'is_tunnel': parse_flag_tag(tag('tunnel'), presence=True),
+        'road_name': first_tag_value(tag('name')),
+    }, index=edges.index)
+
+
+def fill_missing_flags(df: pd.DataFrame, columns: Iterable[str] = OSM_FLAG_COLUMNS) -> pd.DataFrame:
+    """Set flags of rows with no matched edge to 0 (left joins leave them NaN)"""
+    for col in columns:
+        if col in df.columns:
+            df[col] = df[col].fillna(0).astype('int8')
+    return df
@@ -0,0 +1,358 @@
+"""
+OSMnx Road Network Cache
+Disk cache of OSMnx road network edges, stored as GeoParquet
+
+Each cached network is keyed on its center, radius and network type. Edges
+are sorted along a Hilbert curve and written with a bbox covering column,
+so reads can skip row groups outside the requested area. A request is
+served from any cached network whose bounding box covers it.
+
+A local OSM extract is filtered with the same way rules OSMnx sends to
+Overpass for the network type, then cached once as a single extract-wide
+network; tiles are read from it as bbox slices.
+
+Every cached network has its own JSON sidecar and both files are written
+atomically, so several processes can share one cache directory.
+"""
+
+import json
+import math
+import os
+import re
+import time
+import numpy as np
+import geopandas as gpd
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Meters per degree of latitude (spherical approximation)
+METERS_PER_DEGREE = 111320
+
+# Download attempts per network; the pause before each retry doubles
+DOWNLOAD_ATTEMPTS = 3
+RETRY_PAUSE_S = 30
+
+# One tag condition of an Overpass way filter: ["key"] or ["key"!~"regex"]
+OVERPASS_CONDITION = re.compile(r'\["([^"]+)"(?:!~"([^"]*)")?\]')
+
+
+def bbox_from_point(center: Tuple[float, float], dist: float) -> Tuple[float, float, float, float]:
+    """
+    Bounding box around a point, as used by ox.graph_from_point (dist_type='bbox')
+
+    Args:
+        center: (lat, lon) of the center point
+        dist: Half-width of the box in meters
+
+    Returns:
+        tuple: (west, south, east, north) in degrees
+    """
+    lat, lon = center
+    dlat = dist / METERS_PER_DEGREE
+    dlon = dist / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+    return (lon - dlon, lat - dlat, lon + dlon, lat + dlat)
+
+
+def way_filter_rules(network_type: str) -> List[Tuple[str, Optional[re.Pattern]]]:
+    """
+    Tag rules of the Overpass way filter OSMnx uses for a network type
+
+    Args:
+        network_type: OSMnx network type (e.g. 'drive')
+
+    Returns:
+        list: (key, excluded) pairs; the key must be present when excluded
+        is None, otherwise its value must not match excluded
+    """
+    from osmnx._overpass import _get_network_filter
+
+    return [
+        (match.group(1), re.compile(match.group(2)) if match.group(2) is not None else None)
+        for match in OVERPASS_CONDITION.finditer(_get_network_filter(network_type))
+    ]
+
+
+def _way_matches(tags: Dict, rules: List[Tuple[str, Optional[re.Pattern]]]) -> bool:
+    """Whether a way's tags pass every rule (Overpass semantics: absent tags pass !~)"""
+    for key, excluded in rules:
+        value = tags.get(key)
+        if excluded is None:
+            if value is None:
+                return False
+        elif value is not None and excluded.search(str(value)):
+            return False
+    return True
+
+
+class RoadNetworkCache:
+    """Caches OSMnx edge GeoDataFrames on disk keyed on center, radius and network type"""
+
+    def __init__(self,
+                 cache_dir: str = 'data/cache/osm_networks',
+                 offline: bool = False,
+                 osm_file: Optional[str] = None,
+                 verbose: bool = True):
+        """
+        Initialize road network cache
+
+        Args:
+            cache_dir: Directory holding cached GeoParquet files and sidecars
+            offline: Never download; read only from the cache or osm_file
+            osm_file: Optional local OSM XML extract used when offline
+            verbose: Print cache hits
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.offline = offline
+        self.osm_file = Path(osm_file) if osm_file else None
+        self.verbose = verbose
+
+        self.entries = self._load_entries()
+
+    @property
+    def config(self) -> Dict:
+        """Constructor arguments, for rebuilding the cache in worker processes"""
+        return {
+            'cache_dir': str(self.cache_dir),
+            'offline': self.offline,
+            'osm_file': str(self.osm_file) if self.osm_file else None
+        }
+
+    def _load_entries(self) -> List[Dict]:
+        """Load the sidecar of every cached network"""
+        entries = []
+        for sidecar in sorted(self.cache_dir.glob('*.json')):
+            with open(sidecar, 'r') as f:
+                entries.append(json.load(f))
+        return entries
+
+    def refresh(self):
+        """Pick up networks cached by other processes"""
+        self.entries = self._load_entries()
+
+    @staticmethod
+    def cache_key(center: Tuple[float, float], dist: float, network_type: str) -> str:
+        """File stem for a cached network"""
+        lat, lon = center
+        return f'{network_type}_{lat:.5f}_{lon:.5f}_{int(round(dist))}m'
+
+    def find_covering(self, bbox: Tuple[float, float, float, float], network_type: str) -> Optional[Dict]:
+        """
+        Find the smallest cached network whose bbox contains the requested bbox
+
+        Args:
+            bbox: Requested (west, south, east, north)
+            network_type: OSMnx network type
+
+        Returns:
+            dict: Manifest entry, or None if nothing covers the request
+        """
+        west, south, east, north = bbox
+        covering = [
+            entry for entry in self.entries
+            if entry['network_type'] == network_type
+            and entry['bbox'][0] <= west and entry['bbox'][1] <= south
+            and entry['bbox'][2] >= east and entry['bbox'][3] >= north
+            and (self.cache_dir / entry['file']).exists()
+        ]
+        if not covering:
+            return None
+        return min(covering, key=lambda entry: entry['dist'])
+
+    def get_edges(self,
+                  center: Tuple[float, float],
+                  dist: float,
+                  network_type: str = 'drive') -> gpd.GeoDataFrame:
+        """
+        Road network edges around a point, from cache when possible
+
+        Args:
+            center: (lat, lon) of the center point
+            dist: Half-width of the network bbox in meters
+            network_type: OSMnx network type (default: 'drive')
+
+        Returns:
+            gpd.GeoDataFrame: Edges (EPSG:4326) intersecting the requested bbox
+        """
+        bbox = bbox_from_point(center, dist)
+
+        entry = self.find_covering(bbox, network_type)
+        if entry is None:
+            self.refresh()
+            entry = self.find_covering(bbox, network_type)
+        if entry is not None:
+            if self.verbose:
+                print(f'  ✓ Road network from cache: {entry["file"]}')
+            return self._read(entry, bbox)
+
+        if self.offline:
+            if self.osm_file is None:
+                raise FileNotFoundError(
+                    f'No cached {network_type} network covers {center} (radius {dist:.0f}m) '
+                    f'and no local OSM extract was given'
+                )
+            # The extract is all there is offline; serve the slice without caching it again
+            return self._read(self.cache_extract(network_type), bbox)
+
+        edges = self._download(center, dist, network_type)
+        self._write(edges, center, dist, network_type, bbox)
+        return edges
+
+    def _download(self, center: Tuple[float, float], dist: float, network_type: str) -> gpd.GeoDataFrame:
+        """
+        Download a network with OSMnx and return its edges
+
+        OSMnx itself waits out Overpass 429/504 responses; connection errors
+        and other error responses are retried here with a doubling pause.
+        """
+        import osmnx as ox
+        import requests
+        from osmnx._errors import ResponseStatusCodeError
+
+        for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+            try:
+                G = ox.graph_from_point(center, dist=dist, network_type=network_type, simplify=True)
+                return ox.graph_to_gdfs(G, nodes=False)
+            except (requests.RequestException, ResponseStatusCodeError) as e:
+                if attempt == DOWNLOAD_ATTEMPTS:
+                    raise
+                pause = RETRY_PAUSE_S * 2 ** (attempt - 1)
+                print(f'  ⚠ Download of {center} failed ({e}); retrying in {pause}s '
+                      f'({attempt}/{DOWNLOAD_ATTEMPTS - 1})')
+                time.sleep(pause)
+
+    def cache_extract(self, network_type: str = 'drive') -> Dict:
+        """
+        Cache the local OSM extract as one network, parsing it only if needed
+
+        Call once before handing the cache to worker processes, so each
+        worker reads bbox slices instead of parsing the extract itself.
+
+        Args:
+            network_type: OSMnx network type whose way filter is applied
+
+        Returns:
+            dict: Manifest entry of the extract-wide network
+        """
+        source = str(self.osm_file.resolve())
+        stat = self.osm_file.stat()
+        for refresh in (False, True):
+            if refresh:
+                self.refresh()
+            for entry in self.entries:
+                if (entry.get('osm_file') == source and entry.get('osm_file_mtime') == stat.st_mtime
+                        and entry['network_type'] == network_type
+                        and (self.cache_dir / entry['file']).exists()):
+                    return entry
+
+        edges = self._edges_from_extract(network_type)
+        west, south, east, north = map(float, edges.total_bounds)
+        center = ((south + north) / 2, (west + east) / 2)
+        dist = max(north - south, east - west) * METERS_PER_DEGREE / 2
+        return self._write(edges, center, dist, network_type, (west, south, east, north),
+                           key=f'{network_type}_extract_{self.osm_file.stem}',
+                           osm_file=source, osm_file_mtime=stat.st_mtime)
+
+    def _edges_from_extract(self, network_type: str) -> gpd.GeoDataFrame:
+        """Edges of the local OSM extract that pass the network type's way filter"""
+        import osmnx as ox
+
+        rules = way_filter_rules(network_type)
+        default_tags = list(ox.settings.useful_tags_way)
+        extra_tags = [key for key, _ in rules if key not in default_tags]
+
+        print(f'  Loading local OSM extract: {self.osm_file} ({network_type} ways)')
+        ox.settings.useful_tags_way = default_tags + extra_tags
+        try:
+            G = ox.graph_from_xml(self.osm_file, simplify=False, retain_all=True)
+        finally:
+            ox.settings.useful_tags_way = default_tags
+
+        # Unsimplified edges carry their way's tags, so filter before simplifying
+        G.remove_edges_from([
+            (u, v, k) for u, v, k, data in G.edges(keys=True, data=True)
+            if not _way_matches(data, rules)
+        ])
+        for _, _, data in G.edges(data=True):
+            for key in extra_tags:
+                data.pop(key, None)
+        G.remove_nodes_from([node for node, degree in G.degree() if degree == 0])
+        G = ox.simplify_graph(G)
+        return ox.graph_to_gdfs(G, nodes=False)
+
+    def _write(self,
+               edges: gpd.GeoDataFrame,
+               center: Tuple[float, float],
+               dist: float,
+               network_type: str,
+               bbox: Tuple[float, float, float, float],
+               key: Optional[str] = None,
+               **extra) -> Dict:
+        """Write edges as Hilbert-sorted GeoParquet with a bbox covering column"""
+        key = key or self.cache_key(center, dist, network_type)
+        path = self.cache_dir / f'{key}.parquet'
+        tmp_suffix = f'.{os.getpid()}.tmp'
+
+        edges = edges.iloc[np.argsort(edges.geometry.hilbert_distance())]
+        edges, list_columns = _lists_to_arrow(edges)
+        edges.to_parquet(path.with_suffix(tmp_suffix), write_covering_bbox=True, row_group_size=2048)
+        os.replace(path.with_suffix(tmp_suffix), path)
+
+        entry = {
+            'file': path.name,
+            'center': list(center),
+            'dist': dist,
+            'network_type': network_type,
+            'bbox': list(bbox),
+            'list_columns': list_columns,
+            'num_edges': len(edges),
+            **extra
+        }
+        sidecar = self.cache_dir / f'{key}.json'
+        with open(sidecar.with_suffix(tmp_suffix), 'w') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(sidecar.with_suffix(tmp_suffix), sidecar)
+
+        self.entries = [e for e in self.entries if e['file'] != path.name] + [entry]
+        return entry
+
+    def _read(self, entry: Dict, bbox: Tuple[float, float, float, float]) -> gpd.GeoDataFrame:
+        """Read the edges of a cached network that intersect bbox"""
+        edges = gpd.read_parquet(self.cache_dir / entry['file'], bbox=bbox)
+        edges = edges.drop(columns=['bbox'], errors='ignore')
+        return _lists_from_arrow(edges, entry.get('list_columns', []))
+
+
+def _lists_to_arrow(edges: gpd.GeoDataFrame) -> Tuple[gpd.GeoDataFrame, List[str]]:
+    """
+    Make list-valued OSM tag columns storable in Parquet
+
+    OSMnx mixes scalars and lists within a column (e.g. highway='primary'
+    or ['primary', 'secondary']). Such columns are stored as list columns
+    with scalars wrapped in one-element lists.
+    """
+    edges = edges.copy()
+    list_columns = []
+    for col in edges.columns:
+        if col == edges.geometry.name or edges[col].dtype != object:
+            continue
+        is_list = edges[col].map(lambda val: isinstance(val, list))
+        if is_list.any():
+            edges[col] = edges[col].where(
+                is_list | edges[col].isna(),
+                edges[col].map(lambda val: [val])
+            )
+            list_columns.append(col)
+    return edges, list_columns
+
+
+def _lists_from_arrow(edges: gpd.GeoDataFrame, list_columns: List[str]) -> gpd.GeoDataFrame:
+    """Undo _lists_to_arrow: one-element lists back to scalars, arrays to lists"""
+    for col in list_columns:
+        if col in edges.columns:
+            edges[col] = edges[col].map(
+                lambda val: (val[0] if len(val) == 1 else list(val))
+                if isinstance(val, (list, np.ndarray)) else val
+            )
+    return edges
@@ -0,0 +1,163 @@
+"""
+NOAA Weather Join
+Attach daily NOAA station weather to crash records by location and date
+
+Reads the daily summaries written by scripts/download_noaa_weather.py. Each
+crash is assigned its nearest station through a KD-tree, then takes that
+station's weather for the crash date (or the latest earlier day within a
+tolerance) with a single sorted merge_asof on (station, date).
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from scipy.spatial import cKDTree
+from typing import Optional
+
+
+EARTH_RADIUS_KM = 6371.0
+
+# Daily weather fields carried onto crash rows (as noaa_<field>)
+NOAA_WEATHER_FIELDS = ['precipitation_mm', 'snowfall_mm', 'snow_depth_mm',
+                       'temp_max_f', 'temp_min_f', 'temp_avg_f', 'wind_speed_mph']
+
+
+def _unit_vectors(lat, lon) -> np.ndarray:
+    """Points on the unit sphere, so KD-tree distances are chord lengths"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    return np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+
+
+def load_noaa_daily(weather_file: str) -> pd.DataFrame:
+    """
+    Load cleaned NOAA daily weather (one row per station-day)
+
+    Args:
+        weather_file: CSV from download_noaa_weather.py
+
+    Returns:
+        pd.DataFrame: station, station_lat, station_lon, date and NOAA_WEATHER_FIELDS
+    """
+    weather = pd.read_csv(weather_file)
+
+    # Station location: NOAA's own when requested, else the metro's
+    lat_col = 'LATITUDE' if 'LATITUDE' in weather.columns else 'metro_lat'
+    lon_col = 'LONGITUDE' if 'LONGITUDE' in weather.columns else 'metro_lon'
+
+    daily = pd.DataFrame({
+        'station': weather['STATION'].astype(str),
+        'station_lat': pd.to_numeric(weather[lat_col], errors='coerce'),
+        'station_lon': pd.to_numeric(weather[lon_col], errors='coerce'),
+        'date': pd.to_datetime(weather['date']).dt.normalize(),
+    })
+    for field in NOAA_WEATHER_FIELDS:
+        if field in weather.columns:
+            daily[field] = pd.to_numeric(weather[field], errors='coerce').astype('float32')
+
+    # A station can appear under several metros (DFW serves Dallas and Fort Worth)
+    return daily.drop_duplicates(subset=['station', 'date'])
+
+
+def join_noaa_weather(df: pd.DataFrame,
+                      weather: pd.DataFrame,
+                      lat_col: str = 'Start_Lat',
+                      lon_col: str = 'Start_Lng',
+                      time_col: str = 'Start_Time',
+                      max_station_km: Optional[float] = None,
+                      tolerance_days: int = 1) -> pd.DataFrame:
+    """
+    Attach the nearest station's daily weather to every crash
+
+    Args:
+        df: Crash records with coordinates and a timestamp
+        weather: Station-day weather from load_noaa_daily
+        lat_col, lon_col, time_col: Crash location and time columns
+        max_station_km: Leave crashes farther than this from any station unmatched
+        tolerance_days: Use the latest station report up to this many days
+            before the crash date when the crash date itself is missing
+
+    Returns:
+        pd.DataFrame: df with noaa_station, noaa_station_km and noaa_<field> columns
+    """
+    stations = weather.drop_duplicates('station')[['station', 'station_lat', 'station_lon']]
+    stations = stations.dropna(subset=['station_lat', 'station_lon']).reset_index(drop=True)
+    tree = cKDTree(_unit_vectors(stations['station_lat'], stations['station_lon']))
+
+    lat = pd.to_numeric(df[lat_col], errors='coerce').to_numpy()
+    lon = pd.to_numeric(df[lon_col], errors='coerce').to_numpy()
+    has_coords = np.isfinite(lat) & np.isfinite(lon)
+
+    # Nearest station for every crash in one query
+    chord, nearest = tree.query(_unit_vectors(lat[has_coords], lon[has_coords]))
+    station_km = np.full(len(df), np.nan)
+    station_km[has_coords] = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+    station_code = np.full(len(df), -1)
+    station_code[has_coords] = nearest
+    if max_station_km is not None:
+        station_code[station_km > max_station_km] = -1
+
+    # Station-day weather keyed on integer station codes
+    code_by_station = pd.Series(np.arange(len(stations)), index=stations['station'])
+    fields = [field for field in NOAA_WEATHER_FIELDS if field in weather.columns]
+    right = weather[['date'] + fields].copy()
+    right['station_code'] = code_by_station.reindex(weather['station']).to_numpy()
+    right = right.dropna(subset=['station_code', 'date'])
+    right['station_code'] = right['station_code'].astype(np.int64)
+    right = right.sort_values('date', kind='stable')
+
+    left = pd.DataFrame({
+        'row': np.arange(len(df)),
+        'station_code': station_code,
+        'date': pd.to_datetime(df[time_col], errors='coerce').dt.normalize().to_numpy(),
+    })
+    left = left[(left['station_code'] >= 0) & left['date'].notna()].sort_values('date', kind='stable')
+
+    matched = pd.merge_asof(
+        left, right,
+        on='date',
+        by='station_code',
+        direction='backward',
+        tolerance=pd.Timedelta(days=tolerance_days)
+    )
+
+    result = df.copy()
+    result['noaa_station'] = np.where(
+        station_code >= 0, stations['station'].to_numpy()[np.maximum(station_code, 0)], None
+    )
+    result['noaa_station_km'] = station_km.astype('float32')
+    for field in fields:
+        values = np.full(len(df), np.nan, dtype='float32')
+        values[matched['row'].to_numpy()] = matched[field].to_numpy(dtype='float32')
+        result[f'noaa_{field}'] = values
+
+    return result
+
+
+def attach_noaa_weather(df: pd.DataFrame, weather_file: str, verbose: bool = True, **kwargs) -> pd.DataFrame:
+    """
+    Load NOAA daily weather and join it to crashes, reporting coverage
+
+    Returns df unchanged (with a warning) when weather_file does not exist.
+    """
+    if not Path(weather_file).exists():
+        if verbose:
+            print(f'  ⚠ Weather file not found: {weather_file} (skipping NOAA weather)')
+        return df
+
+    weather = load_noaa_daily(weather_file)
+    if verbose:
+        print(f'  Weather: {weather["station"].nunique():,} stations, {len(weather):,} station-days')
+        print(f'  Dates: {weather["date"].min().date()} to {weather["date"].max().date()}')
+
+    result = join_noaa_weather(df, weather, **kwargs)
+
+    if verbose:
+        check = next((col for col in result.columns
+                      if col.startswith('noaa_') and col not in ('noaa_station', 'noaa_station_km')), None)
+        matched = result[check].notna().sum() if check else 0
+        print(f'  ✓ Matched {matched:,} / {len(result):,} crashes to station weather '
+              f'({matched / max(len(result), 1) * 100:.1f}%)')
+        print(f'  Median distance to station: {result["noaa_station_km"].median():.1f} km')
+
+    return result
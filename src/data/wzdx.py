@@ -0,0 +1,286 @@
+"""
+Streaming WZDx Feed Parser
+Single-pass, bounded-memory parsing of WZDx GeoJSON feeds into columns
+
+Features are decoded one at a time from the feed's "features" array, so
+memory is bounded by one read chunk plus the output columns rather than the
+whole parsed document. Core fields go into typed columns and geometry
+coordinates into one packed buffer with per-feature offsets; shapely builds
+all geometries of a type from those buffers at once.
+
+ijson is used for decoding when it is installed; otherwise a stdlib
+incremental decoder (json.JSONDecoder.raw_decode over a sliding buffer)
+walks the top-level object and the features array.
+"""
+
+import json
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from shapely.geometry import shape
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# Output column -> (where it lives, key, kind); kinds: str, float, bool
+WZDX_FIELDS = {
+    'id': ('feature', 'id', 'str'),
+    'data_source_id': ('core', 'data_source_id', 'str'),
+    'event_type': ('core', 'event_type', 'str'),
+    'direction': ('core', 'direction', 'str'),
+    'description': ('core', 'description', 'str'),
+    'start_date': ('props', 'start_date', 'str'),
+    'end_date': ('props', 'end_date', 'str'),
+    'vehicle_impact': ('props', 'vehicle_impact', 'str'),
+    'location_method': ('props', 'location_method', 'str'),
+    'work_zone_type': ('props', 'work_zone_type', 'str'),
+    'beginning_cross_street': ('props', 'beginning_cross_street', 'str'),
+    'ending_cross_street': ('props', 'ending_cross_street', 'str'),
+    'reduced_speed_limit_kph': ('props', 'reduced_speed_limit_kph', 'float'),
+    'beginning_milepost': ('props', 'beginning_milepost', 'float'),
+    'ending_milepost': ('props', 'ending_milepost', 'float'),
+    'is_start_date_verified': ('props', 'is_start_date_verified', 'bool'),
+    'is_end_date_verified': ('props', 'is_end_date_verified', 'bool'),
+}
+
+# Low-cardinality string columns stored as categoricals
+WZDX_CATEGORY_COLUMNS = ['data_source_id', 'event_type', 'direction', 'vehicle_impact',
+                         'location_method', 'work_zone_type']
+
+# Geometry type codes in the packed buffers
+GEOMETRY_CODES = {'Point': 0, 'LineString': 1, 'MultiPoint': 2}
+
+
+def _fill(buffer: str, f, chunk_size: int):
+    """Append the next chunk of the file to buffer ('' at end of file)"""
+    chunk = f.read(chunk_size)
+    return buffer + chunk, bool(chunk)
+
+
+def _iter_features_stdlib(f, chunk_size: int = 1 << 20) -> Iterator[Dict]:
+    """Yield features from an open WZDx file with json.JSONDecoder.raw_decode"""
+    decoder = json.JSONDecoder()
+    buffer, more = _fill('', f, chunk_size)
+    pos = 0
+
+    def skip(chars):
+        """Advance past whitespace and the given separator characters"""
+        nonlocal buffer, pos, more
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] in chars):
+                pos += 1
+            if pos < len(buffer) or not more:
+                return
+            buffer, more = _fill(buffer[pos:], f, chunk_size)
+            pos = 0
+
+    def decode():
+        """Decode the next complete JSON value, reading more input as needed"""
+        nonlocal buffer, pos, more
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number can end at a chunk boundary; make sure it is complete
+                if end < len(buffer) or not more:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if not more:
+                    raise
+            buffer, more = _fill(buffer[pos:], f, chunk_size)
+            pos = 0
+
+    def peek():
+        skip('')
+        return buffer[pos] if pos < len(buffer) else ''
+
+    skip('')
+    if peek() != '{':
+        raise ValueError('WZDx feed must be a JSON object')
+    pos += 1
+
+    while True:
+        skip(',')
+        if peek() == '}':
+            return
+        key = decode()
+        skip(':')
+        if key != 'features':
+            decode()  # feed_info, type, ...: decoded and dropped
+            continue
+
+        if peek() != '[':
+            raise ValueError('"features" must be an array')
+        pos += 1
+        while True:
+            skip(',')
+            if peek() == ']':
+                pos += 1
+                break
+            yield decode()
+            # Drop consumed text so the buffer stays about one chunk long
+            if pos > chunk_size:
+                buffer, pos = buffer[pos:], 0
+
+
+def iter_wzdx_features(path: str, chunk_size: int = 1 << 20) -> Iterator[Dict]:
+    """
+    Yield the features of a WZDx feed one at a time
+
+    Args:
+        path: WZDx GeoJSON file
+        chunk_size: Characters read per chunk (stdlib decoder)
+
+    Yields:
+        dict: One GeoJSON feature
+    """
+    if ijson is not None:
+        with open(path, 'rb') as f:
+            yield from ijson.items(f, 'features.item', use_float=True)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from _iter_features_stdlib(f, chunk_size=chunk_size)
+
+
+def _core_details(props: Dict) -> Dict:
+    """core_details as a dict (some feeds serialize it as a JSON string)"""
+    core = props.get('core_details') or {}
+    if isinstance(core, str):
+        try:
+            core = json.loads(core)
+        except ValueError:
+            core = {}
+    return core if isinstance(core, dict) else {}
+
+
+class WZDxColumns:
+    """Columnar builder for WZDx features: typed field columns plus packed coordinates"""
+
+    def __init__(self):
+        self.values = {col: [] for col in WZDX_FIELDS}
+        self.road_names = []
+        self.num_lanes = array('i')
+        self.lanes_closed = array('i')
+        self.has_workers = array('b')
+
+        # Packed geometry: flat x/y buffer, per-feature vertex offsets and type codes
+        self.coords = array('d')
+        self.offsets = array('q', [0])
+        self.geometry_type = array('b')
+        self.other_geometries = {}  # row -> shapely geometry for uncommon types
+
+    def __len__(self):
+        return len(self.geometry_type)
+
+    def append(self, feature: Dict):
+        """Add one feature"""
+        props = feature.get('properties') or {}
+        core = _core_details(props)
+        sources = {'feature': feature, 'props': props, 'core': core}
+
+        for col, (where, key, _) in WZDX_FIELDS.items():
+            self.values[col].append(sources[where].get(key))
+
+        self.road_names.append(', '.join(core.get('road_names') or []) or 'Unknown')
+        lanes = props.get('lanes') or []
+        self.num_lanes.append(len(lanes))
+        self.lanes_closed.append(sum(1 for lane in lanes if lane.get('status') == 'closed'))
+        self.has_workers.append(bool((props.get('worker_presence') or {}).get('are_workers_present')))
+
+        self._append_geometry(feature.get('geometry'))
+
+    def _append_geometry(self, geometry: Optional[Dict]):
+        geom_type = (geometry or {}).get('type')
+        code = GEOMETRY_CODES.get(geom_type, -1)
+        coordinates = (geometry or {}).get('coordinates')
+
+        if code == 0 and coordinates:
+            self.coords.extend(coordinates[:2])
+        elif code in (1, 2) and coordinates:
+            for vertex in coordinates:
+                self.coords.extend(vertex[:2])
+        elif geometry and coordinates:
+            self.other_geometries[len(self.geometry_type)] = shape(geometry)
+        else:
+            code = -2  # missing geometry
+
+        self.offsets.append(len(self.coords) // 2)
+        self.geometry_type.append(code)
+
+    def geometries(self) -> np.ndarray:
+        """Shapely geometries built per type from the packed buffers"""
+        coords = np.frombuffer(self.coords, dtype=np.float64).reshape(-1, 2)
+        offsets = np.frombuffer(self.offsets, dtype=np.int64)
+        codes = np.frombuffer(self.geometry_type, dtype=np.int8)
+        counts = np.diff(offsets)
+        geometries = np.full(len(codes), None, dtype=object)
+
+        # Index of the geometry each vertex belongs to
+        vertex_owner = np.repeat(np.arange(len(codes)), counts)
+
+        points = np.flatnonzero(codes == 0)
+        if len(points):
+            geometries[points] = shapely.points(coords[offsets[points]])
+
+        for code, build in [(1, shapely.linestrings), (2, shapely.multipoints)]:
+            rows = np.flatnonzero((codes == code) & (counts >= (2 if code == 1 else 1)))
+            if len(rows):
+                selected = np.isin(vertex_owner, rows)
+                _, indices = np.unique(vertex_owner[selected], return_inverse=True)
+                geometries[rows] = build(coords[selected], indices=indices)
+
+        for row, geometry in self.other_geometries.items():
+            geometries[row] = geometry
+        return geometries
+
+    def to_geodataframe(self) -> gpd.GeoDataFrame:
+        """Typed GeoDataFrame (EPSG:4326) of all appended features"""
+        data = {}
+        for col, (_, _, kind) in WZDX_FIELDS.items():
+            values = self.values[col]
+            if kind == 'float':
+                data[col] = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').astype('float32')
+            elif kind == 'bool':
+                data[col] = pd.array(values, dtype='boolean')
+            elif col in WZDX_CATEGORY_COLUMNS:
+                data[col] = pd.Categorical(values)
+            else:
+                data[col] = pd.array(values, dtype=object)
+        data['road_names'] = self.road_names
+        data['num_lanes'] = np.frombuffer(self.num_lanes, dtype=np.int32)
+        data['lanes_closed'] = np.frombuffer(self.lanes_closed, dtype=np.int32)
+        data['has_workers'] = np.frombuffer(self.has_workers, dtype=np.int8).astype(bool)
+        data['num_coordinates'] = np.diff(np.frombuffer(self.offsets, dtype=np.int64)).astype(np.int32)
+
+        return gpd.GeoDataFrame(data, geometry=self.geometries(), crs='EPSG:4326')
+
+
+def parse_wzdx_feed(path: str, event_types: Optional[List[str]] = None,
+                    chunk_size: int = 1 << 20) -> gpd.GeoDataFrame:
+    """
+    Parse a WZDx feed into a typed GeoDataFrame in one streaming pass
+
+    Args:
+        path: WZDx GeoJSON file
+        event_types: Keep only these core_details.event_type values (default: all)
+        chunk_size: Characters read per chunk (stdlib decoder)
+
+    Returns:
+        gpd.GeoDataFrame: WZDX_FIELDS columns plus road_names, num_lanes,
+        lanes_closed, has_workers, num_coordinates and geometry
+    """
+    columns = WZDxColumns()
+    for feature in iter_wzdx_features(path, chunk_size=chunk_size):
+        if event_types is not None:
+            event_type = _core_details(feature.get('properties') or {}).get('event_type')
+            if event_type not in event_types:
+                continue
+        columns.append(feature)
+    return columns.to_geodataframe()
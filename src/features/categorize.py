@@ -0,0 +1,141 @@
+"""
+Vectorized Categorization
+Bin and keyword categorizers driven by declarative tables
+
+Numeric values are binned with one np.searchsorted over the bin edges;
+strings are matched against keyword tables once per distinct value and
+the result is broadcast back through factorized codes. Both return a
+pd.Categorical. The tables below are the categorizations shared by the
+crash scripts: build_ml_training_dataset.py (time of day, weather,
+temperature), analyze_ny_crashes.py (traffic period) and
+integrate_ny_county_data.py (work zone risk).
+"""
+
+import re
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Time of day by hour: [0, 6) night, [6, 12) morning, [12, 18) afternoon, [18, 22) evening, [22, 24) night
+TIME_OF_DAY_BINS = [0, 6, 12, 18, 22, 24]
+TIME_OF_DAY_LABELS = ['night', 'morning', 'afternoon', 'evening', 'night']
+
+# NY traffic periods by hour: rush hours, midday and night
+TRAFFIC_PERIOD_BINS = [0, 6, 10, 16, 20, 24]
+TRAFFIC_PERIOD_LABELS = ['Night (8pm-6am)', 'Morning Rush (6-10am)', 'Midday (10am-4pm)',
+                         'Evening Rush (4-8pm)', 'Night (8pm-6am)']
+
+# Weather categories, checked in order; a condition takes the first match
+WEATHER_KEYWORDS = [
+    ('clear', ['clear', 'fair']),
+    ('cloudy', ['cloud', 'overcast']),
+    ('rain', ['rain', 'drizzle', 'shower']),
+    ('fog', ['fog', 'mist']),
+    ('snow', ['snow', 'sleet']),
+    ('storm', ['thunder', 'storm']),
+]
+WEATHER_CATEGORIES = [category for category, _ in WEATHER_KEYWORDS] + ['other', 'unknown']
+
+# Temperature (F): [-inf, 32) freezing, [32, 50) cold, [50, 70) mild, [70, 85) warm, [85, inf) hot
+TEMP_BINS = [-np.inf, 32, 50, 70, 85, np.inf]
+TEMP_LABELS = ['freezing', 'cold', 'mild', 'warm', 'hot']
+
+# Work zone crash risk score: [-inf, 10) Low, [10, 50) Medium, [50, 100) High, [100, inf) Very High
+RISK_SCORE_BINS = [-np.inf, 10, 50, 100, np.inf]
+RISK_SCORE_LABELS = ['Low', 'Medium', 'High', 'Very High']
+
+
+def _as_float(values) -> np.ndarray:
+    """Values as a float array with NaN for missing (handles nullable dtypes)"""
+    return pd.Series(values).to_numpy(dtype=float, na_value=np.nan)
+
+
+def bin_categories(values, bins: Sequence[float], labels: Sequence[str], right: bool = False,
+                   missing: str = 'unknown') -> pd.Categorical:
+    """
+    Label each value with the bin it falls in
+
+    Args:
+        values: Numeric values (array-like, NaN/NA allowed)
+        bins: Increasing bin edges (len(labels) + 1 of them)
+        labels: Label per bin; repeated labels share a category
+        right: Bins closed on the right (a, b] instead of [a, b)
+        missing: Label for missing values and values outside the bins
+
+    Returns:
+        pd.Categorical: Unordered; categories are the distinct labels in
+        order, then missing (which would otherwise rank above every bin)
+    """
+    if len(bins) != len(labels) + 1:
+        raise ValueError(f'{len(bins)} bin edges for {len(labels)} labels')
+
+    values = _as_float(values)
+    position = np.searchsorted(np.asarray(bins, dtype=float), values, side='left' if right else 'right') - 1
+    inside = (position >= 0) & (position < len(labels)) & ~np.isnan(values)
+
+    categories = list(dict.fromkeys(labels))
+    if missing not in categories:
+        categories.append(missing)
+    label_codes = np.array([categories.index(label) for label in labels] + [categories.index(missing)])
+
+    codes = label_codes[np.where(inside, position, len(labels))]
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def keyword_categories(values, keywords: List[Tuple[str, List[str]]], default: str = 'other',
+                       missing: str = 'unknown') -> pd.Categorical:
+    """
+    Label each string with the first category whose keywords it contains
+
+    Matching is case-insensitive and runs once per distinct value.
+
+    Args:
+        values: Strings (array-like, missing allowed)
+        keywords: Ordered (category, [substrings]) table
+        default: Label when no keywords match
+        missing: Label for missing values
+
+    Returns:
+        pd.Categorical: Categories are the table's categories, then default and missing
+    """
+    codes, uniques = pd.factorize(values)
+    lowered = pd.Series(uniques, dtype='object').astype(str).str.lower()
+    categories = list(dict.fromkeys([category for category, _ in keywords] + [default, missing]))
+
+    matches = [
+        lowered.str.contains('|'.join(re.escape(word) for word in words), regex=True).to_numpy(dtype=bool)
+        for _, words in keywords
+    ]
+    unique_codes = np.select(matches, [categories.index(category) for category, _ in keywords],
+                             default=categories.index(default))
+
+    # Missing values (code -1) take the last slot
+    lookup = np.append(unique_codes, categories.index(missing))
+    return pd.Categorical.from_codes(lookup[codes], categories=categories)
+
+
+def categorize_time_of_day(hour) -> pd.Categorical:
+    """Time-of-day category for each hour (missing hours count as night)"""
+    return bin_categories(hour, TIME_OF_DAY_BINS, TIME_OF_DAY_LABELS, missing='night')
+
+
+def categorize_traffic_period(hour) -> pd.Categorical:
+    """NY traffic period for each hour ('Unknown' where missing)"""
+    return bin_categories(hour, TRAFFIC_PERIOD_BINS, TRAFFIC_PERIOD_LABELS, missing='Unknown')
+
+
+def categorize_weather(conditions) -> pd.Categorical:
+    """Weather category for each Weather_Condition string"""
+    return keyword_categories(conditions, WEATHER_KEYWORDS)
+
+
+def categorize_temperature(temp) -> pd.Categorical:
+    """Temperature category for each reading ('unknown' where missing)"""
+    return bin_categories(temp, TEMP_BINS, TEMP_LABELS, missing='unknown')
+
+
+def categorize_risk_score(score) -> pd.Categorical:
+    """Risk level for each work zone crash risk score ('Unknown' where missing)"""
+    return bin_categories(score, RISK_SCORE_BINS, RISK_SCORE_LABELS, missing='Unknown')
@@ -23,7 +23,7 @@ def load_work_zones():
 
     # Ensure numeric columns
     numeric_cols = ['aadt_filled', 'duration_days', 'exposure_score',
-                    'vehicle_miles_traveled', 'lane_closure_risk']
+                    'estimated_segment_miles', 'vehicle_miles_traveled', 'lane_closure_risk']
     for col in numeric_cols:
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors='coerce')